@@ -3,4 +3,6 @@ from .organization import router as organization_router
 from .doc import router as doc_router
 from .auth import router as auth_router
 from .search import router as search_router
-from .qa import router as qa_router
\ No newline at end of file
+from .qa import router as qa_router
+from .metrics import router as metrics_router
+from .health import router as health_router
\ No newline at end of file
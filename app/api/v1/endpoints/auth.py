@@ -9,6 +9,7 @@ from app.api.v1.models.auth import UserLogin, AuthResponse
 from app.api.v1.models.response import StandardResponse
 from app.crud import user as crud_user
 from app.core import security
+from app.core.password_hashing import password_hasher, PasswordHashingBusyError
 
 router = APIRouter(tags=["Authentication"])
 
@@ -22,7 +23,16 @@ async def login_for_access_token(
     The token includes user_id and is_admin status.
     """
     user = await crud_user.get_user_by_username(db, user_credentials.username)
-    if not user or not security.verify_password(user_credentials.password, user.hashed_password):
+    try:
+        # bcrypt runs in the hashing pool so a burst of logins doesn't stall the event loop
+        password_ok = user is not None and await password_hasher.verify(user_credentials.password, user.hashed_password)
+    except PasswordHashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, please retry.",
+            headers={"Retry-After": "1"},
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
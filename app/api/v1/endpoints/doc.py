@@ -3,8 +3,9 @@ from typing import List
 from pymongo.asynchronous.database import AsyncDatabase
 
 from app.db.mongodb import get_database
-from app.crud.doc import upload_files, getDocsByOrgId
-from app.api.v1.models.doc import DocOutput
+from app.crud.doc import upload_files, getDocsByOrgId, reindex_document
+from app.crud.ingestion_job import get_job_by_id
+from app.api.v1.models.doc import DocOutput, IngestionJobOutput
 from app.api.v1.models.response import StandardResponse
 from app.core.dependencies import get_current_active_user
 from app.api.v1.models.user import UserInDB
@@ -55,4 +56,35 @@ async def get_docs_by_org_id(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve documents"
-        )
\ No newline at end of file
+        )
+
+@router.get("/jobs/{job_id}",response_model=StandardResponse[IngestionJobOutput], summary="Get ingestion job status")
+async def get_ingestion_job_status(
+    job_id: str,
+    db: AsyncDatabase = Depends(get_database),
+    current_user : UserInDB = Depends(get_current_active_user)
+):
+    job = await get_job_by_id(db, job_id, current_user.organization_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Ingestion job not found")
+
+    return StandardResponse(
+        status="success",
+        message=f"Ingestion job is {job.status}",
+        data=job
+    )
+
+
+@router.post("/{document_id}/reindex",response_model=StandardResponse[IngestionJobOutput], summary="Re-index a document incrementally")
+async def reindex_document_ep(
+    document_id: str,
+    db: AsyncDatabase = Depends(get_database),
+    current_user : UserInDB = Depends(get_current_active_user)
+):
+    job_id = await reindex_document(db, current_user.organization_id, document_id)
+    job = await get_job_by_id(db, job_id, current_user.organization_id)
+    return StandardResponse(
+        status="success",
+        message="Re-index job queued",
+        data=job
+    )
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from typing import Any, Dict
+
+from app.api.v1.models.response import StandardResponse
+from app.core.warmup import readiness
+
+# Unauthenticated: load balancers and orchestrators probe these
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live", response_model=StandardResponse[None], summary="The process is up and serving requests")
+async def live():
+    return StandardResponse(status="success", message="Alive")
+
+
+@router.get(
+    "/ready",
+    response_model=StandardResponse[Dict[str, Any]],
+    responses={503: {"description": "Backends are still warming up or MongoDB is unreachable"}},
+    summary="MongoDB is reachable and the vector store and LLM clients are warm"
+)
+async def ready():
+    report = await readiness()
+    if not report["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=StandardResponse(status="error", message="Not ready", data=report).model_dump()
+        )
+    return StandardResponse(status="success", message="Ready", data=report)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from typing import Any, Dict
+
+from app.api.v1.models.response import StandardResponse
+from app.core.dependencies import get_current_admin_user
+from app.core.metrics import collect_metrics
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"], dependencies=[Depends(get_current_admin_user)])
+
+
+@router.get("/", response_model=StandardResponse[Dict[str, Any]], summary="Cache and pipeline counters of this worker process")
+async def get_metrics():
+    return StandardResponse(
+        status="success",
+        message="Metrics retrieved successfully",
+        data=collect_metrics()
+    )
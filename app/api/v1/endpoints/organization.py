@@ -1,4 +1,4 @@
-from fastapi import APIRouter,Depends,HTTPException,status,Query
+from fastapi import APIRouter,Depends,HTTPException,status,Query,Response
 from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.errors import DuplicateKeyError, PyMongoError  # Import DuplicateKeyError and PyMongoError for exception handling
 from typing import List, Optional
@@ -6,6 +6,7 @@ from app.db.mongodb import get_database
 from app.api.v1.models import OrganizationCreate,OrganizationResponse,PyObjectId,OrganizationUpdate,StandardResponse
 # from app.crud import create_organization  # Import your create_organization function here
 from app.crud import organization as crud_organization   # Import your create_organization function here
+from app.crud.pagination import NEXT_CURSOR_HEADER, NEXT_CURSOR_RESPONSES
 
 router = APIRouter(prefix="/organization", tags=["Organization"])
 
@@ -85,21 +86,29 @@ async def update_organization_endpoint(org_id: PyObjectId, data: OrganizationUpd
 @router.get(
     "/",
     response_model=List[OrganizationResponse],
+    responses=NEXT_CURSOR_RESPONSES,
     summary="List all organizations"
 )
 async def list_organizations_endpoint(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, le=1000),
+    response: Response,
+    skip: int = Query(0, ge=0, description="Legacy offset paging, prefer cursor"),
+    limit: int = Query(100, ge=1, le=1000),
     search_name: Optional[str] = Query(None, description="Search by organization name (case-insensitive)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
     db: AsyncDatabase = Depends(get_database)
 ):
     """
-    Lists all organizations with optional filtering by name and pagination.
+    Lists all organizations sorted by name, with optional filtering by name and pagination.
+    The response body stays a plain list; the next page's cursor is sent in the
+    X-Next-Cursor header (absent on the last page), as for GET /user.
     """
-    organizations = await crud_organization.get_organizations(
+    organizations, next_cursor = await crud_organization.get_organizations(
         db,
         skip=skip,
         limit=limit,
-        search_name=search_name
+        search_name=search_name,
+        cursor=cursor
     )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return organizations
\ No newline at end of file
@@ -1,15 +1,21 @@
 from fastapi import APIRouter , HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from pymongo.asynchronous.database import AsyncDatabase
 from app.services import  qa_service
 from app.api.v1.models.qa import QARequest,QAResponse,ContextSource  # Assuming you have a model for the request
 from app.api.v1.models.user import UserInDB  # Assuming you have a User model
 from app.api.v1.models.response import StandardResponse  # Assuming you have a model for the request
 import time
+import json
 from app.core.dependencies import get_current_active_user
+from app.db.mongodb import get_database
+from app.crud.doc import resolve_vector_document_id
+from app.crud import organization as crud_organization
 
 router = APIRouter(prefix="/qa", tags=["Q&A"],dependencies=[Depends(get_current_active_user)])
 
 @router.post("/ask",response_model=StandardResponse[QAResponse])
-def ask_quetion(request:QARequest,current_user : UserInDB = Depends(get_current_active_user)):
+async def ask_quetion(request:QARequest,db: AsyncDatabase = Depends(get_database),current_user : UserInDB = Depends(get_current_active_user)):
     try:
         start_time = time.time()
      # Validate question
@@ -18,12 +24,17 @@ def ask_quetion(request:QARequest,current_user : UserInDB = Depends(get_current_
         
         print(f"Received question: {request.question}")
         
+        # Deduplicated documents are searched through the vectors of their original
+        document_id = await resolve_vector_document_id(db, current_user.organization_id, request.document_id)
+        rag_version = await crud_organization.get_rag_version(db, current_user.organization_id)
+
         # Get AI answer with context
-        result = qa_service.answer_question(
+        result = await qa_service.aanswer_question(
             question=request.question,
-            document_id=request.document_id,
+            document_id=document_id,
             organization_id=current_user.organization_id,
-            max_context_chunks=request.max_context_chunks
+            max_context_chunks=request.max_context_chunks,
+            rag_version=rag_version
         )
         # Calculate response time
         response_time = (time.time() - start_time) * 1000
@@ -46,7 +57,9 @@ def ask_quetion(request:QARequest,current_user : UserInDB = Depends(get_current_
             confidence=result["confidence"],
             context_sources=context_sources,
             total_sources=len(context_sources),
-            response_time_ms=round(response_time, 2)
+            response_time_ms=round(response_time, 2),
+            cached=result.get("cached", False),
+            cache_match=result.get("cache_match")
         )
         )
 
@@ -63,6 +76,38 @@ def ask_quetion(request:QARequest,current_user : UserInDB = Depends(get_current_
         print(f"Error answering question: {e}")
         raise HTTPException(status_code=500, detail=f"Q&A failed: {str(e)}")
 
+@router.post("/ask/stream", summary="Ask a question and stream the answer as Server-Sent Events")
+async def ask_question_stream(request:QARequest,db: AsyncDatabase = Depends(get_database),current_user : UserInDB = Depends(get_current_active_user)):
+    """
+    Streams `text/event-stream` events: `sources` (retrieved context, sent first),
+    `token` (answer text as generated), `done` (confidence and timings) or `error`.
+    """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    document_id = await resolve_vector_document_id(db, current_user.organization_id, request.document_id)
+    rag_version = await crud_organization.get_rag_version(db, current_user.organization_id)
+
+    async def event_stream():
+        try:
+            async for event, data in qa_service.astream_answer(
+                question=request.question,
+                document_id=document_id,
+                organization_id=current_user.organization_id,
+                max_context_chunks=request.max_context_chunks,
+                rag_version=rag_version
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            print(f"Error streaming answer: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': f'Q&A failed: {str(e)}'})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # Don't let proxies buffer the stream
+    )
+
 # @router.get("/ask/{question}")
 # def ask_one(question: str):
 #     rag_service.answer_question(question)
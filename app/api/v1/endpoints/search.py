@@ -1,15 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
+from pymongo.asynchronous.database import AsyncDatabase
 from app.api.v1.models.search import SearchRequest, SearchResponse, SearchResult
-from app.services import rag_service , search_service
+from app.services import search_service
 import time
 from app.api.v1.models.user import UserInDB
 
 from app.core.dependencies import get_current_active_user
+from app.db.mongodb import get_database
+from app.crud.doc import resolve_vector_document_id
 
 router = APIRouter(prefix="/search", tags=["Search"],dependencies=[Depends(get_current_active_user)])
 
 @router.post("/", response_model=SearchResponse)
-def search_documents(request: SearchRequest,current_user : UserInDB = Depends(get_current_active_user)):
+async def search_documents(request: SearchRequest,db: AsyncDatabase = Depends(get_database),current_user : UserInDB = Depends(get_current_active_user)):
     """
     Search through uploaded documents using semantic similarity
     """
@@ -19,13 +22,17 @@ def search_documents(request: SearchRequest,current_user : UserInDB = Depends(ge
         # Validate query
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
+        # Deduplicated documents are searched through the vectors of their original
+        document_id = await resolve_vector_document_id(db, current_user.organization_id, request.document_id)
+
         # One simple call - handles all cases
-        results = search_service.search_documents(
+        results = await search_service.asearch_documents(
             query=request.query,
             # organization_id=current_user.organization_id,
             organization_id=current_user.organization_id,
-            document_id=request.document_id,
-            top_k=request.top_k
+            document_id=document_id,
+            top_k=request.top_k,
+            diversify=request.diversify
         )
         
         # Calculate search time
@@ -37,7 +44,8 @@ def search_documents(request: SearchRequest,current_user : UserInDB = Depends(ge
                 text=result["text"],
                 score=result["score"],
                 relevance=result["relevance"],
-                metadata=result["metadata"]
+                metadata=result["metadata"],
+                retrieval=result.get("retrieval")
             )
             for result in results
         ]
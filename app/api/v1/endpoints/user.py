@@ -1,11 +1,13 @@
-from fastapi import APIRouter , Depends, HTTPException,status,Query
+from fastapi import APIRouter , Depends, HTTPException,status,Query,Response
 from pymongo.asynchronous.database import AsyncDatabase
 from typing import Optional, List
 from app.db.mongodb import get_database  # Import the get_database function
 from app.api.v1.models.user import UserCreate, PyObjectId,UserResponse,UserUpdate,UserInDB
 from app.api.v1.models.response import StandardResponse, DeleteResponse
+from app.crud.pagination import NEXT_CURSOR_HEADER, NEXT_CURSOR_RESPONSES
 from app.crud import user as crud_user
 from app.core.dependencies import get_current_admin_user,get_current_active_user
+from app.core.config import settings
 
 router = APIRouter(prefix="/user", tags=["User"],dependencies=[Depends(get_current_active_user)])
 
@@ -31,9 +33,41 @@ async def create_user_endpoint(user_create: UserCreate, db: AsyncDatabase = Depe
         )
 
 
-@router.get("/", response_model=StandardResponse[List[UserResponse]], summary="Get all users")
-async def get_all_users(skip:int = Query(0,ge=0),limit:int = Query(100,le=1000),search_name:Optional[str] = Query(None,description='Search user by name case insensitive'),db: AsyncDatabase = Depends(get_database),current_user:UserInDB = Depends(get_current_active_user)):
-        users = await crud_user.get_all_user(skip,limit,search_name,current_user.organization_id,db)
+@router.post("/bulk", status_code=status.HTTP_201_CREATED, response_model=StandardResponse[List[UserResponse]], summary="Create many users at once", dependencies=[Depends(get_current_admin_user)])
+async def create_users_endpoint(users_create: List[UserCreate], db: AsyncDatabase = Depends(get_database), current_user : UserInDB = Depends(get_current_active_user)):
+    if not users_create:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No users to create")
+    if len(users_create) > settings.USER_BULK_CREATE_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.USER_BULK_CREATE_MAX} users per request"
+        )
+    try:
+        new_users = await crud_user.create_users(db, users_create, organization_id=current_user.organization_id)
+        return StandardResponse(
+            status="success",
+            message=f"{len(new_users)} users created successfully",
+            data=new_users
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Unexpected Error during bulk user creation: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred."
+        )
+
+
+@router.get("/", response_model=StandardResponse[List[UserResponse]], responses=NEXT_CURSOR_RESPONSES, summary="Get all users")
+async def get_all_users(response:Response,skip:int = Query(0,ge=0,description='Legacy offset paging, prefer cursor'),limit:int = Query(100,ge=1,le=1000),search_name:Optional[str] = Query(None,description='Search user by name case insensitive'),cursor:Optional[str] = Query(None,description='X-Next-Cursor header of the previous page'),db: AsyncDatabase = Depends(get_database),current_user:UserInDB = Depends(get_current_active_user)):
+        """
+        Lists the organization's users sorted by first name. The next page's cursor is sent
+        in the X-Next-Cursor header (absent on the last page), as for GET /organization.
+        """
+        users, next_cursor = await crud_user.get_all_user(skip,limit,search_name,current_user.organization_id,db,cursor=cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         return StandardResponse(
             status="success",
             message="Users retrieved successfully",
@@ -1,6 +1,6 @@
 from pydantic import BaseModel,Field
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Optional
 from bson import ObjectId
 
 
@@ -14,8 +14,31 @@ class DocOutput(DocBase):
     unique_filename: str
     path: str
     uploadedAt: datetime
+    processed_for_rag: bool = False
+    job_id: Optional[str] = Field(None, description="Ingestion job id, poll /doc/jobs/{job_id} for progress")
+    deduplicated: bool = Field(False, description="True when the file matched an already indexed document and reuses its vectors")
+    duplicate_of: Optional[str] = Field(None, description="Id of the document whose vectors are reused")
     
     class Config:
         populate_by_name = True
         arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
\ No newline at end of file
+        json_encoders = {ObjectId: str}
+
+
+class IngestionJobOutput(BaseModel):
+    """Status of a background ingestion job (PDF -> chunks -> embeddings -> Pinecone)"""
+    id: str
+    document_id: str
+    organization_id: str
+    mode: str = "full"  # full, incremental
+    status: str  # queued, processing, completed, failed
+    stage: Optional[str] = None
+    progress: float = 0.0
+    attempts: int = 0
+    max_attempts: int
+    error: Optional[str] = None
+    enqueued_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_latency_ms: Optional[float] = Field(None, description="Time between enqueue and the last claim by a worker")
+    processing_time_ms: Optional[float] = None
@@ -18,4 +18,6 @@ class QAResponse(BaseModel):
     confidence: str  # High, Medium, Low
     context_sources: List[ContextSource]
     total_sources: int
-    response_time_ms: Optional[float] = None
\ No newline at end of file
+    response_time_ms: Optional[float] = None
+    cached: bool = Field(False, description="True when the answer was served from the answer cache without calling the LLM")
+    cache_match: Optional[str] = Field(None, description="exact or semantic (near-duplicate question)")
\ No newline at end of file
@@ -6,12 +6,14 @@ class SearchRequest(BaseModel):
     # organization_id: Optional[str] = None
     document_id: Optional[str] = None
     top_k: int = 5
+    diversify: Optional[bool] = None  # MMR re-ranking + adjacent chunk merging; None uses the server default
 
 class SearchResult(BaseModel):
     text: str
     score: float
     relevance: str
     metadata: Dict[str, Any]
+    retrieval: Optional[str] = None  # "vector", "lexical" or "hybrid" (found by both)
 
 class SearchResponse(BaseModel):
     query: str
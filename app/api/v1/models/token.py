@@ -9,4 +9,5 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: str
     user_id: str = Field(alias="user_id") # Use alias to match 'user_id' in JWT payload
-    is_admin: bool
\ No newline at end of file
+    is_admin: bool
+    issued_at: Optional[float] = None  # "iat", checked against the user's tokens_valid_after
\ No newline at end of file
@@ -32,6 +32,8 @@ class UserInDB(UserBase):
     hashed_password: Annotated[str, Field(description="Hashed password for the user account",exclude=True)]
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    # Epoch seconds; tokens issued before it are rejected (set when username or is_admin change)
+    tokens_valid_after: Optional[float] = Field(default=None, exclude=True)
 
     # model_config = ConfigDict(validate_by_name=True, validate_by_alias=True)
     # model_config = ConfigDict(populate_by_name=True)
@@ -6,6 +6,14 @@ class Settings(BaseSettings):
     APP_NAME: str = "Org User RAG API"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
+    # Clients (vector store, LLM) are created lazily; with warm-up on they are created in the
+    # background right after startup, retried every WARM_UP_RETRY_SECONDS until they succeed.
+    # GET /api/v1/health/ready reports 503 until then.
+    WARM_UP_ON_STARTUP: bool = True
+    WARM_UP_RETRY_SECONDS: float = 30.0
+    READINESS_MONGO_TIMEOUT_SECONDS: float = 2.0
+    # Create missing MongoDB indexes (app/db/indexes.py) at startup; existing ones are left alone
+    ENSURE_INDEXES_ON_STARTUP: bool = True
 
     # Database settings for MongoDB - NOW REQUIRED!
     MONGO_URI: str  # No default value, so it's required
@@ -25,6 +33,105 @@ class Settings(BaseSettings):
     PINECONE_API_KEY: str
     PINECONE_ENVIRONMENT: str
     PINECONE_INDEX_NAME: str 
+    # Vectors live in one namespace per organization. "migrating" also reads the shared namespace
+    # older deployments wrote to. Startup switches between the two by whether that namespace still
+    # has vectors, so "migrating" is only paid for until `python -m app.migrate_vectors` has run
+    PINECONE_NAMESPACE_MODE: str = "organization"
+
+    # Vector storage (see app/core/vector_backends): "pinecone", or "local" for the in-process
+    # memory-mapped engine, which needs no network and suits small and medium organizations
+    VECTOR_BACKEND: str = "pinecone"
+    LOCAL_VECTOR_DIR: str = ".cache/vectors"
+    # Local backend index: "flat" (exact) or "ivf" (approximate, for partitions of LOCAL_IVF_MIN_ROWS and up).
+    # More probes raise recall and latency; see benchmarks/bench_ann_recall.py to pick values
+    LOCAL_VECTOR_INDEX: str = "flat"
+    LOCAL_IVF_MIN_ROWS: int = 50_000
+    LOCAL_IVF_LISTS: int = 0  # 0 means sqrt(rows)
+    LOCAL_IVF_NPROBE: int = 16
+    LOCAL_IVF_REBUILD_FRACTION: float = 0.5  # Retrain centroids after the partition grows by this fraction
+    LOCAL_VECTOR_COMPACT_FRACTION: float = 0.3  # Compact a partition once this fraction of its rows is dead
+    # First-pass vectors kept in memory: "none" (float32 only), "int8" (~4x smaller) or "binary" (32x smaller).
+    # The best top_k * LOCAL_RESCORE_FACTOR rows are rescored against the float32 vectors on disk
+    # (0 = 8 for int8, 32 for binary). Binary recall depends on the data, measure it with bench_quantization.py
+    LOCAL_VECTOR_QUANTIZATION: str = "none"
+    LOCAL_RESCORE_FACTOR: int = 0
+    EMBEDDING_DIMENSION: int = 1536
+
+    # Hybrid retrieval: BM25 over chunk text (app/core/lexical_index.py, one SQLite FTS5 file per
+    # organization, shared on disk by API and workers) fused with vector results by reciprocal rank
+    HYBRID_SEARCH_ENABLED: bool = True
+    LEXICAL_INDEX_DIR: str = ".cache/lexical"
+    HYBRID_RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 20  # Results fetched from each retriever before fusion
+    # Search result relevance labels (and Q&A confidence) from the query/chunk cosine similarity.
+    # Depends on the embedding model: with text-embedding-ada-002 unrelated text still scores ~0.7
+    RELEVANCE_HIGH_SIMILARITY: float = 0.8
+    RELEVANCE_MEDIUM_SIMILARITY: float = 0.75
+    # Post-retrieval diversification: re-rank MMR_FETCH_K candidates with Maximal Marginal Relevance
+    # (1 = pure relevance, 0 = pure diversity) and merge adjacent chunks of a document into one span
+    SEARCH_DIVERSIFY: bool = False
+    MMR_FETCH_K: int = 20
+    MMR_LAMBDA: float = 0.7
+
+    # Embedding cache settings (see app/core/embedding_cache.py), "none" disables it
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    EMBEDDING_CACHE_BACKEND: str = "sqlite"
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500_000
+
+    # Document embedding scheduler (see app/core/embedding_scheduler.py), shared by all jobs in a process.
+    # The budget is per `python -m app.worker` command, split evenly between its --processes; workers on
+    # other hosts (or started separately) each need their own share of the OpenAI account quota
+    EMBEDDING_TOKENS_PER_MINUTE: int = 1_000_000  # Keep a little under the OpenAI account quota
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100_000
+    EMBEDDING_BATCH_MAX_INPUTS: int = 1000
+    EMBEDDING_MAX_CONCURRENT_REQUESTS: int = 4
+    EMBEDDING_MAX_RATE_LIMIT_RETRIES: int = 8  # 429s on one batch before its job fails
+    EMBEDDING_REQUEST_TIMEOUT_SECONDS: float = 900.0  # A job waiting longer for its embeddings fails (and is retried)
+
+    # Query embedding cache used by search_service (in-process, per worker)
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: int = 3600
+
+    # Q&A answer cache (see app/services/answer_cache.py); a threshold >= 1 disables near-duplicate matching
+    ANSWER_CACHE_SIZE: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.97
+
+    # Authenticated user cache (see app/core/user_cache.py), in-process per worker; size 0 disables it
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # Verified JWT claims (see app/core/token_cache.py), entries live until the token's exp; 0 disables it
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # Password hashing (see app/core/password_hashing.py): bcrypt runs in this many threads,
+    # 0 means one per CPU core; logins beyond MAX_PENDING queued operations get a 503
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    USER_BULK_CREATE_MAX: int = 500
+
+    # Upload settings
+    UPLOAD_DIR: str = "uploaded_files"
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024  # Files are streamed to disk in 1 MiB pieces
+    MAX_UPLOAD_FILE_BYTES: int = 150 * 1024 * 1024
+    MAX_UPLOAD_REQUEST_BYTES: int = 500 * 1024 * 1024
+
+    # PDF text extraction; 0 workers means one per CPU core
+    PDF_EXTRACTION_WORKERS: int = 0
+    PDF_PARALLEL_MIN_PAGES: int = 32  # Smaller documents are extracted in-process
+    PDF_PAGES_PER_TASK: int = 16
+
+    # Ingestion queue settings (see app/worker.py)
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_BACKOFF_SECONDS: int = 30
+    INGESTION_JOB_LEASE_SECONDS: int = 600  # A job whose lease expires is handed to another worker
+    INGESTION_POLL_INTERVAL_SECONDS: float = 2.0
+    INGESTION_JOBS_PER_WORKER: int = 4  # Concurrent jobs per worker process, their embeddings share one scheduler
+    # Streaming pipeline: memory use is bounded by batch size x queue size, not by document size
+    INGESTION_EMBED_BATCH_SIZE: int = 128
+    INGESTION_UPSERT_BATCH_SIZE: int = 100
+    INGESTION_PIPELINE_QUEUE_SIZE: int = 2
 
     model_config = SettingsConfigDict(env_file=".env", extra='ignore')
 
@@ -1,4 +1,6 @@
 # app/dependencies.py
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 # from fastapi.security import OAuth2PasswordBearer # REMOVE THIS LINE
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials # ADD THESE IMPORTS
@@ -10,19 +12,41 @@ from app.api.v1.models.user import UserInDB
 from app.api.v1.models.token import TokenData
 from app.core import security
 from app.crud import user as crud_user
+from app.core import user_cache
+from app.core import token_cache
 
 # Replace OAuth2PasswordBearer with HTTPBearer
 # This simply tells FastAPI/Swagger UI to expect a Bearer token in the Authorization header.
 # It does NOT involve a 'tokenUrl' as this scheme doesn't define how to GET the token.
 bearer_scheme = HTTPBearer() # Renamed from oauth2_scheme for clarity
 
+async def _load_user(user_id: str, db: AsyncDatabase) -> Optional[UserInDB]:
+    """
+    The user through the in-process user cache (see app/core/user_cache.py), or None if
+    they no longer exist. Only a cache miss reads MongoDB.
+    """
+    user = user_cache.get_user(user_id)
+    if user is not None:
+        return user
+    try:
+        user = await crud_user.get_user_by_id(user_id,db)
+    except HTTPException:
+        return None
+    user_cache.set_user(user)
+    return user
+
 async def get_current_user_from_token(
     # The dependency now receives HTTPAuthorizationCredentials
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: AsyncDatabase = Depends(get_database)
 ) -> TokenData:
     """
     Dependency to get essential user data directly from the JWT payload.
     This does NOT hit the database for every request, making it very fast.
+    Verified claims are cached until the token expires, so repeat requests skip the
+    signature check. Tokens of deleted users, or issued before the user's
+    tokens_valid_after, are rejected; both are read through the user cache here, and
+    uncached by get_current_admin_user.
     Raises HTTPException if token is invalid or expired.
     """
     credentials_exception = HTTPException(
@@ -34,18 +58,32 @@ async def get_current_user_from_token(
     try:
         # Access the token string from credentials.credentials
         token = credentials.credentials 
-        payload = security.decode_access_token(token)
-        if payload is None:
-            raise credentials_exception
+        # Signature already verified for this token (app/core/token_cache.py)?
+        cached = token_cache.get_claims(token)
+        if cached is not None:
+            token_data, issued_at = cached
+        else:
+            payload = security.decode_access_token(token)
+            if payload is None:
+                raise credentials_exception
+            
+            username: str = payload.get("sub")
+            user_id: str = payload.get("user_id")
+            is_admin: bool = payload.get("is_admin", False)
+            
+            if not username or not user_id:
+                raise credentials_exception
+            
+            issued_at = token_cache.issued_at_of(payload)
+            token_data = TokenData(username=username, user_id=user_id, is_admin=is_admin, issued_at=issued_at)
+            token_cache.set_claims(token, token_data, issued_at, payload["exp"])
         
-        username: str = payload.get("sub")
-        user_id: str = payload.get("user_id")
-        is_admin: bool = payload.get("is_admin", False)
-        
-        if not username or not user_id:
+        # Deleted users and users whose claims changed must log in again
+        user = await _load_user(token_data.user_id, db)
+        if token_cache.is_revoked(user is not None, user.tokens_valid_after if user else None, issued_at):
             raise credentials_exception
         
-        return TokenData(username=username, user_id=user_id, is_admin=is_admin)
+        return token_data
     
     except ExpiredSignatureError:
         raise HTTPException(
@@ -64,11 +102,11 @@ async def get_current_active_user(
     db: AsyncDatabase = Depends(get_database)
 ) -> UserInDB:
     """
-    Fetches the full UserInDB object from the database using the user_id from the token.
-    Use this when an endpoint needs the complete and freshest user profile data.
-    This dependency WILL hit the database.
+    Fetches the full UserInDB object using the user_id from the token.
+    Served from the in-process user cache when possible (see app/core/user_cache.py), so it
+    may be up to USER_CACHE_TTL_SECONDS stale for changes made by other worker processes.
     """
-    user = await crud_user.get_user_by_id(token_data.user_id,db)
+    user = await _load_user(token_data.user_id, db)
     
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found in database (token valid but user removed).")
@@ -76,16 +114,25 @@ async def get_current_active_user(
     return user
 
 async def get_current_admin_user(
-    token_data: TokenData = Depends(get_current_user_from_token)
+    token_data: TokenData = Depends(get_current_user_from_token),
+    db: AsyncDatabase = Depends(get_database)
 ) -> TokenData:
     """
     Dependency to ensure the current authenticated user has admin privileges.
-    This version relies *solely* on the 'is_admin' flag stored in the JWT payload
-    and does NOT perform an additional database lookup for freshness.
+    The 'is_admin' flag comes from the JWT payload. Changing it, or deleting the user,
+    revokes their tokens, and admin routes check that uncached (one projected _id
+    lookup) so a demoted or deleted admin is locked out at once in every process.
     """
     if not token_data.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Operation forbidden: Admin privileges required."
         )
+    state = await crud_user.get_token_state(token_data.user_id, db)
+    if token_cache.is_revoked(state is not None, (state or {}).get("tokens_valid_after"), token_data.issued_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return token_data
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace differences don't change meaning, don't let them cause cache misses"""
+    return " ".join(text.split())
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheBackend:
+    """Storage interface for cached embeddings, keyed by embedding_cache_key()"""
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, List[float]]):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class SQLiteEmbeddingCache(EmbeddingCacheBackend):
+    """
+    On-disk embedding cache in a single SQLite file, shared by the API and worker processes.
+    Vectors are stored as float32 blobs. When the cache grows past max_entries the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+        return found
+
+    def set_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"entries": entries, "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+# Available backends for settings.EMBEDDING_CACHE_BACKEND ("none" disables the cache)
+EMBEDDING_CACHE_BACKENDS = {
+    "sqlite": lambda: SQLiteEmbeddingCache(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_CACHE_MAX_ENTRIES),
+}
+
+
+def create_embedding_cache() -> Optional[EmbeddingCacheBackend]:
+    backend = settings.EMBEDDING_CACHE_BACKEND.lower()
+    if backend == "none":
+        return None
+    if backend not in EMBEDDING_CACHE_BACKENDS:
+        raise ValueError(f"Unknown embedding cache backend '{settings.EMBEDDING_CACHE_BACKEND}'")
+    return EMBEDDING_CACHE_BACKENDS[backend]()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings object so document embeddings are looked up in the cache first;
+    only the misses are sent to the underlying model, in one call.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, cache: EmbeddingCacheBackend):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def _missing_texts(self, texts: List[str], keys: List[str], cached: Dict[str, List[float]]) -> Dict[str, str]:
+        """Texts to send to the model, one per distinct missing key (repeated chunks are embedded once)"""
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        with self._counter_lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = self._missing_texts(texts, keys, cached)
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), new_vectors))
+            self.cache.set_many(new_items)
+            cached.update(new_items)
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_cache_key(self.model, text) for text in texts]
+        cached = await asyncio.to_thread(self.cache.get_many, keys)
+        missing = self._missing_texts(texts, keys, cached)
+
+        if missing:
+            new_vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), new_vectors))
+            await asyncio.to_thread(self.cache.set_many, new_items)
+            cached.update(new_items)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.cache.stats()
+        }
@@ -0,0 +1,303 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List
+
+from langchain_core.embeddings import Embeddings
+from openai import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# RateLimitError code OpenAI returns when the account is out of credit rather than over its
+# rate limit: retrying cannot succeed
+INSUFFICIENT_QUOTA = "insufficient_quota"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token for English text). Good enough for
+    budgeting, and unlike tiktoken it needs no encoding download.
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Tokens-per-minute budget: refills continuously up to one minute's worth of tokens"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.refill_per_second = tokens_per_minute / 60
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int, rate_factor: float = 1.0):
+        """Blocks until `tokens` are available. rate_factor < 1 slows the refill down."""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self._last_refill) * self.refill_per_second * rate_factor
+                )
+                self._last_refill = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / (self.refill_per_second * rate_factor)
+            time.sleep(min(wait, 1.0))
+
+
+class _EmbeddingRequest:
+    __slots__ = ("text", "tokens", "future", "rate_limited")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.future = Future()
+        self.rate_limited = 0  # 429s received by batches holding this text
+
+
+class EmbeddingScheduler:
+    """
+    Process-wide scheduler for document embedding calls.
+
+    Every ingestion job in the process submits its texts here. A dispatcher thread
+    packs the pending texts, across jobs and in arrival order, into requests of at
+    most max_batch_tokens / max_batch_inputs. It sends at most max_concurrency of
+    them at a time, each paid for from a tokens-per-minute bucket.
+
+    A 429 puts the batch back at the head of the queue, pauses dispatching with an
+    exponential backoff and halves the bucket's refill rate. Each successful request
+    then recovers 5% of the rate (AIMD), so the scheduler settles just under the quota.
+    A batch rate limited max_rate_limit_retries times in a row fails instead of being
+    requeued again, and so does one refused for insufficient_quota (no credit left).
+    embed() gives up after request_timeout seconds, and an error in the dispatcher fails
+    the batch it was dispatching; the next embed() starts a new dispatcher if it died.
+
+    The bucket only covers this process: processes sharing an OpenAI quota must each be
+    given their share of it as tokens_per_minute.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        tokens_per_minute: int,
+        max_batch_tokens: int,
+        max_batch_inputs: int,
+        max_concurrency: int,
+        max_rate_limit_retries: int = 8,
+        request_timeout: float = 900.0
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_concurrency = max_concurrency
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.request_timeout = request_timeout
+        self._bucket = TokenBucket(tokens_per_minute)
+        self._pending: "deque[_EmbeddingRequest]" = deque()
+        self._pending_tokens = 0
+        self._condition = threading.Condition()
+        self._slots = threading.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="embedding-scheduler")
+        self._dispatcher = None
+
+        self._rate_factor = 1.0
+        self._paused_until = 0.0
+        self._consecutive_rate_limits = 0
+        self._in_flight = 0
+        self._completed = deque()  # (timestamp, tokens) over the last minute, for tokens/sec
+        self.requests_sent = 0
+        self.rate_limited_responses = 0
+        self.failed_requests = 0
+        self.tokens_embedded = 0
+
+    def _ensure_dispatcher(self):
+        with self._condition:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True, name="embedding-dispatcher")
+                self._dispatcher.start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Blocking: queues the texts and returns their vectors once all batches holding them
+        are done. Raises TimeoutError after request_timeout seconds, and takes the texts not
+        sent yet off the queue.
+        """
+        if not texts:
+            return []
+        self._ensure_dispatcher()
+        requests = [_EmbeddingRequest(text) for text in texts]
+        with self._condition:
+            self._pending.extend(requests)
+            self._pending_tokens += sum(request.tokens for request in requests)
+            self._condition.notify()
+        deadline = time.monotonic() + self.request_timeout
+        try:
+            return [request.future.result(timeout=max(0.0, deadline - time.monotonic())) for request in requests]
+        except FutureTimeoutError:
+            self._withdraw(requests)
+            raise TimeoutError(f"Embedding {len(texts)} texts took longer than {self.request_timeout:.0f}s")
+
+    def _withdraw(self, requests: List[_EmbeddingRequest]):
+        """Removes requests that are still queued; batches already sent finish unobserved"""
+        withdrawn = set(map(id, requests))
+        with self._condition:
+            kept = [request for request in self._pending if id(request) not in withdrawn]
+            self._pending = deque(kept)
+            self._pending_tokens = sum(request.tokens for request in kept)
+
+    def _next_batch(self) -> List[_EmbeddingRequest]:
+        """Takes requests from the head of the queue up to the token and input limits (called with the lock held)"""
+        batch = []
+        batch_tokens = 0
+        while self._pending and len(batch) < self.max_batch_inputs:
+            request = self._pending[0]
+            if batch and batch_tokens + request.tokens > self.max_batch_tokens:
+                break
+            batch.append(self._pending.popleft())
+            batch_tokens += request.tokens
+        self._pending_tokens -= batch_tokens
+        return batch
+
+    def _dispatch_loop(self):
+        while True:
+            batch = []
+            slot_held = counted = False
+            try:
+                with self._condition:
+                    while not self._pending:
+                        self._condition.wait()
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    time.sleep(pause)
+                    continue
+
+                # Wait for a free request slot before taking texts off the queue, so that
+                # texts arriving meanwhile can still be packed into this batch
+                self._slots.acquire()
+                slot_held = True
+                with self._condition:
+                    batch = self._next_batch()
+                if not batch:
+                    self._slots.release()
+                    continue
+
+                self._bucket.acquire(sum(request.tokens for request in batch), self._rate_factor)
+                with self._condition:
+                    self._in_flight += 1
+                    self.requests_sent += 1
+                counted = True
+                # Once submitted, _send owns the slot and the batch
+                self._executor.submit(self._send, batch)
+            except Exception as e:
+                # Fail what was taken off the queue rather than leave its callers waiting
+                logger.exception(f"Embedding dispatcher error, failing a batch of {len(batch)} texts: {e}")
+                if counted:
+                    with self._condition:
+                        self._in_flight -= 1
+                if slot_held:
+                    self._slots.release()
+                if batch:
+                    self._fail(batch, e)
+                time.sleep(0.1)
+
+    def _send(self, batch: List[_EmbeddingRequest]):
+        batch_tokens = sum(request.tokens for request in batch)
+        try:
+            vectors = self.embeddings.embed_documents([request.text for request in batch])
+        except RateLimitError as e:
+            self._rate_limited(batch, batch_tokens, e)
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+            self._slots.release()
+
+        with self._condition:
+            self._consecutive_rate_limits = 0
+            self._rate_factor = min(1.0, self._rate_factor + 0.05)
+            self.tokens_embedded += batch_tokens
+            self._completed.append((time.monotonic(), batch_tokens))
+        for request, vector in zip(batch, vectors):
+            request.future.set_result(vector)
+
+    def _rate_limited(self, batch: List[_EmbeddingRequest], batch_tokens: int, error: RateLimitError):
+        """Backs off and requeues the batch, or fails it when retrying is pointless or exhausted"""
+        if getattr(error, "code", None) == INSUFFICIENT_QUOTA or getattr(error, "type", None) == INSUFFICIENT_QUOTA:
+            logger.error(f"Embedding request refused, the OpenAI account has no quota left: {error}")
+            self._fail(batch, error)
+            return
+        for request in batch:
+            request.rate_limited += 1
+        if max(request.rate_limited for request in batch) > self.max_rate_limit_retries:
+            logger.error(f"Embedding batch of {len(batch)} texts still rate limited after {self.max_rate_limit_retries} retries, giving up")
+            with self._condition:
+                self.rate_limited_responses += 1
+            self._fail(batch, error)
+            return
+
+        with self._condition:
+            self.rate_limited_responses += 1
+            self._consecutive_rate_limits += 1
+            self._rate_factor = max(0.05, self._rate_factor / 2)
+            backoff = min(60.0, 2 ** self._consecutive_rate_limits) * random.uniform(0.5, 1.0)
+            self._paused_until = time.monotonic() + backoff
+            # Put the batch back at the head of the queue, in its original order
+            self._pending.extendleft(reversed(batch))
+            self._pending_tokens += batch_tokens
+            self._condition.notify()
+        logger.warning(f"Embedding request rate limited, backing off {backoff:.1f}s at {self._rate_factor:.2f}x rate")
+
+    def _fail(self, batch: List[_EmbeddingRequest], error: Exception):
+        with self._condition:
+            self.failed_requests += 1
+        for request in batch:
+            request.future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            now = time.monotonic()
+            while self._completed and self._completed[0][0] < now - 60:
+                self._completed.popleft()
+            window = min(60.0, now - self._completed[0][0]) if self._completed else 0.0
+            recent_tokens = sum(tokens for _, tokens in self._completed)
+            return {
+                "queue_depth": len(self._pending),
+                "queued_tokens": self._pending_tokens,
+                "in_flight_requests": self._in_flight,
+                "requests_sent": self.requests_sent,
+                "rate_limited_responses": self.rate_limited_responses,
+                "failed_requests": self.failed_requests,
+                "rate_factor": round(self._rate_factor, 3),
+                "tokens_embedded": self.tokens_embedded,
+                "tokens_per_sec": round(recent_tokens / window, 1) if window > 0 else 0.0
+            }
+
+
+class ScheduledEmbeddings(Embeddings):
+    """
+    Embeddings adapter that sends document embeddings through an EmbeddingScheduler.
+    Query embeddings are latency sensitive and small, they go straight to the model.
+    """
+
+    def __init__(self, scheduler: EmbeddingScheduler, query_embeddings: Embeddings):
+        self.scheduler = scheduler
+        self.query_embeddings = query_embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.scheduler.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.query_embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.query_embeddings.aembed_query(text)
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+
+
+class LexicalIndex:
+    """
+    Per-organization BM25 index over chunk text: one SQLite database per organization
+    with an FTS5 table (porter-stemmed unicode61 tokens) over a plain chunks table.
+    Like the embedding cache, it is shared on disk by the API and worker processes.
+
+    search() takes an FTS5 MATCH expression; lexical_service builds them from user queries.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._connections: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+        self._connections_lock = threading.Lock()
+
+    def _path(self, organization_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_-]", "_", organization_id) + ".sqlite3")
+
+    def _connection(self, organization_id: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+        with self._connections_lock:
+            if organization_id not in self._connections:
+                os.makedirs(self.directory, exist_ok=True)
+                conn = sqlite3.connect(self._path(organization_id), check_same_thread=False, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS chunks (
+                        rowid INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document_id TEXT, text TEXT NOT NULL, metadata TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks (document_id);
+                    CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                        text, content='chunks', content_rowid='rowid', tokenize='porter unicode61'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                        INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                        INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+                    END;
+                """)
+                conn.commit()
+                self._connections[organization_id] = (conn, threading.Lock())
+            return self._connections[organization_id]
+
+    def add(self, organization_id: str, chunks: List[Dict[str, Any]]):
+        """Indexes chunks ({"id", "text", "metadata"}), replacing earlier versions with the same id"""
+        if not chunks:
+            return
+        conn, lock = self._connection(organization_id)
+        with lock:
+            conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk["id"],) for chunk in chunks])
+            conn.executemany(
+                "INSERT INTO chunks (id, document_id, text, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (chunk["id"], chunk["metadata"].get("document_id"), chunk["text"], json.dumps(chunk["metadata"]))
+                    for chunk in chunks
+                ]
+            )
+            conn.commit()
+
+    def delete(self, organization_id: str, ids: List[str]):
+        conn, lock = self._connection(organization_id)
+        with lock:
+            conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            conn.commit()
+
+    def document_chunk_ids(self, organization_id: str, document_id: str) -> List[str]:
+        conn, lock = self._connection(organization_id)
+        with lock:
+            return [chunk_id for (chunk_id,) in conn.execute("SELECT id FROM chunks WHERE document_id = ?", (document_id,))]
+
+    def delete_organization(self, organization_id: str):
+        with self._connections_lock:
+            conn, lock = self._connections.pop(organization_id, (None, None))
+        if conn is not None:
+            with lock:
+                conn.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self._path(organization_id) + suffix)
+            except FileNotFoundError:
+                pass
+
+    def search(
+        self, organization_id: str, match_expression: str, top_k: int, document_id: Optional[str] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top chunks by BM25, best first; the score is -bm25() so that higher is better"""
+        if not os.path.exists(self._path(organization_id)):
+            return []
+        conn, lock = self._connection(organization_id)
+        sql = (
+            "SELECT c.id, c.text, c.metadata, -bm25(chunks_fts) AS score FROM chunks_fts "
+            "JOIN chunks c ON c.rowid = chunks_fts.rowid WHERE chunks_fts MATCH ?"
+        )
+        params: List[Any] = [match_expression]
+        if document_id:
+            sql += " AND c.document_id = ?"
+            params.append(document_id)
+        sql += " ORDER BY bm25(chunks_fts) LIMIT ?"
+        params.append(top_k)
+        with lock:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            (Document(id=chunk_id, page_content=text, metadata=json.loads(metadata)), float(score))
+            for chunk_id, text, metadata, score in rows
+        ]
+
+
+lexical_index = LexicalIndex(settings.LEXICAL_INDEX_DIR)
@@ -1,22 +1,38 @@
-from langchain_openai import ChatOpenAI
+import threading
 from app.core.config import settings
 
 class LLMManager:
+    """Chat model client, created on first use so importing the app stays fast"""
+
     def __init__(self):
         self.llm = None
-        self._initialize()
+        self._init_lock = threading.Lock()
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.llm is not None
+
+    def initialize(self):
+        if self.llm is not None:
+            return
+        with self._init_lock:
+            if self.llm is None:
+                self._initialize()
     
     def _initialize(self):
+        from langchain_openai import ChatOpenAI
         try:
             print(f"Creating LLM Instance...")
             self.llm = ChatOpenAI(model="gpt-3.5-turbo",
                 temperature=0.1,  # Low temperature for factual answers
+                stream_usage=True,  # Token usage on streamed answers too
                 openai_api_key=settings.OPENAI_API_KEY)
         except Exception as e:
             print(f"Some thing went wrong while initializing LLM {e}")
             raise
     
     def get_llm(self):
+        self.initialize()
         return self.llm
     
 llm_manager = LLMManager()
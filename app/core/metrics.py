@@ -0,0 +1,13 @@
+from typing import Any, Callable, Dict
+
+# Components (caches, schedulers, pools...) register a function returning their
+# counters here; GET /api/v1/metrics returns a snapshot of all of them.
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_collector(name: str, collector: Callable[[], Dict[str, Any]]):
+    _collectors[name] = collector
+
+
+def collect_metrics() -> Dict[str, Any]:
+    return {name: collector() for name, collector in _collectors.items()}
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.core.security import pwd_context
+
+
+class PasswordHashingBusyError(Exception):
+    """More than max_pending hash / verify operations are already waiting"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded thread pool instead of on the event
+    loop: one bcrypt call takes a few hundred milliseconds, and on the loop it stalls every
+    other request of the worker. bcrypt releases the GIL, so max_workers calls run in
+    parallel on separate cores.
+
+    At most max_pending operations may be queued or running; beyond that calls fail fast
+    with PasswordHashingBusyError instead of piling up (login answers 503). Queue wait and
+    hashing times are reported through stats().
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int, max_pending: int):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = {"hash": 0, "verify": 0}
+        self.rejected = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.run_ms_total = 0.0
+
+    def _run(self, operation: str, function: Callable, args: tuple, submitted_at: float):
+        started_at = time.perf_counter()
+        with self._lock:
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self.running -= 1
+                self.completed[operation] += 1
+                queue_ms = (started_at - submitted_at) * 1000
+                self.queue_ms_total += queue_ms
+                self.queue_ms_max = max(self.queue_ms_max, queue_ms)
+                self.run_ms_total += (finished_at - started_at) * 1000
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self.pending -= 1
+
+    def _submit(self, operation: str, function: Callable, *args) -> Future:
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashingBusyError(f"{self.pending} password hashing operations already pending")
+            self.pending += 1
+        future = self._executor.submit(self._run, operation, function, args, time.perf_counter())
+        future.add_done_callback(self._release)
+        return future
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit("hash", self.context.hash, password))
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit("verify", self.context.verify, password, hashed_password))
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hashes a batch (bulk user creation) a window at a time. The window is half the
+        pool, so logins arriving meanwhile still find free workers.
+        """
+        window = max(1, self.max_workers // 2)
+        hashes = []
+        for start in range(0, len(passwords), window):
+            hashes.extend(await asyncio.gather(*(self.hash(password) for password in passwords[start:start + window])))
+        return hashes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = sum(self.completed.values())
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "running": self.running,
+                "hashes": self.completed["hash"],
+                "verifications": self.completed["verify"],
+                "rejected": self.rejected,
+                "avg_queue_ms": round(self.queue_ms_total / completed, 2) if completed else 0.0,
+                "max_queue_ms": round(self.queue_ms_max, 2),
+                "avg_hash_ms": round(self.run_ms_total / completed, 2) if completed else 0.0
+            }
+
+
+# One pool per process, shared by login, user creation and bulk imports
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+register_collector("password_hashing", password_hasher.stats)
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
@@ -5,7 +6,8 @@ from passlib.context import CryptContext
 
 from app.core.config import settings # Assuming you have this config
 
-# Password hashing setup
+# Password hashing setup. The only CryptContext in the app; request handlers go through
+# app.core.password_hashing, which runs it off the event loop
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # JWT configuration (ensure SECRET_KEY is loaded from settings)
@@ -31,7 +33,9 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # "iat" to sub-second precision: tokens issued before a revocation are rejected
+    # (app/core/token_cache.py), a token minted right after it must not be
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -0,0 +1,75 @@
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.api.v1.models.token import TokenData
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES
+
+# Claims of access tokens whose signature was already verified, keyed by a SHA-256 digest
+# of the token (the raw token is never kept). Clients send the same token on every request
+# for its whole lifetime, so most requests skip jwt.decode. Each entry expires at the
+# token's own exp, so an expired token is never served from the cache.
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Revocations are stored in MongoDB, as the user's tokens_valid_after (see
+# crud/user.py), so they survive restarts and reach every worker process. Admin routes read
+# it uncached on every request, so a revoked token stops working there at once. Other
+# requests read it through the user cache: another process sees a revocation within
+# USER_CACHE_TTL_SECONDS, the process that made the change right away.
+_lock = threading.Lock()
+_counters = {"revocations": 0, "revoked_rejections": 0}
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_claims(token: str) -> Optional[Tuple[TokenData, float]]:
+    """(claims, issued_at) of a previously verified token, or None"""
+    return token_cache.get(token_digest(token))
+
+
+def set_claims(token: str, token_data: TokenData, issued_at: float, expires_at: float):
+    token_cache.set(token_digest(token), (token_data, issued_at), ttl_seconds=expires_at - time.time())
+
+
+def issued_at_of(payload: Dict[str, Any]) -> float:
+    """Issue time of a decoded token; tokens minted without "iat" are dated from their exp"""
+    issued_at = payload.get("iat")
+    if issued_at is None:
+        return float(payload["exp"]) - ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    return float(issued_at)
+
+
+def is_revoked(user_exists: bool, tokens_valid_after: Optional[float], issued_at: float) -> bool:
+    """True for tokens of a deleted user or issued before the user's tokens_valid_after"""
+    if user_exists and (tokens_valid_after is None or issued_at >= tokens_valid_after):
+        return False
+    with _lock:
+        _counters["revoked_rejections"] += 1
+    return True
+
+
+def revoke_user_tokens(user_id: str):
+    """
+    Drops this process's cached claims of user_id. The revocation itself is the
+    tokens_valid_after the caller stores on the user, or the deleted user document.
+    """
+    user_id = str(user_id)
+    with _lock:
+        _counters["revocations"] += 1
+    token_cache.delete_where(lambda _key, value: value[0].user_id == user_id)
+
+
+def token_cache_stats() -> Dict[str, Any]:
+    stats = token_cache.stats()
+    with _lock:
+        stats.update(_counters)
+    return stats
+
+
+register_collector("token_cache", token_cache_stats)
@@ -0,0 +1,36 @@
+from typing import Any, Dict, Optional
+
+from app.api.v1.models.user import UserInDB
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import register_collector
+
+# Users resolved by get_current_active_user, keyed by user_id. Every authenticated request
+# needs the user, and a user makes many requests in a row, so most lookups skip MongoDB.
+# Updates and deletes in this process invalidate the entry right away; other worker
+# processes see the change once their entry expires (USER_CACHE_TTL_SECONDS).
+# Cached users are shared between requests: treat them as read-only.
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+_invalidations = {"count": 0}
+
+
+def get_user(user_id: str) -> Optional[UserInDB]:
+    return user_cache.get(str(user_id))
+
+
+def set_user(user: UserInDB):
+    user_cache.set(str(user.id), user)
+
+
+def invalidate_user(user_id: str):
+    if user_cache.delete(str(user_id)):
+        _invalidations["count"] += 1
+
+
+def user_cache_stats() -> Dict[str, Any]:
+    stats = user_cache.stats()
+    stats["invalidations"] = _invalidations["count"]
+    return stats
+
+
+register_collector("user_cache", user_cache_stats)
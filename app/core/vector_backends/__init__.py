@@ -0,0 +1,45 @@
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.core.vector_backends.base import TEXT_KEY, VectorBackend
+
+
+def _create_pinecone_backend(embeddings: Embeddings) -> VectorBackend:
+    from app.core.vector_backends.pinecone_backend import PineconeBackend
+    return PineconeBackend(
+        settings.PINECONE_API_KEY, settings.PINECONE_INDEX_NAME, settings.EMBEDDING_DIMENSION, embeddings,
+        namespace_mode=settings.PINECONE_NAMESPACE_MODE
+    )
+
+
+def _create_local_backend(embeddings: Embeddings) -> VectorBackend:
+    from app.core.vector_backends.local_backend import LocalVectorBackend
+    return LocalVectorBackend(
+        settings.LOCAL_VECTOR_DIR,
+        settings.EMBEDDING_DIMENSION,
+        index_type=settings.LOCAL_VECTOR_INDEX,
+        ivf_min_rows=settings.LOCAL_IVF_MIN_ROWS,
+        ivf_lists=settings.LOCAL_IVF_LISTS,
+        ivf_nprobe=settings.LOCAL_IVF_NPROBE,
+        ivf_rebuild_fraction=settings.LOCAL_IVF_REBUILD_FRACTION,
+        compact_fraction=settings.LOCAL_VECTOR_COMPACT_FRACTION,
+        quantization=settings.LOCAL_VECTOR_QUANTIZATION,
+        rescore_factor=settings.LOCAL_RESCORE_FACTOR
+    )
+
+
+# Available backends for settings.VECTOR_BACKEND
+VECTOR_BACKENDS = {
+    "pinecone": _create_pinecone_backend,
+    "local": _create_local_backend,
+}
+
+
+def create_vector_backend(embeddings: Embeddings) -> VectorBackend:
+    backend = settings.VECTOR_BACKEND.lower()
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown vector backend '{settings.VECTOR_BACKEND}'")
+    return VECTOR_BACKENDS[backend](embeddings)
+
+
+__all__ = ["TEXT_KEY", "VectorBackend", "VECTOR_BACKENDS", "create_vector_backend"]
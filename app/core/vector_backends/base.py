@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# Metadata key holding the chunk text, the same key PineconeVectorStore reads page_content from
+TEXT_KEY = "text"
+
+
+class VectorBackend:
+    """
+    Storage interface for chunk vectors, partitioned by organization: every call names the
+    organization, and a backend only looks at that organization's partition.
+
+    Records are {"id": chunk_id, "values": vector, "metadata": {...}} with the chunk
+    text under metadata[TEXT_KEY]. Filters use Pinecone's syntax: {"key": value},
+    {"key": {"$eq": value}} or {"key": {"$in": [values]}}. Scores are cosine similarities.
+    """
+
+    def upsert(self, organization_id: str, records: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def fetch_metadata(self, organization_id: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns {id: metadata} for the ids that exist"""
+        raise NotImplementedError
+
+    def fetch_vectors(self, organization_id: str, ids: List[str]) -> Dict[str, List[float]]:
+        """Returns {id: vector} for the ids that exist"""
+        raise NotImplementedError
+
+    def list_ids(self, organization_id: str, prefix: str) -> Iterator[str]:
+        raise NotImplementedError
+
+    def delete(self, organization_id: str, ids: List[str]):
+        raise NotImplementedError
+
+    def delete_organization(self, organization_id: str):
+        """Drops every vector of the organization"""
+        raise NotImplementedError
+
+    def query(
+        self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        raise NotImplementedError
+
+    async def aquery(
+        self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        return await asyncio.to_thread(self.query, organization_id, vector, top_k, filter)
+
+    async def aclose(self):
+        """Releases clients opened by aquery on the running event loop; called at shutdown"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+def to_document(chunk_id: str, metadata: Dict[str, Any], score: float) -> Tuple[Document, float]:
+    metadata = dict(metadata)
+    text = metadata.pop(TEXT_KEY, "")
+    return Document(id=chunk_id, page_content=text, metadata=metadata), score
@@ -0,0 +1,95 @@
+import numpy as np
+
+# Rows are assigned to centroids in blocks of this many, bounding the (rows x lists) score matrix
+_ASSIGN_BLOCK_ROWS = 8192
+# k-means is trained on a sample of this many points per list
+_TRAINING_POINTS_PER_LIST = 32
+
+
+def default_list_count(rows: int) -> int:
+    """sqrt(n) lists keeps both the centroid scan and the scanned lists small"""
+    return max(1, int(np.sqrt(rows)))
+
+
+def train_centroids(vectors: np.ndarray, list_count: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: unit-length centroids, points assigned by highest dot product"""
+    rng = np.random.default_rng(seed)
+    list_count = min(list_count, len(vectors))
+    centroids = np.array(vectors[rng.choice(len(vectors), list_count, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assignments = assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        list_ids, starts = np.unique(assignments[order], return_index=True)
+        sums = np.zeros_like(centroids)
+        sums[list_ids] = np.add.reduceat(vectors[order], starts, axis=0)
+        counts = np.bincount(assignments, minlength=list_count)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists with random points so every list stays useful
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids.astype(np.float32)
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+    """Nearest centroid of each vector, or of vectors[rows]; rows are gathered a block at a time"""
+    count = len(vectors) if rows is None else len(rows)
+    assignments = np.empty(count, dtype=np.int32)
+    for start in range(0, count, _ASSIGN_BLOCK_ROWS):
+        end = min(start + _ASSIGN_BLOCK_ROWS, count)
+        block = np.asarray(vectors[start:end] if rows is None else vectors[rows[start:end]])
+        assignments[start:end] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """
+    Inverted file index over the rows of a matrix of unit vectors. Rows are grouped by
+    their nearest centroid, and a query scores only the rows in its nprobe closest groups.
+    More probes mean better recall for more latency.
+
+    The index holds row numbers only; the vectors stay in the partition's matrix. Rows
+    covered_rows and above were written after the last add() and are not indexed yet.
+    Callers scan them directly. Deleted rows stay in their lists as tombstones and are
+    dropped by the caller's live-row mask, until the partition is compacted and the
+    index rebuilt.
+    """
+
+    def __init__(self, centroids: np.ndarray):
+        self.centroids = centroids
+        self.lists = [np.empty(0, dtype=np.int64) for _ in range(len(centroids))]
+        self.covered_rows = 0
+        self.indexed_rows = 0
+        self.trained_rows = 0
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, rows: np.ndarray, list_count: int = 0, seed: int = 0) -> "IVFIndex":
+        """Trains centroids on a sample of `rows` and indexes all of them"""
+        list_count = list_count or default_list_count(len(rows))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(rows), list_count * _TRAINING_POINTS_PER_LIST)
+        sample = np.sort(rng.choice(rows, sample_size, replace=False))
+        index = cls(train_centroids(np.asarray(matrix[sample]), list_count, seed=seed))
+        index.add(matrix, rows)
+        index.trained_rows = len(rows)
+        return index
+
+    def add(self, matrix: np.ndarray, rows: np.ndarray):
+        """Adds rows (ascending) to their nearest lists. Queries may run concurrently."""
+        if len(rows) == 0:
+            return
+        assignments = assign(matrix, self.centroids, rows)
+        order = np.argsort(assignments, kind="stable")
+        list_ids, starts = np.unique(assignments[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for list_id, start, end in zip(list_ids, starts, ends):
+            # Replace, don't mutate: a concurrent query keeps reading the old array
+            self.lists[list_id] = np.concatenate([self.lists[list_id], rows[order[start:end]]])
+        self.indexed_rows += len(rows)
+        self.covered_rows = max(self.covered_rows, int(rows[-1]) + 1)
+
+    def candidates(self, query_vector: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query_vector), nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[list_id] for list_id in closest])
@@ -0,0 +1,602 @@
+import asyncio
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.core.vector_backends.base import VectorBackend, to_document
+from app.core.vector_backends.ivf import IVFIndex
+from app.core.vector_backends.quantization import DEFAULT_RESCORE_FACTORS, QUANTIZATION_KINDS, QuantizedMatrix
+
+_INITIAL_CAPACITY = 1024
+# Rows appended since the last index update before maintenance adds them to the IVF lists
+_INDEX_TAIL_ROWS = 1024
+# Partitions smaller than this are never compacted, a rewrite would cost more than the dead rows
+_COMPACT_MIN_ROWS = 1024
+_COPY_BLOCK_ROWS = 8192
+
+
+def _matches(value, condition) -> bool:
+    if isinstance(condition, dict):
+        if "$eq" in condition:
+            return value == condition["$eq"]
+        if "$in" in condition:
+            return value in condition["$in"]
+        raise ValueError(f"Unsupported filter condition {condition}")
+    return value == condition
+
+
+class _Partition:
+    """
+    One organization's vectors. Rows of an (capacity, dimension) float32 matrix in a
+    memory-mapped file hold L2-normalized vectors, so a dot product is the cosine
+    similarity. An SQLite table maps rows to chunk ids and metadata. Only ids, document
+    ids and the live-row mask are kept in memory; metadata is read for the top-k rows only.
+
+    With quantization="int8" or "binary" a quantized copy of the rows is also kept in
+    memory (see quantization.py). Queries rank by it first and rescore only the best
+    top_k * rescore_factor rows against the memory-mapped float32 matrix, so the full
+    matrix no longer has to stay in the page cache.
+
+    Rows are append-only: an update writes a new row and leaves the old one dead. Row
+    numbers are never reused, even after the last rows are deleted: partition_meta keeps
+    the high-water mark ('size'), so the IVF lists and the quantized copy, which cover
+    rows by number, never mistake a new vector for the one that used to be there. Once
+    dead rows pass compact_fraction, a background compaction copies the live rows into
+    the next generation's file. With index_type="ivf", partitions of at least
+    ivf_min_rows get an IVF index (see ivf.py), built and kept up to date in the background.
+
+    The API and the ingestion workers open the same files. Writes allocate rows inside an
+    SQLite write transaction, and readers reload their in-memory view when SQLite reports
+    a commit from another connection.
+    """
+
+    def __init__(self, directory: str, dimension: int, options: Dict[str, Any]):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dimension = dimension
+        self.options = options
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "chunks.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+            "document_id TEXT, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS partition_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self.matrix = None
+        self.capacity = 0
+        self.generation = None
+        self.index: Optional[IVFIndex] = None
+        self.quantized: Optional[QuantizedMatrix] = None
+        self._maintenance_thread = None
+        self._data_version = None
+        self.compactions = 0
+        self.index_builds = 0
+        self._reload()
+
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.directory, "vectors.f32" if generation == 0 else f"vectors.{generation}.f32")
+
+    def _open_matrix(self, min_rows: int = 0):
+        path = self._vectors_path(self.generation)
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        row_bytes = self.dimension * 4
+        file_rows = os.path.getsize(path) // row_bytes
+        if min_rows > file_rows:
+            # Grow geometrically; the file only ever grows, so mappings other processes hold stay valid
+            file_rows = max(min_rows, file_rows * 2, _INITIAL_CAPACITY)
+            with open(path, "r+b") as f:
+                f.truncate(file_rows * row_bytes)
+        if file_rows != self.capacity or self.matrix is None:
+            self.matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(file_rows, self.dimension)) if file_rows else np.zeros((0, self.dimension), dtype=np.float32)
+            self.capacity = file_rows
+
+    def _reload(self):
+        """Rebuilds the in-memory view from SQLite (called with the lock held)"""
+        # Read before the snapshot is taken, so a commit that lands after it triggers another reload
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        snapshot = not self._conn.in_transaction
+        if snapshot:
+            # A compaction commits the generation and the renumbered rows together; read both from one snapshot
+            self._conn.execute("BEGIN")
+        try:
+            meta = dict(self._conn.execute("SELECT key, value FROM partition_meta WHERE key IN ('generation', 'size')"))
+            rows = self._conn.execute("SELECT row, id, document_id FROM chunks").fetchall()
+        finally:
+            if snapshot:
+                self._conn.commit()
+        generation = int(meta.get("generation", 0))
+        if generation != self.generation:
+            # Compacted by another process: rows were renumbered and live in a new file
+            self.generation = generation
+            self.matrix = None
+            self.index = None
+            self.quantized = None
+        # Partitions written before the high-water mark was stored fall back to the last live row
+        self.size = max(int(meta.get("size", 0)), max((row for row, _, _ in rows), default=-1) + 1)
+        self._open_matrix(self.size)
+        self.ids = [None] * self.size
+        self.document_codes = np.full(self.size, -1, dtype=np.int32)
+        self.alive = np.zeros(self.size, dtype=bool)
+        self.document_code_of: Dict[str, int] = {}
+        self.id_to_row: Dict[str, int] = {}
+        for row, chunk_id, document_id in rows:
+            self.ids[row] = chunk_id
+            self.id_to_row[chunk_id] = row
+            self.alive[row] = True
+            self.document_codes[row] = self.document_code_of.setdefault(document_id, len(self.document_code_of))
+        self._update_quantized()
+        self._data_version = data_version
+
+    def _set_size(self, size: int):
+        """Records the row high-water mark (called inside a write transaction)"""
+        self._conn.execute("INSERT OR REPLACE INTO partition_meta (key, value) VALUES ('size', ?)", (str(size),))
+
+    def _update_quantized(self):
+        """Quantizes rows written since the last update (called with the lock held)"""
+        if self.options["quantization"] == "none":
+            return
+        if self.quantized is None or self.quantized.rows > self.size:
+            self.quantized = QuantizedMatrix(self.options["quantization"], self.dimension)
+        self.quantized.extend_from(self.matrix, self.size)
+
+    def _refresh(self):
+        """Picks up commits made by other processes (called with the lock held)"""
+        if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._reload()
+
+    def upsert(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        records = list({record["id"]: record for record in records}.values())
+        vectors = np.asarray([record["values"] for record in records], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                first_row = self.size
+                self._open_matrix(first_row + len(records))
+                self.matrix[first_row:first_row + len(records)] = vectors
+                self.matrix.flush()
+                # id is UNIQUE, so REPLACE also drops the row an updated chunk used to occupy
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (row, id, document_id, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (first_row + offset, record["id"], record["metadata"].get("document_id"), json.dumps(record["metadata"]))
+                        for offset, record in enumerate(records)
+                    ]
+                )
+                self._set_size(first_row + len(records))
+                # Own commits don't change data_version; read it while the write lock still excludes other writers
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._reload()
+                raise
+            self.ids.extend(record["id"] for record in records)
+            self.alive = np.concatenate([self.alive, np.ones(len(records), dtype=bool)])
+            self.document_codes = np.concatenate([self.document_codes, np.array([
+                self.document_code_of.setdefault(record["metadata"].get("document_id"), len(self.document_code_of))
+                for record in records
+            ], dtype=np.int32)])
+            for offset, record in enumerate(records):
+                old_row = self.id_to_row.get(record["id"])
+                if old_row is not None:
+                    self.alive[old_row] = False
+                    self.ids[old_row] = None
+                self.id_to_row[record["id"]] = first_row + offset
+            self.size = first_row + len(records)
+            self._update_quantized()
+            self._data_version = data_version
+            self._schedule_maintenance(with_index=False)
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                rows = [self.id_to_row[chunk_id] for chunk_id in ids if chunk_id in self.id_to_row]
+                self._conn.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+                data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                self._reload()
+                raise
+            for row in rows:
+                del self.id_to_row[self.ids[row]]
+                self.alive[row] = False
+                self.ids[row] = None
+            self._data_version = data_version
+            self._schedule_maintenance(with_index=False)
+
+    def fetch_metadata(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for chunk_id, metadata in self._conn.execute(
+                    f"SELECT id, metadata FROM chunks WHERE id IN ({placeholders})", batch
+                ):
+                    found[chunk_id] = json.loads(metadata)
+        return found
+
+    def fetch_vectors(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            self._refresh()
+            rows = {chunk_id: self.id_to_row[chunk_id] for chunk_id in ids if chunk_id in self.id_to_row}
+            matrix = self.matrix
+        if not rows:
+            return {}
+        vectors = np.asarray(matrix[list(rows.values())])
+        return dict(zip(rows.keys(), vectors))
+
+    def list_ids(self, prefix: str) -> List[str]:
+        with self._lock:
+            return [
+                chunk_id for (chunk_id,) in self._conn.execute(
+                    "SELECT id FROM chunks WHERE id >= ? AND id < ? ORDER BY id", (prefix, prefix + "\uffff")
+                )
+            ]
+
+    def _filter_mask(self, organization_id: str, filter: Optional[Dict[str, Any]]):
+        """Live rows matching the filter (called with the lock held)"""
+        mask = self.alive.copy()
+        for key, condition in (filter or {}).items():
+            if key == "organization_id":
+                # The partition already holds only this organization's rows
+                if not _matches(organization_id, condition):
+                    mask[:] = False
+            elif key == "document_id":
+                values = condition["$in"] if isinstance(condition, dict) and "$in" in condition else [
+                    condition["$eq"] if isinstance(condition, dict) else condition
+                ]
+                codes = [self.document_code_of[value] for value in values if value in self.document_code_of]
+                mask &= np.isin(self.document_codes, codes)
+            else:
+                allowed = np.zeros(self.size, dtype=bool)
+                for row, metadata in self._conn.execute("SELECT row, metadata FROM chunks"):
+                    if _matches(json.loads(metadata).get(key), condition):
+                        allowed[row] = True
+                mask &= allowed
+        return mask
+
+    def _candidate_rows(self, index: IVFIndex, mask: np.ndarray, query_vector: np.ndarray, size: int):
+        """Rows in the nprobe closest IVF lists plus the not yet indexed tail, restricted to the mask"""
+        candidates = index.candidates(query_vector, self.options["ivf_nprobe"])
+        candidates = np.unique(np.concatenate([candidates[candidates < size], np.arange(index.covered_rows, size)]))
+        return candidates[mask[candidates]]
+
+    def query(self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]]):
+        with self._lock:
+            self._refresh()
+            mask = self._filter_mask(organization_id, filter)
+            matrix = self.matrix
+            size = self.size
+            ids = self.ids
+            index = self.index
+            quantized = self.quantized
+            quantized_view = quantized.view(size) if quantized is not None else None
+            self._schedule_maintenance()
+        query_vector = np.asarray(vector, dtype=np.float32)
+        query_vector /= np.linalg.norm(query_vector) or 1
+
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return []
+        if index is not None and len(rows) >= self.options["ivf_min_rows"]:
+            candidates = self._candidate_rows(index, mask, query_vector, size)
+            if len(candidates) >= top_k:
+                rows = candidates
+        shortlist_size = top_k * self.options["rescore_factor"]
+        if quantized is not None and len(rows) > shortlist_size:
+            # Rank by the quantized codes, then rescore the shortlist at full precision below
+            approximate = quantized.scores(quantized_view, query_vector, None if len(rows) == size else rows)
+            rows = np.sort(rows[np.argpartition(-approximate, shortlist_size - 1)[:shortlist_size]])
+        if len(rows) == size:
+            scores = matrix[:size] @ query_vector
+        else:
+            # Selective filter (one document) or IVF candidates: score just those rows
+            scores = matrix[rows] @ query_vector
+        k = min(top_k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        best = best[np.argsort(-scores[best])]
+        best_rows = rows[best] if len(rows) != size else best
+        best_ids = [ids[int(row)] for row in best_rows]
+        metadata_by_id = self.fetch_metadata([chunk_id for chunk_id in best_ids if chunk_id is not None])
+        return [
+            to_document(chunk_id, metadata_by_id[chunk_id], float(score))
+            for chunk_id, score in zip(best_ids, scores[best])
+            if chunk_id in metadata_by_id
+        ]
+
+    def _compaction_due(self) -> bool:
+        """Called with the lock held"""
+        dead = self.size - len(self.id_to_row)
+        return self.size >= _COMPACT_MIN_ROWS and dead > self.options["compact_fraction"] * self.size
+
+    def _maintenance_due(self, with_index: bool) -> bool:
+        """Called with the lock held"""
+        if self._compaction_due():
+            return True
+        if not with_index or self.options["index_type"] != "ivf" or len(self.id_to_row) < self.options["ivf_min_rows"]:
+            return False
+        if self.index is None or self.size - self.index.covered_rows >= _INDEX_TAIL_ROWS:
+            return True
+        # Centroids were trained on a much smaller partition, retrain
+        return self.index.indexed_rows - self.index.trained_rows > self.options["ivf_rebuild_fraction"] * self.index.trained_rows
+
+    def _schedule_maintenance(self, with_index: bool = True):
+        """
+        Starts background compaction / index maintenance if it is due (called with the lock held).
+        Only processes that query keep an index; writers pass with_index=False.
+        """
+        if self._maintenance_thread is not None or not self._maintenance_due(with_index):
+            return
+        self._maintenance_thread = threading.Thread(
+            target=self._maintain, args=(with_index,), daemon=True, name="vector-maintenance"
+        )
+        self._maintenance_thread.start()
+
+    def _maintain(self, with_index: bool):
+        try:
+            with self._lock:
+                compact = self._compaction_due()
+            if compact:
+                self.compact()
+            if with_index and self.options["index_type"] == "ivf":
+                self.update_index()
+        except Exception as e:
+            print(f"Error maintaining local vector partition {self.directory}: {e}")
+        finally:
+            with self._lock:
+                self._maintenance_thread = None
+
+    def update_index(self):
+        """Builds or retrains the IVF index, or adds the rows written since the last update"""
+        with self._lock:
+            self._refresh()
+            generation = self.generation
+            matrix = self.matrix
+            size = self.size
+            alive = self.alive.copy()
+            index = self.index
+        if int(alive.sum()) < self.options["ivf_min_rows"]:
+            return
+        rebuild = index is None or (
+            index.indexed_rows - index.trained_rows > self.options["ivf_rebuild_fraction"] * index.trained_rows
+        )
+        if rebuild:
+            start_time = time.perf_counter()
+            index = IVFIndex.build(matrix, np.flatnonzero(alive[:size]), self.options["ivf_lists"])
+            print(f"Built IVF index over {index.indexed_rows} vectors in {time.perf_counter() - start_time:.2f}s")
+        else:
+            tail = np.flatnonzero(alive[index.covered_rows:size]) + index.covered_rows
+            index.add(matrix, tail)
+        with self._lock:
+            if self.generation != generation:
+                # Compacted meanwhile, rows were renumbered; the next maintenance run starts over
+                return
+            if rebuild:
+                self.index = index
+                self.index_builds += 1
+
+    def compact(self):
+        """
+        Copies live rows into the next generation's file and renumbers them. Rows are
+        copied without holding the lock (written rows never change), then rows written
+        meanwhile are copied and the switch is committed under the lock.
+
+        Every process may compact the same partition at once, so rows are copied into a
+        private temporary file that only the process winning the commit renames into place.
+        """
+        with self._lock:
+            self._refresh()
+            generation = self.generation
+            matrix = self.matrix
+            snapshot_size = self.size
+            live = np.flatnonzero(self.alive[:snapshot_size])
+        new_path = self._vectors_path(generation + 1)
+        temporary_path = f"{new_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        new_matrix = np.memmap(temporary_path, dtype=np.float32, mode="w+", shape=(max(len(live), 1), self.dimension))
+        for start in range(0, len(live), _COPY_BLOCK_ROWS):
+            new_matrix[start:start + _COPY_BLOCK_ROWS] = matrix[live[start:start + _COPY_BLOCK_ROWS]]
+        new_matrix.flush()
+        del new_matrix
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                if self.generation != generation:
+                    # Another process compacted first
+                    self._conn.rollback()
+                    os.remove(temporary_path)
+                    return
+                tail = np.flatnonzero(self.alive[snapshot_size:self.size]) + snapshot_size
+                if len(tail):
+                    with open(temporary_path, "r+b") as f:
+                        f.truncate((len(live) + len(tail)) * self.dimension * 4)
+                    new_matrix = np.memmap(temporary_path, dtype=np.float32, mode="r+", shape=(len(live) + len(tail), self.dimension))
+                    new_matrix[len(live):] = self.matrix[tail]
+                    new_matrix.flush()
+                    del new_matrix
+                # New row numbers never exceed old ones, so renumbering in ascending order never collides
+                old_rows = np.concatenate([live, tail])
+                self._conn.executemany(
+                    "UPDATE chunks SET row = ? WHERE row = ?",
+                    [(new_row, int(old_row)) for new_row, old_row in enumerate(old_rows) if new_row != old_row]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO partition_meta (key, value) VALUES ('generation', ?)", (str(generation + 1),)
+                )
+                self._set_size(len(old_rows))
+                os.replace(temporary_path, new_path)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+                raise
+            dead = self.size - len(self.id_to_row)
+            self._reload()
+            self.compactions += 1
+        try:
+            os.remove(self._vectors_path(generation))
+        except OSError:
+            pass
+        print(f"Compacted local vector partition {self.directory}: dropped {dead} dead rows")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            self.matrix = None
+            self.index = None
+            self.quantized = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "live": len(self.id_to_row),
+                "dead": self.size - len(self.id_to_row),
+                "indexed": self.index is not None,
+                "quantized_bytes": self.quantized.nbytes if self.quantized is not None else 0,
+                "full_precision_bytes": self.size * self.dimension * 4,
+                "compactions": self.compactions,
+                "index_builds": self.index_builds
+            }
+
+
+class LocalVectorBackend(VectorBackend):
+    """
+    In-process vector search over per-organization memory-mapped float32 matrices, scored
+    with NumPy dot products. No network round trip, and it runs without Pinecone credentials.
+
+    index_type="flat" scores every row (exact). index_type="ivf" answers org-wide queries
+    on partitions of at least ivf_min_rows from an IVF index probing ivf_nprobe of
+    ivf_lists lists (0 = sqrt(rows)). Selective filters, such as a single document, still
+    scan exactly.
+
+    quantization="int8" or "binary" ranks rows by a quantized in-memory copy first and
+    rescores the top top_k * rescore_factor at full precision (0 = the kind's default,
+    see DEFAULT_RESCORE_FACTORS). Works with both index types.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dimension: int,
+        index_type: str = "flat",
+        ivf_min_rows: int = 50_000,
+        ivf_lists: int = 0,
+        ivf_nprobe: int = 16,
+        ivf_rebuild_fraction: float = 0.5,
+        compact_fraction: float = 0.3,
+        quantization: str = "none",
+        rescore_factor: int = 0
+    ):
+        if index_type not in ("flat", "ivf"):
+            raise ValueError(f"Unknown local vector index type '{index_type}'")
+        if quantization not in QUANTIZATION_KINDS:
+            raise ValueError(f"Unknown local vector quantization '{quantization}'")
+        self.directory = directory
+        self.dimension = dimension
+        self.options = {
+            "index_type": index_type,
+            "ivf_min_rows": ivf_min_rows,
+            "ivf_lists": ivf_lists,
+            "ivf_nprobe": ivf_nprobe,
+            "ivf_rebuild_fraction": ivf_rebuild_fraction,
+            "compact_fraction": compact_fraction,
+            "quantization": quantization,
+            "rescore_factor": rescore_factor if rescore_factor > 0 else DEFAULT_RESCORE_FACTORS[quantization]
+        }
+        self._partitions: Dict[str, _Partition] = {}
+        self._partitions_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.queries = 0
+        self.query_ms_total = 0.0
+
+    def _partition_directory(self, organization_id: str) -> str:
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9_-]", "_", organization_id))
+
+    def _partition(self, organization_id: str) -> _Partition:
+        with self._partitions_lock:
+            partition = self._partitions.get(organization_id)
+            if partition is None:
+                partition = _Partition(self._partition_directory(organization_id), self.dimension, self.options)
+                self._partitions[organization_id] = partition
+            return partition
+
+    def upsert(self, organization_id: str, records: List[Dict[str, Any]]):
+        self._partition(organization_id).upsert(records)
+
+    def fetch_metadata(self, organization_id: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return self._partition(organization_id).fetch_metadata(ids)
+
+    def fetch_vectors(self, organization_id: str, ids: List[str]) -> Dict[str, np.ndarray]:
+        return self._partition(organization_id).fetch_vectors(ids)
+
+    def list_ids(self, organization_id: str, prefix: str) -> Iterator[str]:
+        return iter(self._partition(organization_id).list_ids(prefix))
+
+    def delete(self, organization_id: str, ids: List[str]):
+        self._partition(organization_id).delete(ids)
+
+    def delete_organization(self, organization_id: str):
+        with self._partitions_lock:
+            partition = self._partitions.pop(organization_id, None)
+        if partition is not None:
+            partition.close()
+        shutil.rmtree(self._partition_directory(organization_id), ignore_errors=True)
+
+    def query(
+        self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        start_time = time.perf_counter()
+        results = self._partition(organization_id).query(organization_id, vector, top_k, filter)
+        with self._stats_lock:
+            self.queries += 1
+            self.query_ms_total += (time.perf_counter() - start_time) * 1000
+        return results
+
+    async def aquery(
+        self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        # Even a small partition may wait for its lock, reload from disk, read SQLite filters or
+        # rebuild its quantized copy; none of that may block the event loop
+        return await asyncio.to_thread(self.query, organization_id, vector, top_k, filter)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._partitions_lock:
+            partitions = list(self._partitions.values())
+        with self._stats_lock:
+            partition_stats = [partition.stats() for partition in partitions]
+            return {
+                "partitions_loaded": len(partitions),
+                "live_vectors": sum(stats["live"] for stats in partition_stats),
+                "dead_vectors": sum(stats["dead"] for stats in partition_stats),
+                "indexed_partitions": sum(1 for stats in partition_stats if stats["indexed"]),
+                "quantization": self.options["quantization"],
+                "quantized_bytes": sum(stats["quantized_bytes"] for stats in partition_stats),
+                "full_precision_bytes": sum(stats["full_precision_bytes"] for stats in partition_stats),
+                "compactions": sum(stats["compactions"] for stats in partition_stats),
+                "index_builds": sum(stats["index_builds"] for stats in partition_stats),
+                "queries": self.queries,
+                "avg_query_ms": round(self.query_ms_total / self.queries, 3) if self.queries else 0.0
+            }
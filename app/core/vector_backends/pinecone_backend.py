@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_pinecone import PineconeVectorStore
+from pinecone import Pinecone, ServerlessSpec
+from pinecone.exceptions import NotFoundException
+
+from app.core.vector_backends.base import VectorBackend, to_document
+
+logger = logging.getLogger(__name__)
+
+# Pinecone caps the number of ids per fetch/delete request
+ID_BATCH_SIZE = 100
+
+
+def _batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# Namespace of vectors written before organizations got their own namespaces
+SHARED_NAMESPACE = ""
+# describe_index_stats() may list the default namespace under either name
+SHARED_NAMESPACE_STATS_KEYS = (SHARED_NAMESPACE, "__default__")
+# settings.PINECONE_NAMESPACE_MODE values
+NAMESPACE_MODES = ("organization", "migrating", "shared")
+
+
+class PineconeBackend(VectorBackend):
+    """
+    One Pinecone index, with each organization's vectors in its own namespace, so a query
+    only scans that organization's data and a tenant can be dropped with one delete_all.
+
+    namespace_mode="shared" is the layout from before namespaces: every organization in
+    the default namespace, scoped by the organization_id filter. "migrating" writes to the
+    organization's namespace and reads both, so search keeps working while
+    migrate_shared_namespace() moves the old vectors over. "organization" reads only the
+    organization's namespace.
+    """
+
+    def __init__(self, api_key: str, index_name: str, dimension: int, embeddings: Embeddings, namespace_mode: str = "organization"):
+        if namespace_mode not in NAMESPACE_MODES:
+            raise ValueError(f"Unknown Pinecone namespace mode '{namespace_mode}'")
+        self.index_name = index_name
+        self.dimension = dimension
+        self.namespace_mode = namespace_mode
+        self.client = Pinecone(api_key=api_key)
+        self._ensure_index_exists()
+        self.index = self.client.Index(index_name)
+        self.index_host = self.index.config.host
+        # LangChain store over the index, for the legacy rag_service helpers. Not used for async
+        # queries: its async search opens and closes the shared aiohttp session on every call,
+        # which breaks concurrent queries.
+        self.vector_store = PineconeVectorStore(index=self.index, embedding=embeddings)
+        # Async clients for aquery, one per event loop (an aiohttp session belongs to the loop
+        # that created it). Each is opened on first use, shared by all queries on its loop and
+        # closed by aclose() at shutdown.
+        self._async_indexes: Dict[asyncio.AbstractEventLoop, Any] = {}
+        self._async_indexes_lock = threading.Lock()
+        self._check_shared_namespace()
+
+    def shared_namespace_vector_count(self) -> int:
+        """Vectors still in the shared default namespace, i.e. not yet migrated"""
+        namespaces = self.index.describe_index_stats().namespaces or {}
+        return sum(namespaces[key].vector_count for key in SHARED_NAMESPACE_STATS_KEYS if key in namespaces)
+
+    def _check_shared_namespace(self):
+        """
+        Picks the namespace mode from what is actually in the index. "migrating" costs a
+        second query per search and a delete per upsert, so it is only used while the shared
+        namespace still holds vectors: an upgraded deployment configured with "organization"
+        is switched to "migrating" (its old documents stay searchable), and "migrating" with
+        nothing left to migrate is switched to "organization". The mode is decided at startup;
+        restart the API and workers after app.migrate_vectors to drop the second query.
+        """
+        if self.namespace_mode == "shared":
+            return
+        try:
+            remaining = self.shared_namespace_vector_count()
+        except Exception as e:
+            logger.warning(f"Could not count vectors in the shared Pinecone namespace, keeping namespace mode {self.namespace_mode}: {e}")
+            return
+        if remaining and self.namespace_mode == "organization":
+            logger.warning(
+                f"{remaining} vectors are still in the shared Pinecone namespace; searching it too until "
+                f"`python -m app.migrate_vectors` has moved them (namespace mode migrating)"
+            )
+            self.namespace_mode = "migrating"
+        elif not remaining and self.namespace_mode == "migrating":
+            logger.info("The shared Pinecone namespace is empty; using namespace mode organization")
+            self.namespace_mode = "organization"
+
+    def _ensure_index_exists(self):
+        try:
+            # Get all the index name
+            existing_index = [index_detail["name"] for index_detail in self.client.list_indexes()]
+
+            # Check if index exists if not than create it
+
+            if self.index_name not in existing_index:
+                self.client.create_index(
+                    name=self.index_name,
+                    dimension=self.dimension,
+                    metric="cosine", # Or "dotproduct" or "euclidean"
+                    spec=ServerlessSpec(cloud="aws", region="us-east-1")
+                )
+
+                while not self.client.describe_index(self.index_name).status["ready"]:
+                    logger.info("Waiting for index to be ready")
+                    time.sleep(1)
+                logger.info(f"Pinecone index {self.index_name} created")
+            else:
+                logger.info(f"Pinecode index {self.index_name} already exists")
+
+        except Exception as e:
+            logger.error(f"Error creating index {e}")
+            raise
+
+    def _write_namespace(self, organization_id: str) -> str:
+        return SHARED_NAMESPACE if self.namespace_mode == "shared" else organization_id
+
+    def _read_namespaces(self, organization_id: str) -> List[str]:
+        if self.namespace_mode == "shared":
+            return [SHARED_NAMESPACE]
+        if self.namespace_mode == "migrating":
+            return [organization_id, SHARED_NAMESPACE]
+        return [organization_id]
+
+    @staticmethod
+    def _namespace_filter(namespace: str, filter: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Inside an organization's namespace the organization_id condition is redundant"""
+        if namespace == SHARED_NAMESPACE or not filter:
+            return filter
+        return {key: value for key, value in filter.items() if key != "organization_id"} or None
+
+    def upsert(self, organization_id: str, records: List[Dict[str, Any]]):
+        self.index.upsert(vectors=records, namespace=self._write_namespace(organization_id))
+        if self.namespace_mode == "migrating":
+            # Drop the old copy, or the migration would later overwrite this newer vector with it
+            self.index.delete(ids=[record["id"] for record in records], namespace=SHARED_NAMESPACE)
+
+    def fetch_metadata(self, organization_id: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        for namespace in self._read_namespaces(organization_id):
+            missing = [vector_id for vector_id in ids if vector_id not in found]
+            for batch in _batched(missing, ID_BATCH_SIZE):
+                response = self.index.fetch(ids=batch, namespace=namespace)
+                for vector_id, vector in response.vectors.items():
+                    found[vector_id] = vector.metadata or {}
+        return found
+
+    def fetch_vectors(self, organization_id: str, ids: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for namespace in self._read_namespaces(organization_id):
+            missing = [vector_id for vector_id in ids if vector_id not in found]
+            for batch in _batched(missing, ID_BATCH_SIZE):
+                response = self.index.fetch(ids=batch, namespace=namespace)
+                for vector_id, vector in response.vectors.items():
+                    found[vector_id] = vector.values
+        return found
+
+    def list_ids(self, organization_id: str, prefix: str) -> Iterator[str]:
+        seen = set()
+        for namespace in self._read_namespaces(organization_id):
+            for id_page in self.index.list(prefix=prefix, namespace=namespace):
+                for vector_id in id_page:
+                    if vector_id not in seen:
+                        seen.add(vector_id)
+                        yield vector_id
+
+    def delete(self, organization_id: str, ids: List[str]):
+        for namespace in self._read_namespaces(organization_id):
+            for batch in _batched(ids, ID_BATCH_SIZE):
+                self.index.delete(ids=batch, namespace=namespace)
+
+    def delete_organization(self, organization_id: str):
+        if self.namespace_mode != "shared":
+            try:
+                self.index.delete(delete_all=True, namespace=organization_id)
+            except NotFoundException:
+                # Nothing was ever written for this organization
+                pass
+        if self.namespace_mode != "organization":
+            # Serverless indexes can't delete by metadata filter, find the ids first
+            ids = [vector_id for vector_id, owner in self._iter_shared_namespace() if owner == organization_id]
+            for batch in _batched(ids, ID_BATCH_SIZE):
+                self.index.delete(ids=batch, namespace=SHARED_NAMESPACE)
+
+    def _existing_ids(self, ids: List[str], namespace: str) -> set:
+        """The ids among `ids` that have a vector in the namespace"""
+        existing = set()
+        for batch in _batched(ids, ID_BATCH_SIZE):
+            existing.update(self.index.fetch(ids=batch, namespace=namespace).vectors.keys())
+        return existing
+
+    def _iter_shared_namespace(self):
+        """(id, organization_id) of every vector in the shared namespace"""
+        for id_page in self.index.list(namespace=SHARED_NAMESPACE):
+            response = self.index.fetch(ids=id_page, namespace=SHARED_NAMESPACE)
+            for vector_id, vector in response.vectors.items():
+                yield vector_id, (vector.metadata or {}).get("organization_id")
+
+    @staticmethod
+    def _merge(result_lists, top_k: int) -> List[Tuple[Document, float]]:
+        merged = {}
+        for results in result_lists:
+            for document, score in results:
+                if document.id not in merged or merged[document.id][1] < score:
+                    merged[document.id] = (document, score)
+        return sorted(merged.values(), key=lambda result: result[1], reverse=True)[:top_k]
+
+    @staticmethod
+    def _matches(response) -> List[Tuple[Document, float]]:
+        return [to_document(match["id"], match["metadata"] or {}, match["score"]) for match in response["matches"]]
+
+    def query(
+        self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        result_lists = []
+        for namespace in self._read_namespaces(organization_id):
+            response = self.index.query(
+                vector=vector, top_k=top_k, filter=self._namespace_filter(namespace, filter),
+                include_metadata=True, namespace=namespace
+            )
+            result_lists.append(self._matches(response))
+        return self._merge(result_lists, top_k) if len(result_lists) > 1 else result_lists[0]
+
+    def _async_index(self):
+        loop = asyncio.get_running_loop()
+        with self._async_indexes_lock:
+            index = self._async_indexes.get(loop)
+            if index is None:
+                # Clients of loops that have been closed can't be used (or closed) any more
+                for stale_loop in [known for known in self._async_indexes if known.is_closed()]:
+                    del self._async_indexes[stale_loop]
+                index = self._async_indexes[loop] = self.client.IndexAsyncio(host=self.index_host)
+            return index
+
+    async def aquery(
+        self, organization_id: str, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        index = self._async_index()
+        # In "migrating" mode both namespaces are queried at once over the same session
+        responses = await asyncio.gather(*(
+            index.query(
+                vector=vector, top_k=top_k, filter=self._namespace_filter(namespace, filter),
+                include_metadata=True, namespace=namespace
+            )
+            for namespace in self._read_namespaces(organization_id)
+        ))
+        result_lists = [self._matches(response) for response in responses]
+        return self._merge(result_lists, top_k) if len(result_lists) > 1 else result_lists[0]
+
+    async def aclose(self):
+        with self._async_indexes_lock:
+            index = self._async_indexes.pop(asyncio.get_running_loop(), None)
+        if index is not None:
+            await index.close()
+
+    def migrate_shared_namespace(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Moves vectors from the shared default namespace into their organization's namespace.
+        Each page of ids is copied, then deleted from the shared namespace, so the migration
+        can be interrupted and re-run. Vectors without an organization_id are left in place.
+        Run it while the API and workers use namespace_mode="migrating"; app.migrate_vectors
+        also pauses ingestion so no worker writes these chunks meanwhile.
+
+        Right before copying, each id is looked up again: one that already exists in the
+        organization's namespace was re-written there after this page was fetched and is
+        newer, and one gone from the shared namespace was deleted meanwhile. Neither is
+        copied, so the migration never overwrites or revives a chunk.
+        """
+        counts = {"moved": 0, "superseded": 0, "skipped": 0, "organizations": 0}
+        organizations = set()
+        for id_page in self.index.list(namespace=SHARED_NAMESPACE):
+            response = self.index.fetch(ids=id_page, namespace=SHARED_NAMESPACE)
+            by_organization: Dict[str, List[Dict[str, Any]]] = {}
+            for vector_id, vector in response.vectors.items():
+                metadata = vector.metadata or {}
+                organization_id = metadata.get("organization_id")
+                if not organization_id:
+                    counts["skipped"] += 1
+                    continue
+                by_organization.setdefault(organization_id, []).append(
+                    {"id": vector_id, "values": vector.values, "metadata": metadata}
+                )
+            for organization_id, records in by_organization.items():
+                organizations.add(organization_id)
+                ids = [record["id"] for record in records]
+                newer = self._existing_ids(ids, organization_id)
+                still_shared = self._existing_ids(ids, SHARED_NAMESPACE)
+                records = [record for record in records if record["id"] in still_shared and record["id"] not in newer]
+                if not dry_run:
+                    for batch in _batched(records, ID_BATCH_SIZE):
+                        self.index.upsert(vectors=batch, namespace=organization_id)
+                    # Superseded copies are stale either way
+                    for batch in _batched([vector_id for vector_id in ids if vector_id in still_shared], ID_BATCH_SIZE):
+                        self.index.delete(ids=batch, namespace=SHARED_NAMESPACE)
+                counts["moved"] += len(records)
+                counts["superseded"] += len(ids) - len(records)
+            print(f"Namespace migration: {counts['moved']} vectors {'to move' if dry_run else 'moved'} so far")
+        counts["organizations"] = len(organizations)
+        return counts
@@ -1,65 +1,100 @@
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from app.core.config import settings
-from pinecone import Pinecone , ServerlessSpec
+import threading
 import time
+from app.core.config import settings
+from app.core.embedding_cache import CachedEmbeddings, create_embedding_cache
+from app.core.embedding_scheduler import EmbeddingScheduler, ScheduledEmbeddings
+from app.core.metrics import register_collector
+from app.core.vector_backends import VectorBackend, create_vector_backend
 import logging
 
 logger = logging.getLogger(__name__)
 
 class VectorStoreManager:
+    """
+    Embeddings and vector backend, created on first use (or by the startup warm-up) rather
+    than at import: creating the Pinecone backend talks to the Pinecone API, and importing
+    the app must work, and stay fast, without network access.
+    """
+
     def __init__(self):
         self.embeddings = None
-        self.vector_store = None
-        self.pinecone_client = None
-        self._initialize()
-    
+        self.backend = None
+        self.embedding_scheduler = None
+        # Processes splitting EMBEDDING_TOKENS_PER_MINUTE, set by `app.worker --processes`
+        self.embedding_processes = 1
+        self.init_seconds = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.backend is not None
+
+    def initialize(self):
+        """Creates the clients if that hasn't happened yet; safe to call from several threads"""
+        if self.backend is not None:
+            return
+        with self._init_lock:
+            if self.backend is None:
+                self._initialize()
+
     def _initialize(self):
+        from langchain_openai import OpenAIEmbeddings
         try:
             print("Initializing vector store...")
             logger.info("Initializing vector store")
-            self.embeddings = OpenAIEmbeddings(model="text-embedding-ada-002",api_key=settings.OPENAI_API_KEY)
-            self.pinecone_client = Pinecone(api_key=settings.PINECONE_API_KEY)
-            self._ensure_index_exists();
-
-            pinecone_index = self.pinecone_client.Index(settings.PINECONE_INDEX_NAME)
-            self.vector_store = PineconeVectorStore(index=pinecone_index,embedding=self.embeddings)
+            start_time = time.perf_counter()
+            # Document embeddings go through the rate-limit-aware scheduler, which does its own
+            # retrying on 429s, so the client must not retry behind its back.
+            # Kept across attempts: a failed backend creation is retried on the next call.
+            if self.embedding_scheduler is None:
+                self.embedding_scheduler = EmbeddingScheduler(
+                    OpenAIEmbeddings(model=settings.EMBEDDING_MODEL, api_key=settings.OPENAI_API_KEY, max_retries=0),
+                    tokens_per_minute=max(1, settings.EMBEDDING_TOKENS_PER_MINUTE // self.embedding_processes),
+                    max_batch_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+                    max_batch_inputs=settings.EMBEDDING_BATCH_MAX_INPUTS,
+                    max_concurrency=settings.EMBEDDING_MAX_CONCURRENT_REQUESTS,
+                    max_rate_limit_retries=settings.EMBEDDING_MAX_RATE_LIMIT_RETRIES,
+                    request_timeout=settings.EMBEDDING_REQUEST_TIMEOUT_SECONDS
+                )
+            register_collector("embedding_scheduler", self.embedding_scheduler.stats)
+            embeddings = ScheduledEmbeddings(
+                self.embedding_scheduler,
+                OpenAIEmbeddings(model=settings.EMBEDDING_MODEL, api_key=settings.OPENAI_API_KEY)
+            )
+            embedding_cache = create_embedding_cache()
+            if embedding_cache is not None:
+                embeddings = CachedEmbeddings(embeddings, settings.EMBEDDING_MODEL, embedding_cache)
+                register_collector("embedding_cache", embeddings.stats)
+            backend = create_vector_backend(embeddings)
+            register_collector("vector_backend", backend.stats)
+            self.embeddings = embeddings
+            # Set last: is_initialized means everything above is usable
+            self.backend = backend
+            self.init_seconds = round(time.perf_counter() - start_time, 3)
         except Exception as e:
             logger.error(f"Error initializing vector store")
             raise
 
-    def _ensure_index_exists(self):
+    def get_backend(self) -> VectorBackend:
+        self.initialize()
+        return self.backend
 
-        try:
-            # Get all the index name
-            existing_index = [index_detail["name"] for index_detail in self.pinecone_client.list_indexes()]
-
-            # Check if index exists if not than create it
-
-            if settings.PINECONE_INDEX_NAME not in existing_index:
-                self.pinecone_client.create_index(
-                    name=settings.PINECONE_INDEX_NAME,
-                    dimension=1536,
-                    metric="cosine", # Or "dotproduct" or "euclidean"
-                    spec=ServerlessSpec(cloud="aws", region="us-east-1")
-                )
-
-                while not self.pinecone_client.describe_index(settings.PINECONE_INDEX_NAME).status["ready"]:
-                    logger.info("Waiting for index to be ready")
-                    time.sleep(1)
-                logger.info(f"Pinecone index {settings.PINECONE_INDEX_NAME} created")
-            else:
-                logger.info(f"Pinecode index {settings.PINECONE_INDEX_NAME} already exists")
-
-        except Exception as e:
-            logger.error(f"Error creating index {e}")
-            raise
+    async def aclose(self):
+        """Closes the backend's async clients (application shutdown); a no-op if never initialized"""
+        if self.backend is not None:
+            await self.backend.aclose()
 
     def get_vector_store(self):
-        return self.vector_store
+        """LangChain store over the Pinecone index, None with other backends"""
+        return getattr(self.get_backend(), "vector_store", None)
     
     def get_embeddings(self):
+        self.initialize()
         return self.embeddings
 
+    def get_index(self):
+        """Raw Pinecone index, None with other backends"""
+        return getattr(self.get_backend(), "index", None)
+
 
 vector_store_manager = VectorStoreManager()
\ No newline at end of file
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.llm import llm_manager
+from app.core.metrics import register_collector
+from app.core.vector_store import vector_store_manager
+from app.db import mongodb
+
+# Components with lazily created clients; each also initializes itself on first use
+_components = {"vector_store": vector_store_manager, "llm": llm_manager}
+_state: Dict[str, Any] = {"attempts": 0, "errors": {}, "started_at": None, "ready_seconds": None}
+_task: Optional[asyncio.Task] = None
+
+
+def warm_up() -> bool:
+    """Creates every component's clients; returns True once all are up. Failures are recorded, not raised."""
+    _state["attempts"] += 1
+    for name, component in _components.items():
+        if component.is_initialized:
+            continue
+        try:
+            component.initialize()
+            _state["errors"].pop(name, None)
+        except Exception as e:
+            print(f"Warm-up of {name} failed: {e}")
+            _state["errors"][name] = str(e)
+    return all(component.is_initialized for component in _components.values())
+
+
+async def _warm_up_loop():
+    while True:
+        if await asyncio.to_thread(warm_up):
+            _state["ready_seconds"] = round(time.perf_counter() - _state["started_at"], 3)
+            print(f"✅ Backends warm after {_state['ready_seconds']}s")
+            return
+        await asyncio.sleep(settings.WARM_UP_RETRY_SECONDS)
+
+
+def start_warm_up():
+    """Starts warming up in the background, so startup itself never waits on the network"""
+    global _task
+    _state["started_at"] = time.perf_counter()
+    _task = asyncio.create_task(_warm_up_loop())
+
+
+async def stop_warm_up():
+    if _task is not None and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+
+
+async def _mongo_ready() -> bool:
+    if mongodb.database is None:
+        return False
+    try:
+        await asyncio.wait_for(mongodb.database.command("ping"), settings.READINESS_MONGO_TIMEOUT_SECONDS)
+        return True
+    except Exception as e:
+        print(f"MongoDB readiness check failed: {e!r}")
+        return False
+
+
+def warm_up_stats() -> Dict[str, Any]:
+    return {
+        "components": {name: component.is_initialized for name, component in _components.items()},
+        "attempts": _state["attempts"],
+        "errors": dict(_state["errors"]),
+        "ready_seconds": _state["ready_seconds"],
+        "vector_store_init_seconds": vector_store_manager.init_seconds
+    }
+
+
+async def readiness() -> Dict[str, Any]:
+    """Ready when MongoDB answers and every component's clients exist"""
+    stats = warm_up_stats()
+    stats["components"]["mongodb"] = await _mongo_ready()
+    stats["ready"] = all(stats["components"].values())
+    return stats
+
+
+register_collector("warm_up", warm_up_stats)
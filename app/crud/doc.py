@@ -7,19 +7,56 @@ from datetime import datetime
 from typing import List
 from bson import ObjectId
 
-from app.services import rag_service , document_service
+from app.services.upload_service import save_upload_file, UploadTooLargeError
+from app.crud.ingestion_job import enqueue_ingestion_job, JOB_MODE_INCREMENTAL
+from app.crud.organization import bump_rag_version
+from app.services.answer_cache import answer_cache
+from app.core.config import settings
 
 
+def _remove_files(paths: List[str]):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def get_processed_doc_by_hash(db: AsyncDatabase, organization_id: str, content_hash: str):
+    """Returns the original (non-duplicate) document of the organization with this content hash, if it is indexed."""
+    return await db.documents.find_one({
+        "organizationId": organization_id,
+        "content_hash": content_hash,
+        "processed_for_rag": True,
+        "duplicate_of": {"$exists": False}
+    })
+
+
+async def resolve_vector_document_id(db: AsyncDatabase, organization_id: str, document_id: str) -> str:
+    """
+    Deduplicated uploads have no vectors of their own, they share the ones stored under
+    the original document. Maps a document id to the id its vectors are stored under.
+    """
+    if not document_id or not ObjectId.is_valid(document_id):
+        return document_id
+    doc = await db.documents.find_one(
+        {"_id": ObjectId(document_id), "organizationId": organization_id},
+        {"duplicate_of": 1}
+    )
+    if doc and doc.get("duplicate_of"):
+        return doc["duplicate_of"]
+    return document_id
+
 
 async def upload_files(
     files: List[UploadFile],
     organizationId: str,
     db: AsyncDatabase 
 ) -> List[DocOutput]:
+    saved_paths = []
+    inserted = False
     try:
-        UPLOAD_DIR = "uploaded_files"
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         documents_to_insert = []
+        request_bytes = 0
 
         for file in files:
             # Validate file type
@@ -29,22 +66,43 @@ async def upload_files(
             # Generate unique filename
             timestamp = datetime.utcnow().isoformat().replace(":", "-")
             unique_filename = f"{organizationId}_{timestamp}_{file.filename}"
-            file_path = os.path.join(UPLOAD_DIR, unique_filename)
+            file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
 
-            # Save the file
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
+            # Stream the file to disk; a file may use whatever is left of the request budget
+            remaining_request_bytes = settings.MAX_UPLOAD_REQUEST_BYTES - request_bytes
+            max_bytes = min(settings.MAX_UPLOAD_FILE_BYTES, remaining_request_bytes)
+            try:
+                size_bytes, content_hash = await save_upload_file(file, file_path, max_bytes)
+            except UploadTooLargeError:
+                if max_bytes == settings.MAX_UPLOAD_FILE_BYTES:
+                    detail = f"File '{file.filename}' exceeds the maximum size of {settings.MAX_UPLOAD_FILE_BYTES} bytes"
+                else:
+                    detail = f"Upload exceeds the maximum request size of {settings.MAX_UPLOAD_REQUEST_BYTES} bytes"
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,detail=detail)
+            request_bytes += size_bytes
 
             doc = {
                 "organizationId": organizationId,  # Store as string, not ObjectId
                 "name": file.filename,
                 "unique_filename": unique_filename,
                 "path": file_path,
+                "size_bytes": size_bytes,
+                "content_hash": content_hash,
                 "uploadedAt": datetime.utcnow(),
                 "processed_for_rag": False
             }
 
+            # Same bytes already indexed for this organization: link to that document's
+            # vectors instead of parsing and embedding the file again
+            original_doc = await get_processed_doc_by_hash(db, organizationId, content_hash)
+            if original_doc:
+                os.remove(file_path)
+                doc["path"] = original_doc["path"]
+                doc["duplicate_of"] = str(original_doc["_id"])
+                doc["processed_for_rag"] = True
+            else:
+                saved_paths.append(file_path)
+
             documents_to_insert.append(doc)
 
         # Insert into DB
@@ -53,29 +111,71 @@ async def upload_files(
             insert_result = await db.documents.insert_many(documents_to_insert)
             if not insert_result.acknowledged:
                 raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail="Failed to insert documents into database")
+            inserted = True
+
+            # Cached answers were built from the old document set
+            await bump_rag_version(db, organizationId)
+            answer_cache.invalidate_organization(organizationId)
             
             # Convert inserted documents to DocOutput format
             for i, doc in enumerate(documents_to_insert):
                 document_id = str(insert_result.inserted_ids[i])
+
+                # Indexing runs in the ingestion worker, the request returns right away
+                job_id = None
+                if not doc.get("duplicate_of"):
+                    job_id = await enqueue_ingestion_job(db, document_id, organizationId, doc["path"])
+
                 doc_output = DocOutput(
                     id=document_id,
                     organization_id=doc["organizationId"],
                     name=doc["name"],
                     unique_filename=doc["unique_filename"],
                     path=doc["path"],
-                    uploadedAt=doc["uploadedAt"]
+                    uploadedAt=doc["uploadedAt"],
+                    processed_for_rag=doc["processed_for_rag"],
+                    job_id=job_id,
+                    deduplicated="duplicate_of" in doc,
+                    duplicate_of=doc.get("duplicate_of")
                 )
                 uploaded_docs.append(doc_output)
 
-                # HERE WE WILL START MAGIC
-                document_service.process_documents(doc["path"],document_id,organizationId);        
-
         return uploaded_docs
 
+    except HTTPException:
+        # Don't leave files behind for a request that was rejected before reaching the DB
+        if not inserted:
+            _remove_files(saved_paths)
+        raise
     except Exception as e:
+        if not inserted:
+            _remove_files(saved_paths)
         # raise BadRequestException(f"Error in uploading files: {str(e)}")
         raise Exception(f"Error in uploading files: {str(e)}")
 
+async def reindex_document(db: AsyncDatabase, organization_id: str, document_id: str) -> str:
+    """
+    Queues an incremental re-index of a document: chunks whose text is unchanged keep
+    their vectors, only changed chunks are re-embedded. Returns the job id.
+    """
+    if not ObjectId.is_valid(document_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Invalid Document Id")
+
+    doc = await db.documents.find_one({"_id": ObjectId(document_id), "organizationId": organization_id})
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Document not found")
+    if doc.get("duplicate_of"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Document is a duplicate, re-index the original document '{doc['duplicate_of']}' instead"
+        )
+
+    job_id = await enqueue_ingestion_job(db, document_id, organization_id, doc["path"], mode=JOB_MODE_INCREMENTAL)
+    await bump_rag_version(db, organization_id)
+    answer_cache.invalidate_organization(organization_id)
+    return job_id
+
+
 async def getDocsByOrgId(orgId: str, db) -> List[DocOutput]:
     try:
         docs_cursor = db.documents.find({"organizationId": orgId})
@@ -88,7 +188,11 @@ async def getDocsByOrgId(orgId: str, db) -> List[DocOutput]:
                 "name": doc["name"],
                 "unique_filename": doc["unique_filename"],
                 "path": doc["path"],
-                "uploadedAt": doc["uploadedAt"]
+                "uploadedAt": doc["uploadedAt"],
+                "processed_for_rag": doc.get("processed_for_rag", False),
+                "job_id": doc.get("ingestion_job_id"),
+                "deduplicated": "duplicate_of" in doc,
+                "duplicate_of": doc.get("duplicate_of")
             }
             docs.append(DocOutput(**doc_data))
         return docs
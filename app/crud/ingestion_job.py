@@ -0,0 +1,256 @@
+from pymongo import ReturnDocument
+from pymongo.asynchronous.database import AsyncDatabase
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+
+from app.api.v1.models.doc import IngestionJobOutput
+from app.core.config import settings
+from app.crud.organization import bump_rag_version
+
+# Job lifecycle: queued -> processing -> completed
+#                                    \-> queued (retry, after backoff) -> ... -> failed
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_PROCESSING = "processing"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+
+# full: first ingestion of a document, incremental: re-index only the chunks that changed
+JOB_MODE_FULL = "full"
+JOB_MODE_INCREMENTAL = "incremental"
+
+# While this document exists in ingestion_control, workers claim no jobs (see pause_ingestion)
+INGESTION_PAUSE_ID = "pause"
+
+
+async def enqueue_ingestion_job(
+    db: AsyncDatabase,
+    document_id: str,
+    organization_id: str,
+    file_path: str,
+    mode: str = JOB_MODE_FULL
+) -> str:
+    """
+    Adds a document to the ingestion queue and returns the job id.
+    The document is picked up by a worker process (python -m app.worker).
+    """
+    now = datetime.utcnow()
+    job = {
+        "document_id": document_id,
+        "organization_id": organization_id,
+        "path": file_path,
+        "mode": mode,
+        "status": JOB_STATUS_QUEUED,
+        "stage": None,
+        "progress": 0.0,
+        "attempts": 0,
+        "max_attempts": settings.INGESTION_MAX_ATTEMPTS,
+        "error": None,
+        "enqueued_at": now,
+        "available_at": now,
+        "started_at": None,
+        "finished_at": None,
+        "locked_by": None,
+        "lease_expires_at": None
+    }
+    result = await db.ingestion_jobs.insert_one(job)
+    job_id = str(result.inserted_id)
+
+    await db.documents.update_one(
+        {"_id": ObjectId(document_id)},
+        {"$set": {"ingestion_job_id": job_id, "ingestion_status": JOB_STATUS_QUEUED, "ingestion_progress": 0.0}}
+    )
+    return job_id
+
+
+async def claim_next_job(db: AsyncDatabase, worker_id: str) -> Optional[dict]:
+    """
+    Atomically claims the oldest runnable job for this worker.
+    A job is runnable when it is queued and its retry backoff has passed, or when it is
+    still marked as processing but the worker holding it stopped renewing its lease.
+    find_one_and_update makes this safe to call from any number of worker processes.
+    Returns None while ingestion is paused.
+    """
+    if await db.ingestion_control.find_one({"_id": INGESTION_PAUSE_ID}, {"_id": 1}):
+        return None
+    now = datetime.utcnow()
+    return await db.ingestion_jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": JOB_STATUS_QUEUED, "available_at": {"$lte": now}},
+                {"status": JOB_STATUS_PROCESSING, "lease_expires_at": {"$lte": now}}
+            ]
+        },
+        {
+            "$set": {
+                "status": JOB_STATUS_PROCESSING,
+                "locked_by": worker_id,
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=settings.INGESTION_JOB_LEASE_SECONDS)
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("enqueued_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def pause_ingestion(db: AsyncDatabase, reason: str):
+    """
+    Stops workers from claiming jobs until resume_ingestion(), e.g. while a maintenance
+    command rewrites vectors. Jobs already running carry on; wait for count_running_jobs()
+    to reach 0 before relying on the pause. Queued jobs simply wait.
+    """
+    await db.ingestion_control.update_one(
+        {"_id": INGESTION_PAUSE_ID},
+        {"$set": {"reason": reason, "paused_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def resume_ingestion(db: AsyncDatabase):
+    await db.ingestion_control.delete_one({"_id": INGESTION_PAUSE_ID})
+
+
+async def count_running_jobs(db: AsyncDatabase) -> int:
+    """Jobs a live worker is processing. A job whose lease expired is not running anywhere."""
+    return await db.ingestion_jobs.count_documents(
+        {"status": JOB_STATUS_PROCESSING, "lease_expires_at": {"$gt": datetime.utcnow()}}
+    )
+
+
+def _held_by_claimant(job: dict) -> dict:
+    """
+    Matches the job only while this claim still holds it. Once the lease expires another
+    worker may re-claim the job, which changes locked_by and increments attempts (the
+    same worker id can claim it again when a process runs several jobs at once).
+    """
+    return {
+        "_id": job["_id"],
+        "status": JOB_STATUS_PROCESSING,
+        "locked_by": job["locked_by"],
+        "attempts": job["attempts"]
+    }
+
+
+async def update_job_progress(db: AsyncDatabase, job: dict, stage: str, progress: float):
+    """Records pipeline progress on the job and its document, and renews the worker's lease."""
+    now = datetime.utcnow()
+    await db.ingestion_jobs.update_one(
+        _held_by_claimant(job),
+        {"$set": {
+            "stage": stage,
+            "progress": progress,
+            "lease_expires_at": now + timedelta(seconds=settings.INGESTION_JOB_LEASE_SECONDS)
+        }}
+    )
+    await db.documents.update_one(
+        {"_id": ObjectId(job["document_id"])},
+        {"$set": {"ingestion_status": JOB_STATUS_PROCESSING, "ingestion_progress": progress}}
+    )
+
+
+async def complete_job(db: AsyncDatabase, job: dict) -> bool:
+    """
+    Marks the job and its document as done. Returns False, without touching anything, if
+    the lease was lost and another claim now owns the job.
+    """
+    now = datetime.utcnow()
+    result = await db.ingestion_jobs.update_one(
+        _held_by_claimant(job),
+        {"$set": {
+            "status": JOB_STATUS_COMPLETED,
+            "stage": "done",
+            "progress": 1.0,
+            "error": None,
+            "finished_at": now,
+            "locked_by": None,
+            "lease_expires_at": None
+        }}
+    )
+    if result.matched_count == 0:
+        return False
+    await db.documents.update_one(
+        {"_id": ObjectId(job["document_id"])},
+        {"$set": {
+            "processed_for_rag": True,
+            "processed_at": now,
+            "ingestion_status": JOB_STATUS_COMPLETED,
+            "ingestion_progress": 1.0,
+            "ingestion_error": None
+        }}
+    )
+    # The organization's vectors changed, answers cached by the API processes are now stale
+    await bump_rag_version(db, job["organization_id"])
+    return True
+
+
+async def fail_job(db: AsyncDatabase, job: dict, error: str) -> bool:
+    """
+    Puts the job back on the queue with a linear backoff, or marks it as failed once
+    it has used all of its attempts. Returns False, without touching anything, if the
+    lease was lost and another claim now owns the job.
+    """
+    now = datetime.utcnow()
+    if job["attempts"] < job["max_attempts"]:
+        job_update = {
+            "status": JOB_STATUS_QUEUED,
+            "available_at": now + timedelta(seconds=settings.INGESTION_RETRY_BACKOFF_SECONDS * job["attempts"]),
+            "error": error,
+            "locked_by": None,
+            "lease_expires_at": None
+        }
+        document_status = JOB_STATUS_QUEUED
+    else:
+        job_update = {
+            "status": JOB_STATUS_FAILED,
+            "error": error,
+            "finished_at": now,
+            "locked_by": None,
+            "lease_expires_at": None
+        }
+        document_status = JOB_STATUS_FAILED
+
+    result = await db.ingestion_jobs.update_one(_held_by_claimant(job), {"$set": job_update})
+    if result.matched_count == 0:
+        return False
+    await db.documents.update_one(
+        {"_id": ObjectId(job["document_id"])},
+        {"$set": {"ingestion_status": document_status, "ingestion_error": error}}
+    )
+    return True
+
+
+async def get_job_by_id(db: AsyncDatabase, job_id: str, organization_id: str) -> Optional[IngestionJobOutput]:
+    if not ObjectId.is_valid(job_id):
+        return None
+
+    job = await db.ingestion_jobs.find_one({"_id": ObjectId(job_id), "organization_id": organization_id})
+    if not job:
+        return None
+
+    queue_latency_ms = None
+    if job.get("started_at"):
+        queue_latency_ms = round((job["started_at"] - job["enqueued_at"]).total_seconds() * 1000, 2)
+
+    processing_time_ms = None
+    if job.get("started_at") and job.get("finished_at"):
+        processing_time_ms = round((job["finished_at"] - job["started_at"]).total_seconds() * 1000, 2)
+
+    return IngestionJobOutput(
+        id=str(job["_id"]),
+        document_id=job["document_id"],
+        organization_id=job["organization_id"],
+        mode=job.get("mode", JOB_MODE_FULL),
+        status=job["status"],
+        stage=job.get("stage"),
+        progress=job.get("progress", 0.0),
+        attempts=job.get("attempts", 0),
+        max_attempts=job["max_attempts"],
+        error=job.get("error"),
+        enqueued_at=job["enqueued_at"],
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at"),
+        queue_latency_ms=queue_latency_ms,
+        processing_time_ms=processing_time_ms
+    )
@@ -0,0 +1,72 @@
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+from pymongo import UpdateOne
+
+# Name search without unanchored case-insensitive $regex (which scans every row and runs
+# user input as a pattern). Each user / organization stores, at write time:
+#   search_key   - the name normalized: accents stripped, case-folded, whitespace collapsed.
+#                  Prefix lookups are an index range on it, and listings sort by it.
+#   search_grams - every NGRAM_SIZE-character substring of search_key, multikey-indexed.
+#                  A substring lookup matches all grams of the query through the index,
+#                  then confirms the candidates with a literal (escaped) match.
+# Queries shorter than NGRAM_SIZE are prefix lookups.
+NGRAM_SIZE = 3
+
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.casefold().split())
+
+
+def name_grams(key: str) -> List[str]:
+    if len(key) < NGRAM_SIZE:
+        return [key] if key else []
+    return sorted({key[start:start + NGRAM_SIZE] for start in range(len(key) - NGRAM_SIZE + 1)})
+
+
+def search_fields(name: str) -> Dict[str, Any]:
+    """Fields to $set alongside a name whenever it is written"""
+    key = normalize_name(name)
+    return {"search_key": key, "search_grams": name_grams(key)}
+
+
+def name_search_filter(search_name: str) -> Dict[str, Any]:
+    """Filter for names containing search_name (starting with it, for short queries)"""
+    key = normalize_name(search_name)
+    if not key:
+        return {}
+    if len(key) < NGRAM_SIZE:
+        # Everything from key up to the next string that does not start with it
+        return {"search_key": {"$gte": key, "$lt": key[:-1] + chr(ord(key[-1]) + 1)}}
+    return {
+        "search_grams": {"$all": name_grams(key)},
+        # Grams can all occur without the whole query occurring; re.escape makes the check literal
+        "search_key": {"$regex": re.escape(key)}
+    }
+
+
+# collection -> the name field its search keys are derived from
+SEARCHABLE_NAMES = {"users": "first_name", "organizations": "name"}
+
+
+async def backfill_search_keys(db, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Writes search keys for rows created before name search was indexed; rows that already
+    have them are not touched, so it is safe to re-run. Returns rows updated per collection.
+    """
+    updated = {}
+    for collection_name, name_field in SEARCHABLE_NAMES.items():
+        collection = db[collection_name]
+        updated[collection_name] = 0
+        batch = []
+        async for row in collection.find({"search_key": {"$exists": False}}, {name_field: 1}):
+            batch.append(UpdateOne({"_id": row["_id"]}, {"$set": search_fields(row.get(name_field))}))
+            if len(batch) >= batch_size:
+                updated[collection_name] += (await collection.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            updated[collection_name] += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
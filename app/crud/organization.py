@@ -1,10 +1,12 @@
 from pymongo.asynchronous.database import AsyncDatabase
 from datetime import datetime, date
 from bson import ObjectId
-from typing import Optional,List,Dict,Any
+from typing import Optional,List,Dict,Any,Tuple
 
 from app.api.v1.models import OrganizationCreate , OrganizationInDB ,OrganizationUpdate
 from app.api.v1.models.user import UserCreate, GenderEnum
+from app.crud.pagination import find_page
+from app.crud.name_search import search_fields, name_search_filter
 
 async def delete_organization_by_id(db: AsyncDatabase, org_id: str) -> bool:
       # Perform the deletion
@@ -31,6 +33,7 @@ async def create_organization(db: AsyncDatabase, create_organization: Organizati
     if existing_org:
         return None
     create_organization_data = create_organization.model_dump()
+    create_organization_data.update(search_fields(create_organization_data['name']))
     # Add timestamps as datetime objects
     create_organization_data['created_at'] = datetime.utcnow()
     create_organization_data['updated_at'] = datetime.utcnow()
@@ -67,6 +70,7 @@ async def update_organization(
         existing_org = await get_organization_by_name(db, update_data["name"])
         if existing_org and str(existing_org.id) != org_id:
             return None # New name conflicts with another existing organization
+        update_data.update(search_fields(update_data["name"]))
 
     update_data["updated_at"] = datetime.utcnow()
 
@@ -84,18 +88,31 @@ async def get_organizations(
     db: AsyncDatabase,
     skip: int = 0,
     limit: int = 100,
-    search_name: Optional[str] = None
-) -> List[OrganizationInDB]:
+    search_name: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[OrganizationInDB], Optional[str]]:
     """
-    Retrieves a list of organizations with optional filtering and pagination.
+    Retrieves a page of organizations sorted by name, with optional filtering, and the
+    cursor of the next page (None on the last one). search_name matches names containing
+    it (starting with it, if shorter than three characters), ignoring case and accents.
     """
     query_filter: Dict[str, Any] = {}
     if search_name:
-        query_filter["name"] = {"$regex": search_name, "$options": "i"}
+        query_filter.update(name_search_filter(search_name))
 
-    cursor = db.organizations.find(query_filter).skip(skip).limit(limit)
-    organizations = await cursor.to_list(length=limit)
-    return [OrganizationInDB(**org) for org in organizations]
+    organizations, next_cursor = await find_page(db.organizations, query_filter, "search_key", limit, skip=skip, cursor=cursor)
+    return [OrganizationInDB(**org) for org in organizations], next_cursor
+
+async def get_rag_version(db: AsyncDatabase, org_id: str) -> int:
+    """
+    Version of the organization's indexed content. It changes whenever documents are
+    uploaded or (re)indexed, so anything cached from the old content can be discarded.
+    """
+    org_doc = await db.organizations.find_one({"_id": ObjectId(org_id)}, {"rag_version": 1})
+    return org_doc.get("rag_version", 0) if org_doc else 0
+
+async def bump_rag_version(db: AsyncDatabase, org_id: str):
+    await db.organizations.update_one({"_id": ObjectId(org_id)}, {"$inc": {"rag_version": 1}})
 
 async def create_default_admin_user(db: AsyncDatabase, organization_id: str, organization_name: str):
     print(organization_id, organization_name)
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+
+# Keyset pagination: listings are sorted by (sort_field, _id) and a page continues after the
+# last row of the previous one, so every page is one index seek whatever its depth, unlike
+# skip(), which walks and discards all earlier rows. The continuation token is opaque to
+# clients: URL-safe base64 of the sort field and the last row's (sort value, _id).
+
+# Listing endpoints send the next page's cursor in this header, and only there, so their
+# bodies keep their shape; NEXT_CURSOR_RESPONSES documents it in the OpenAPI schema
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NEXT_CURSOR_RESPONSES = {
+    200: {
+        "headers": {
+            NEXT_CURSOR_HEADER: {
+                "description": "Cursor of the next page, pass it back as ?cursor=. Absent on the last page.",
+                "schema": {"type": "string"}
+            }
+        }
+    }
+}
+
+def encode_cursor(sort_field: str, document: Dict[str, Any]) -> str:
+    payload = json.dumps({"f": sort_field, "k": document.get(sort_field), "i": str(document["_id"])}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Tuple[Any, ObjectId]:
+    """(sort value, _id) of the row the page continues after; 400 if the token is not valid here"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["f"] != sort_field or not ObjectId.is_valid(payload["i"]):
+            raise ValueError("cursor belongs to another listing")
+        return payload["k"], ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def keyset_filter(sort_field: str, cursor: str) -> Dict[str, Any]:
+    """Matches the rows sorted after the cursor's row"""
+    sort_value, last_id = decode_cursor(cursor, sort_field)
+    if sort_value is None:
+        # Rows without the sort field (e.g. not backfilled yet) sort first, as null. $gt null
+        # matches nothing, so continue with the remaining null rows, then every row that has a value
+        return {"$or": [
+            {sort_field: None, "_id": {"$gt": last_id}},
+            {sort_field: {"$ne": None}}
+        ]}
+    return {"$or": [
+        {sort_field: {"$gt": sort_value}},
+        {sort_field: sort_value, "_id": {"$gt": last_id}}
+    ]}
+
+
+async def find_page(
+    collection,
+    query_filter: Dict[str, Any],
+    sort_field: str,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of query_filter sorted by (sort_field, _id), and the cursor of the next page
+    (None on the last page). skip is the legacy offset paging and cannot be combined with
+    a cursor.
+    """
+    if cursor:
+        if skip:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either skip or cursor, not both")
+        query_filter = {"$and": [query_filter, keyset_filter(sort_field, cursor)]}
+
+    # One extra row tells whether another page follows
+    found = collection.find(query_filter).sort([(sort_field, 1), ("_id", 1)]).skip(skip).limit(limit + 1)
+    documents = await found.to_list(length=limit + 1)
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(sort_field, documents[-1])
@@ -1,19 +1,22 @@
 from fastapi import HTTPException, status
 from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError
+import time
 from datetime import datetime, date
 from bson import ObjectId
-from passlib.context import CryptContext
+from typing import List, Optional
 
 from app.api.v1.models.user import UserCreate, UserInDB, PyObjectId,UserResponse,UserUpdate
 from app.core import security # Import our security utilities
-
-# Password hashing context
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated="auto")
+from app.core.password_hashing import password_hasher, PasswordHashingBusyError
+from app.core.user_cache import invalidate_user
+from app.core.token_cache import revoke_user_tokens
+from app.crud.pagination import find_page
+from app.crud.name_search import search_fields, name_search_filter
 
 def verify_pwd(plain_pwd: str, hashed_pwd: str) -> bool:
-    # Ensure plain_pwd is bytes for comparison if hashed_pwd was stored as bytes
-    # However, passlib's verify method typically handles this if hash() also produces string
-    return pwd_context.verify(plain_pwd, hashed_pwd)
+    # Blocking bcrypt call; async code uses password_hasher.verify
+    return security.verify_password(plain_pwd, hashed_pwd)
 
 # def get_pwd_hash(pwd: str) -> str:
 #     # Passlib's hash() method for bcrypt expects bytes for input
@@ -45,6 +48,32 @@ async def get_user_by_username(db: AsyncDatabase, username: str) -> UserInDB:
         return UserInDB(**user_doc)
     return None
 
+def _user_document(user_create: UserCreate, organization_id: str) -> dict:
+    """MongoDB document for a new user, without the password hash"""
+    # Convert Pydantic model to dictionary for MongoDB insertion
+    # by_alias=True ensures _id is used for 'id' field
+    user_create_data = user_create.model_dump(by_alias=True)
+    user_create_data.pop('password')
+
+    # Convert organization_id to ObjectId for MongoDB
+    user_create_data['organization_id'] = ObjectId(organization_id)
+
+    # Convert date to datetime for MongoDB storage
+    # user_create_data['dob'] is already a date object from UserCreate
+    user_create_data['dob'] = datetime.combine(user_create_data['dob'], datetime.min.time())
+
+    # Ensure gender enum is stored as string
+    if 'gender' in user_create_data and hasattr(user_create_data['gender'], 'value'):
+        user_create_data['gender'] = user_create_data['gender'].value
+
+    # Normalized name keys for indexed search (app/crud/name_search.py)
+    user_create_data.update(search_fields(user_create_data['first_name']))
+
+    # Add timestamps
+    user_create_data['created_at'] = datetime.utcnow()
+    user_create_data['updated_at'] = datetime.utcnow()
+    return user_create_data
+
 async def create_user(db: AsyncDatabase, user_create: UserCreate , organization_id: str) -> UserInDB:
     try:
         # Check if user already exists by email or username
@@ -66,31 +95,9 @@ async def create_user(db: AsyncDatabase, user_create: UserCreate , organization_
                 detail=f"Organization with ID '{user_create.organization_id}' does not exist."
             )
         
-        # Convert Pydantic model to dictionary for MongoDB insertion
-        # by_alias=True ensures _id is used for 'id' field
-        user_create_data = user_create.model_dump(by_alias=True)
-
-
-        # Hash password and remove plain password
-        # Ensure get_pwd_hash correctly handles encoding/decoding
-        user_create_data['hashed_password'] = security.get_password_hash(user_create_data.pop('password'))
-        
-        # Convert organization_id to ObjectId for MongoDB
-        user_create_data['organization_id'] = ObjectId(organization_id)
-        
-        # Convert date to datetime for MongoDB storage
-        # user_create_data['dob'] is already a date object from UserCreate
-        user_create_data['dob'] = datetime.combine(user_create_data['dob'], datetime.min.time())
-
-        # Ensure gender enum is stored as string
-        if 'gender' in user_create_data and hasattr(user_create_data['gender'], 'value'):
-            user_create_data['gender'] = user_create_data['gender'].value
-        
-        # Add timestamps
-        user_create_data['created_at'] = datetime.utcnow()
-        user_create_data['updated_at'] = datetime.utcnow()
-        
-        
+        user_create_data = _user_document(user_create, organization_id)
+        # bcrypt runs in the hashing pool, not on the event loop
+        user_create_data['hashed_password'] = await password_hasher.hash(user_create.password)
         
         result = await db.users.insert_one(user_create_data)
         
@@ -105,6 +112,12 @@ async def create_user(db: AsyncDatabase, user_create: UserCreate , organization_
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
+    except PasswordHashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry.",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         print(f"Error creating user: {e}")
         raise HTTPException(
@@ -112,8 +125,76 @@ async def create_user(db: AsyncDatabase, user_create: UserCreate , organization_
             detail=f"An unexpected error occurred while creating user: {str(e)}"
         )
     
+async def create_users(db: AsyncDatabase, users_create: List[UserCreate], organization_id: str) -> List[UserInDB]:
+    """
+    Creates many users of one organization at once (bulk import). All or nothing: any
+    duplicate email / username, in the batch or already stored, fails the whole batch.
+    Passwords are hashed in parallel in the hashing pool, then inserted with one insert_many.
+    A user that appears between the duplicate check and the insert trips the unique
+    indexes; the rows inserted before it are then deleted again and the batch gets a 409.
+    """
+    emails = [user_create.email for user_create in users_create]
+    usernames = [user_create.username for user_create in users_create]
+    duplicates = {value for value in emails if emails.count(value) > 1} | {value for value in usernames if usernames.count(value) > 1}
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Duplicate emails or usernames in request: {sorted(duplicates)}"
+        )
+    existing = await db.users.find(
+        {"$or": [{"email": {"$in": emails}}, {"username": {"$in": usernames}}]},
+        {"email": 1, "username": 1}
+    ).to_list(length=None)
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Users already exist: {sorted(user['username'] for user in existing)}"
+        )
+    if not await validate_organization_id(db, organization_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Organization with ID '{organization_id}' does not exist."
+        )
+
+    try:
+        hashes = await password_hasher.hash_many([user_create.password for user_create in users_create])
+    except PasswordHashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry.",
+            headers={"Retry-After": "1"}
+        )
+    documents = []
+    for user_create, hashed_password in zip(users_create, hashes):
+        document = _user_document(user_create, organization_id)
+        document['hashed_password'] = hashed_password
+        documents.append(document)
+
+    try:
+        result = await db.users.insert_many(documents)
+    except BulkWriteError as e:
+        # insert_many set every document's _id; delete the ones the ordered insert got through
+        await db.users.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+        conflicts = sorted({
+            str(value) for error in e.details.get("writeErrors", []) if error.get("code") == 11000
+            for value in (error.get("keyValue") or {}).values()
+        })
+        if not conflicts:
+            raise
+        print(f"Bulk user creation rolled back, created concurrently: {conflicts}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Users already exist: {conflicts}"
+        )
+    created = await db.users.find({"_id": {"$in": result.inserted_ids}}).to_list(length=None)
+    order = {inserted_id: position for position, inserted_id in enumerate(result.inserted_ids)}
+    return [UserInDB(**user) for user in sorted(created, key=lambda user: order[user["_id"]])]
+    
 async def delete_user_by_id(user_id:PyObjectId,db:AsyncDatabase,org_id) -> bool:
     result = await db.users.delete_one({"_id":ObjectId(user_id),"organization_id":ObjectId(org_id)});
+    if result.deleted_count > 0:
+        invalidate_user(user_id)
+        revoke_user_tokens(user_id)
     return result.deleted_count > 0
 
 
@@ -132,7 +213,17 @@ async def update_user_by_id(user_id:PyObjectId,update_data:UserUpdate,db:AsyncDa
         if 'dob' in update_data_dict and isinstance(update_data_dict['dob'], date):
             update_data_dict['dob'] = datetime.combine(update_data_dict['dob'], datetime.min.time())
 
+        if 'first_name' in update_data_dict:
+            update_data_dict.update(search_fields(update_data_dict['first_name']))
+
         update_data_dict["updated_at"] = datetime.utcnow()
+        # Tokens carry username and is_admin; once either changes the old tokens must stop working.
+        # Stored on the user so every worker process, and restarts, see the revocation
+        claims_changed = any(
+            field in update_data_dict and update_data_dict[field] != getattr(user, field) for field in ("username", "is_admin")
+        )
+        if claims_changed:
+            update_data_dict["tokens_valid_after"] = time.time()
 
          # If no fields were provided for update (after stripping None values)
         if not update_data_dict:
@@ -143,6 +234,9 @@ async def update_user_by_id(user_id:PyObjectId,update_data:UserUpdate,db:AsyncDa
             {'_id':ObjectId(user_id)},
             {'$set':update_data_dict}
         )
+        invalidate_user(user_id)
+        if claims_changed:
+            revoke_user_tokens(user_id)
         
         # Check if data is modified
         if result.modified_count == 1:
@@ -160,7 +254,22 @@ async def get_user_by_id(user_id:PyObjectId,db:AsyncDatabase):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User Details not found")
     return UserInDB(**user)
 
-async def get_all_user(skip,limit,search_name,organization_id,db):
+async def get_token_state(user_id: str, db: AsyncDatabase) -> Optional[dict]:
+    """
+    The user's tokens_valid_after read straight from MongoDB (an _id lookup projected to
+    that one field), bypassing the user cache; None if the user no longer exists.
+    """
+    if not ObjectId.is_valid(user_id):
+        return None
+    return await db.users.find_one({'_id': ObjectId(user_id)}, {'tokens_valid_after': 1})
+
+async def get_all_user(skip,limit,search_name,organization_id,db,cursor=None):
+    """
+    One page of the organization's users sorted by first name, and the cursor of the next
+    page (None on the last one). Pass the cursor back to continue; skip is legacy paging.
+    search_name matches first names containing it (starting with it, if shorter than
+    three characters), ignoring case and accents.
+    """
     query_filter = {}
     if not ObjectId.is_valid(organization_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Organization ID")
@@ -168,8 +277,7 @@ async def get_all_user(skip,limit,search_name,organization_id,db):
     query_filter['organization_id'] = ObjectId(organization_id)
     
     if search_name:
-        query_filter['first_name'] = {"$regex":search_name,"$options":"i"}
+        query_filter.update(name_search_filter(search_name))
 
-    cursor = db.users.find(query_filter).skip(skip).limit(limit)
-    users = await cursor.to_list(length=limit)
-    return [UserInDB(**user) for user in users]
\ No newline at end of file
+    users, next_cursor = await find_page(db.users, query_filter, "search_key", limit, skip=skip, cursor=cursor)
+    return [UserInDB(**user) for user in users], next_cursor
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Declarative registry of the MongoDB indexes the CRUD queries rely on, and a check that
+those queries are actually served by them.
+
+ensure_indexes() creates whatever is missing; indexes that already exist with the same
+spec are left alone, so it is safe to run on every startup (ENSURE_INDEXES_ON_STARTUP) and
+from setup_indexes.py. An existing index whose keys or uniqueness differ from the registry
+is reported as an error, and indexes the registry does not know, e.g. created by hand, are
+listed; neither is changed. verify_query_plans() runs explain() on the query shapes the
+CRUD modules issue and reports any that fall back to a collection scan.
+"""
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import OperationFailure
+from bson import ObjectId
+
+from app.crud.name_search import name_search_filter
+
+# collection -> indexes. Names are explicit so a changed spec shows up as a conflict
+# instead of silently creating a second index.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # Login and the sign-up duplicate checks (crud/user.py)
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        # GET /user pages through one organization's users by (search_key, _id), see crud/pagination.py;
+        # also serves name prefix search. search_grams serves substring search (crud/name_search.py)
+        IndexModel([("organization_id", ASCENDING), ("search_key", ASCENDING), ("_id", ASCENDING)], name="organization_id_search_key_id"),
+        IndexModel([("organization_id", ASCENDING), ("search_grams", ASCENDING)], name="organization_id_search_grams"),
+    ],
+    "organizations": [
+        # Organization names are unique (crud/organization.py checks before writing)
+        IndexModel([("name", ASCENDING)], name="name_unique", unique=True),
+        # GET /organization pages by (search_key, _id) and searches names like GET /user
+        IndexModel([("search_key", ASCENDING), ("_id", ASCENDING)], name="search_key_id"),
+        IndexModel([("search_grams", ASCENDING)], name="search_grams"),
+    ],
+    "documents": [
+        # Listing an organization's documents uses the prefix; upload deduplication the full key
+        IndexModel([("organizationId", ASCENDING), ("content_hash", ASCENDING)], name="organization_id_content_hash"),
+    ],
+    "ingestion_jobs": [
+        # claim_next_job: each $or branch matches on status and the merge is ordered by enqueued_at;
+        # count_running_jobs matches on status too
+        IndexModel([("status", ASCENDING), ("enqueued_at", ASCENDING)], name="status_enqueued_at"),
+    ],
+}
+
+
+def _query_shapes() -> List[Dict[str, Any]]:
+    """The CRUD queries verify_query_plans() explains; values only need the right types"""
+    some_id = ObjectId()
+    now = datetime.utcnow()
+    return [
+        {"name": "login by username", "collection": "users", "filter": {"username": "someone"}},
+        {"name": "user by email", "collection": "users", "filter": {"email": "someone@example.com"}},
+        {"name": "users of an organization", "collection": "users", "filter": {"organization_id": some_id}},
+        {
+            "name": "users page after a cursor", "collection": "users",
+            "filter": {"$and": [{"organization_id": some_id}, {"$or": [{"search_key": {"$gt": "m"}}, {"search_key": "m", "_id": {"$gt": some_id}}]}]},
+            "sort": [("search_key", ASCENDING), ("_id", ASCENDING)]
+        },
+        {
+            # Rows not yet backfilled have no search_key and sort first; their cursors carry null
+            "name": "users page after a null cursor", "collection": "users",
+            "filter": {"$and": [{"organization_id": some_id}, {"$or": [{"search_key": None, "_id": {"$gt": some_id}}, {"search_key": {"$ne": None}}]}]},
+            "sort": [("search_key", ASCENDING), ("_id", ASCENDING)]
+        },
+        {
+            "name": "user name prefix search", "collection": "users",
+            "filter": {"organization_id": some_id, **name_search_filter("so")},
+            "sort": [("search_key", ASCENDING), ("_id", ASCENDING)]
+        },
+        {
+            "name": "user name substring search", "collection": "users",
+            "filter": {"organization_id": some_id, **name_search_filter("ourab")},
+            "sort": [("search_key", ASCENDING), ("_id", ASCENDING)]
+        },
+        {"name": "organization by name", "collection": "organizations", "filter": {"name": "some organization"}},
+        {
+            "name": "organizations page after a cursor", "collection": "organizations",
+            "filter": {"$or": [{"search_key": {"$gt": "m"}}, {"search_key": "m", "_id": {"$gt": some_id}}]},
+            "sort": [("search_key", ASCENDING), ("_id", ASCENDING)]
+        },
+        {
+            "name": "organization name search", "collection": "organizations",
+            "filter": name_search_filter("acme"),
+            "sort": [("search_key", ASCENDING), ("_id", ASCENDING)]
+        },
+        {"name": "documents of an organization", "collection": "documents", "filter": {"organizationId": str(some_id)}},
+        {
+            "name": "document by content hash", "collection": "documents",
+            "filter": {"organizationId": str(some_id), "content_hash": "0" * 64, "processed_for_rag": True, "duplicate_of": {"$exists": False}}
+        },
+        {
+            "name": "next ingestion job", "collection": "ingestion_jobs",
+            "filter": {"$or": [{"status": "queued", "available_at": {"$lte": now}}, {"status": "processing", "lease_expires_at": {"$lte": now}}]},
+            "sort": [("enqueued_at", ASCENDING)]
+        },
+        {
+            "name": "running ingestion jobs", "collection": "ingestion_jobs",
+            "filter": {"status": "processing", "lease_expires_at": {"$gt": now}}
+        },
+    ]
+
+
+def _spec_mismatch(registered: Dict[str, Any], existing: Dict[str, Any]) -> str:
+    """How an existing index differs from its registry entry in keys or uniqueness ("" if it doesn't)"""
+    def spec(index):
+        keys = [(field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in index["key"].items()]
+        return keys, bool(index.get("unique", False))
+
+    (existing_keys, existing_unique), (registered_keys, registered_unique) = spec(existing), spec(registered)
+    if (existing_keys, existing_unique) == (registered_keys, registered_unique):
+        return ""
+    return (
+        f"exists with key {existing_keys} unique={existing_unique}, the registry has key {registered_keys} "
+        f"unique={registered_unique}; drop it to rebuild"
+    )
+
+
+async def ensure_indexes(db: AsyncDatabase) -> Dict[str, Any]:
+    """
+    Creates the registered indexes that do not exist yet. An index that cannot be built
+    (a conflicting existing index, duplicate values under a unique key), or that exists
+    under its name with other keys or uniqueness, is reported under "errors" and left as
+    it is; the rest are still created. Indexes outside the registry are listed under
+    "unregistered" and kept.
+    """
+    report = {"created": [], "existing": [], "unregistered": [], "errors": []}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = {index["name"]: index async for index in await collection.list_indexes()}
+        known = {index.document["name"] for index in indexes} | {"_id_"}
+        report["unregistered"].extend(f"{collection_name}.{name}" for name in sorted(set(existing) - known))
+        for index in indexes:
+            name = index.document["name"]
+            if name in existing:
+                mismatch = _spec_mismatch(index.document, existing[name])
+                if mismatch:
+                    print(f"Index {collection_name}.{name} differs from the registry: {mismatch}")
+                    report["errors"].append(f"{collection_name}.{name}: {mismatch}")
+                else:
+                    report["existing"].append(f"{collection_name}.{name}")
+                continue
+            try:
+                await collection.create_indexes([index])
+                report["created"].append(f"{collection_name}.{name}")
+            except OperationFailure as e:
+                print(f"Could not create index {collection_name}.{name}: {e}")
+                report["errors"].append(f"{collection_name}.{name}: {e}")
+    return report
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Every stage name in an explain() plan tree (classic and SBE layouts)"""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+async def verify_query_plans(db: AsyncDatabase) -> List[Dict[str, Any]]:
+    """
+    explain()s every registered query shape. A query passes when its winning plan reads an
+    index (IXSCAN, or the _id / express fast paths) and never scans the whole collection.
+    """
+    results = []
+    for shape in _query_shapes():
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explanation = await cursor.limit(1).explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        uses_index = any("IXSCAN" in stage or "IDHACK" in stage for stage in stages)
+        results.append({
+            "query": shape["name"],
+            "collection": shape["collection"],
+            "stages": stages,
+            "ok": uses_index and "COLLSCAN" not in stages
+        })
+    return results
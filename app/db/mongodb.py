@@ -23,7 +23,7 @@ async def connect_to_mongo():
 async def close_mongo_connection():
         global client
         if client:
-             client.close()
+             await client.close()
              client = None
              print("MongoDB connection closed.")
 
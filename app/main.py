@@ -5,10 +5,15 @@ from fastapi.responses import JSONResponse
 from pymongo.errors import PyMongoError # Import the specific MongoDB error base class
 import logging # For logging errors
 from contextlib import asynccontextmanager
+import asyncio
 
 from app.core.config import settings
-from app.db.mongodb import connect_to_mongo,close_mongo_connection
-from app.api.v1.endpoints import user_router , organization_router , doc_router , auth_router , search_router , qa_router
+from app.db.mongodb import connect_to_mongo,close_mongo_connection,get_database
+from app.db.indexes import ensure_indexes
+from app.crud.name_search import backfill_search_keys
+from app.api.v1.endpoints import user_router , organization_router , doc_router , auth_router , search_router , qa_router , metrics_router , health_router
+from app.core.warmup import start_warm_up, stop_warm_up
+from app.core.vector_store import vector_store_manager
 
 # Configure logging
 logging.basicConfig(level=logging.ERROR) # Set desired logging level
@@ -16,14 +21,42 @@ logger = logging.getLogger(__name__)
 
 
 
+async def backfill_search_keys_in_background(db):
+    # Users / organizations written before indexed name search get their keys; a no-op afterwards
+    try:
+        updated = await backfill_search_keys(db)
+        if any(updated.values()):
+            print(f"✅ Name search keys written: {updated}")
+    except Exception as e:
+        print(f"❌ Could not backfill name search keys: {e}")
+        logger.error(f"Search key backfill error: {e}")
+
+
 # Lifespan event handler for FastAPI application.
 # Handles startup and shutdown events.
     
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    search_key_backfill = None
     try:
         await connect_to_mongo()
         print("✅ MongoDB connection established")
+        if settings.ENSURE_INDEXES_ON_STARTUP:
+            # A failed index build is logged, not fatal: queries still work, just slower
+            try:
+                db = await get_database()
+                report = await ensure_indexes(db)
+                print(f"✅ MongoDB indexes: {len(report['created'])} created, {len(report['existing'])} present, {len(report['errors'])} failed or differing from the registry")
+                if report["unregistered"]:
+                    print(f"MongoDB indexes outside the registry (kept): {', '.join(report['unregistered'])}")
+                search_key_backfill = asyncio.create_task(backfill_search_keys_in_background(db))
+            except Exception as e:
+                print(f"❌ Could not ensure MongoDB indexes: {e}")
+                logger.error(f"Index setup error: {e}")
+        # Vector store and LLM clients are created in the background (or on first use),
+        # so the server accepts requests without waiting on Pinecone / OpenAI
+        if settings.WARM_UP_ON_STARTUP:
+            start_warm_up()
         
         
     except Exception as e:
@@ -35,6 +68,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("🛑 Application shutdown: Closing connections...")
     try:
+        if search_key_backfill is not None and not search_key_backfill.done():
+            search_key_backfill.cancel()
+        await stop_warm_up()
+        await vector_store_manager.aclose()
         await close_mongo_connection()
         print("✅ MongoDB connection closed")
         
@@ -62,6 +99,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # pagination cursor of the listing endpoints
 )
 
 # --- FAST Lifecycle Events Handlers---
@@ -115,4 +153,6 @@ app.include_router(organization_router, prefix="/api/v1")
 app.include_router(doc_router, prefix="/api/v1")
 app.include_router(search_router, prefix="/api/v1")  
 app.include_router(qa_router, prefix="/api/v1")
+app.include_router(metrics_router, prefix="/api/v1")
+app.include_router(health_router, prefix="/api/v1")
 
@@ -0,0 +1,79 @@
+"""
+Moves Pinecone vectors written before per-organization namespaces (all tenants in the
+default namespace, scoped by an organization_id filter) into one namespace per organization.
+
+Usage:
+    python -m app.migrate_vectors --dry-run   # count what would move
+    python -m app.migrate_vectors             # move it
+
+The API and workers start in namespace mode "migrating" while the default namespace still
+has vectors, so search reads both layouts while this runs. Once this reports none left,
+restart them to drop the second query per search. The migration can be interrupted
+and re-run; vectors are deleted from the default namespace only after they were copied.
+
+While it moves vectors, ingestion is paused: workers claim no new jobs, and the migration
+starts once the jobs already running have finished. Queued documents are processed
+afterwards. Uploads keep working meanwhile.
+"""
+import argparse
+import asyncio
+import logging
+
+from pymongo import AsyncMongoClient
+
+from app.core.config import settings
+from app.core.vector_backends.pinecone_backend import PineconeBackend
+from app.core.vector_store import vector_store_manager
+from app.crud import ingestion_job as crud_ingestion_job
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def _migrate_with_ingestion_paused(backend: PineconeBackend) -> dict:
+    client = AsyncMongoClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+    try:
+        await crud_ingestion_job.pause_ingestion(db, "app.migrate_vectors")
+        try:
+            running = await crud_ingestion_job.count_running_jobs(db)
+            while running:
+                logger.info(f"Ingestion paused, waiting for {running} running jobs to finish")
+                await asyncio.sleep(settings.INGESTION_POLL_INTERVAL_SECONDS)
+                running = await crud_ingestion_job.count_running_jobs(db)
+            return await asyncio.to_thread(backend.migrate_shared_namespace)
+        finally:
+            await crud_ingestion_job.resume_ingestion(db)
+            logger.info("Ingestion resumed")
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move Pinecone vectors into per-organization namespaces")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the vectors that would move")
+    args = parser.parse_args()
+
+    backend = vector_store_manager.get_backend()
+    if not isinstance(backend, PineconeBackend):
+        logger.info(f"Vector backend is '{settings.VECTOR_BACKEND}', which is already partitioned per organization")
+        return
+
+    if args.dry_run:
+        counts = backend.migrate_shared_namespace(dry_run=True)
+    else:
+        counts = asyncio.run(_migrate_with_ingestion_paused(backend))
+    logger.info(
+        f"{'Would move' if args.dry_run else 'Moved'} {counts['moved']} vectors of {counts['organizations']} organizations, "
+        f"{counts['superseded']} already re-written or deleted, "
+        f"{counts['skipped']} without an organization_id left in place"
+    )
+    remaining = backend.shared_namespace_vector_count()
+    if remaining:
+        logger.info(f"{remaining} vectors left in the default namespace; search keeps reading it until they are moved")
+    else:
+        logger.info("No vectors left in the default namespace; restart the API and workers to stop reading it")
+
+
+if __name__ == "__main__":
+    main()
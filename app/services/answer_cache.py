@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+
+
+class _CachedAnswer:
+    __slots__ = ("result", "embedding", "rag_version", "expires_at", "llm_ms", "total_tokens")
+
+    def __init__(self, result, embedding, rag_version, expires_at, llm_ms, total_tokens):
+        self.result = result
+        self.embedding = embedding
+        self.rag_version = rag_version
+        self.expires_at = expires_at
+        self.llm_ms = llm_ms
+        self.total_tokens = total_tokens
+
+
+class AnswerCache:
+    """
+    LRU cache of Q&A results keyed by (organization_id, document_id, normalized question).
+
+    Besides exact matches, a question whose embedding has a cosine similarity above
+    similarity_threshold with a cached question of the same organization/document scope
+    is answered from the cache ("semantic" match).
+
+    Entries stored without an embedding (identifier lookups, answered without one) only
+    match exactly.
+
+    Every entry remembers the organization's rag_version at the time it was answered.
+    The version is bumped in MongoDB whenever the organization uploads or (re)indexes
+    documents, so entries are dropped on the next lookup even when the upload happened
+    in another process; invalidate_organization() drops them right away locally.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[tuple, _CachedAnswer]" = OrderedDict()
+        self._scopes: Dict[tuple, Dict[tuple, None]] = {}  # (org, doc) -> keys, for semantic lookups
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.llm_ms_saved = 0.0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def _scope(organization_id: str, document_id: Optional[str]) -> tuple:
+        return (organization_id, document_id or "")
+
+    def _remove(self, key: tuple):
+        self._entries.pop(key, None)
+        scope_keys = self._scopes.get(key[:2])
+        if scope_keys is not None:
+            scope_keys.pop(key, None)
+            if not scope_keys:
+                del self._scopes[key[:2]]
+
+    def _is_stale(self, entry: _CachedAnswer, rag_version: int) -> bool:
+        return entry.rag_version != rag_version or entry.expires_at <= time.monotonic()
+
+    def _hit(self, key: tuple, entry: _CachedAnswer, match: str) -> Tuple[Dict[str, Any], str]:
+        self._entries.move_to_end(key)
+        if match == "exact":
+            self.exact_hits += 1
+        else:
+            self.semantic_hits += 1
+        self.llm_ms_saved += entry.llm_ms
+        self.tokens_saved += entry.total_tokens
+        return entry.result, match
+
+    def get(
+        self,
+        organization_id: str,
+        document_id: Optional[str],
+        normalized_question: str,
+        rag_version: int,
+        query_embedding=None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Returns (result, "exact" | "semantic") on a hit and (None, None) on a miss"""
+        scope = self._scope(organization_id, document_id)
+        key = scope + (normalized_question,)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._is_stale(entry, rag_version):
+                    return self._hit(key, entry, "exact")
+                self._remove(key)
+
+            if query_embedding is not None and self.similarity_threshold < 1.0:
+                query_vector = np.asarray(query_embedding, dtype=np.float32)
+                query_vector /= np.linalg.norm(query_vector) or 1.0
+                best_key, best_similarity = None, self.similarity_threshold
+                for candidate_key in list(self._scopes.get(scope, ())):
+                    candidate = self._entries[candidate_key]
+                    if self._is_stale(candidate, rag_version):
+                        self._remove(candidate_key)
+                        continue
+                    if candidate.embedding is None:
+                        continue
+                    similarity = float(np.dot(candidate.embedding, query_vector))
+                    if similarity >= best_similarity:
+                        best_key, best_similarity = candidate_key, similarity
+                if best_key is not None:
+                    return self._hit(best_key, self._entries[best_key], "semantic")
+
+            self.misses += 1
+            return None, None
+
+    def set(
+        self,
+        organization_id: str,
+        document_id: Optional[str],
+        normalized_question: str,
+        rag_version: int,
+        result: Dict[str, Any],
+        query_embedding,
+        llm_ms: float,
+        total_tokens: int
+    ):
+        if self.max_entries <= 0:
+            return
+        scope = self._scope(organization_id, document_id)
+        key = scope + (normalized_question,)
+        embedding = None
+        if query_embedding is not None:
+            embedding = np.asarray(query_embedding, dtype=np.float32)
+            embedding /= np.linalg.norm(embedding) or 1.0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _CachedAnswer(
+                result, embedding, rag_version, time.monotonic() + self.ttl_seconds, llm_ms, total_tokens
+            )
+            self._scopes.setdefault(scope, {})[key] = None
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate_organization(self, organization_id: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == organization_id]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_entries,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            "invalidated_entries": self.invalidations,
+            "llm_ms_saved": round(self.llm_ms_saved, 2),
+            "llm_tokens_saved": self.tokens_saved
+        }
+
+
+answer_cache = AnswerCache(
+    settings.ANSWER_CACHE_SIZE,
+    settings.ANSWER_CACHE_TTL_SECONDS,
+    settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+)
+register_collector("answer_cache", answer_cache.stats)
@@ -1,24 +1,61 @@
 # from langchain.text_splitter import RecursiveCharacterTextSplitter
+import hashlib
+from typing import Iterable, Iterator
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.services.pdf_service import format_page_text
+
+def _get_text_splitter():
+    return RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=200,separators=["\n\n", "\n", ". ", " ", ""])
+
+def _make_chunk(chunk: str, index: int, document_id: str, organization_id: str):
+    chunk_text = chunk.strip()
+    return {
+        # Deterministic id: re-processing a document overwrites its vectors instead of duplicating them
+        "id": f"{document_id}_chunk_{index}",
+        "text": chunk_text,
+        "metadata" : {
+            "organization_id": organization_id,  
+            "document_id" : document_id,
+            "chunk_index": index,
+            "chunk_length": len(chunk_text),
+            "text_hash": hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+        }
+    }
+
 def extract_text_into_chunks(text:str,document_id:str,organization_id:str):
     try:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=200,separators=["\n\n", "\n", ". ", " ", ""])
+        text_splitter = _get_text_splitter()
         chunks = text_splitter.split_text(text)
         vector_ready_chunks_list = []
         for index,chunk in enumerate(chunks):
-            chunk_data_dict = {
-                "id": f"{document_id}_chunk_{index}",
-                "text": chunk.strip(),
-                "metadata" : {
-                    "organization_id": organization_id,  
-                    "document_id" : document_id,
-                    "chunk_index": index,
-                    "chunk_length": len(chunk.strip())
-                }
-            }
-            vector_ready_chunks_list.append(chunk_data_dict)
+            vector_ready_chunks_list.append(_make_chunk(chunk, index, document_id, organization_id))
         return vector_ready_chunks_list
+    except Exception as e:
+        print(f"Error while chunking {e}")
+        raise
+
+def iter_chunks_from_pages(pages: Iterable[str],document_id:str,organization_id:str) -> Iterator[dict]:
+    """
+    Streaming version of extract_text_into_chunks: pages go in one at a time and chunks
+    come out as soon as they are complete. The last piece of each page is held back and
+    split again together with the next page, so chunks still span page boundaries.
+    """
+    try:
+        text_splitter = _get_text_splitter()
+        carry = ""
+        index = 0
+        for page_number, page_text in enumerate(pages, start=1):
+            pieces = text_splitter.split_text(carry + format_page_text(page_number, page_text))
+            if not pieces:
+                carry = ""
+                continue
+            for piece in pieces[:-1]:
+                yield _make_chunk(piece, index, document_id, organization_id)
+                index += 1
+            carry = pieces[-1]
+        if carry.strip():
+            yield _make_chunk(carry, index, document_id, organization_id)
     except Exception as e:
         print(f"Error while chunking {e}")
         raise
\ No newline at end of file
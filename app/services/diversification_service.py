@@ -0,0 +1,121 @@
+import numpy as np
+
+from app.core.vector_store import vector_store_manager
+
+# Overlap shorter than this between neighbouring chunks is treated as coincidence, not splitter overlap
+_MIN_OVERLAP_CHARS = 20
+# The splitter overlaps chunks by up to 200 characters; allow for separator adjustments
+_MAX_OVERLAP_CHARS = 400
+_RELEVANCE_ORDER = {"High": 0, "Medium": 1, "Low": 2}
+
+
+def mmr_order(query_vector: np.ndarray, candidate_vectors: np.ndarray, lambda_mult: float) -> list:
+    """
+    Maximal Marginal Relevance: greedily ranks candidates by
+    lambda * sim(query, c) - (1 - lambda) * max sim(c, already ranked).
+    All similarities come from two matrix products, the greedy loop only updates a vector.
+    """
+    query_vector = query_vector / (np.linalg.norm(query_vector) or 1)
+    norms = np.linalg.norm(candidate_vectors, axis=1, keepdims=True)
+    candidate_vectors = candidate_vectors / np.where(norms == 0, 1, norms)
+    relevance = candidate_vectors @ query_vector
+    similarity = candidate_vectors @ candidate_vectors.T
+
+    order = []
+    max_similarity = np.full(len(candidate_vectors), -np.inf)
+    remaining = np.ones(len(candidate_vectors), dtype=bool)
+    for _ in range(len(candidate_vectors)):
+        penalty = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        mmr_scores = np.where(remaining, lambda_mult * relevance - (1 - lambda_mult) * penalty, -np.inf)
+        best = int(np.argmax(mmr_scores))
+        order.append(best)
+        remaining[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    return order
+
+
+def _join_overlapping(first: str, second: str) -> str:
+    """Joins neighbouring chunks, dropping the text the splitter repeated at the start of the second"""
+    for size in range(min(len(first), len(second), _MAX_OVERLAP_CHARS), _MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + "\n" + second
+
+
+def _merge_span(results: list) -> dict:
+    """One result for a run of consecutive chunks of a document"""
+    if len(results) == 1:
+        return results[0]
+    text = results[0]["text"]
+    for result in results[1:]:
+        text = _join_overlapping(text, result["text"])
+    metadata = dict(results[0]["metadata"])
+    metadata["chunk_indexes"] = [result["metadata"]["chunk_index"] for result in results]
+    metadata["chunk_length"] = len(text)
+    best = min(results, key=lambda result: _RELEVANCE_ORDER.get(result["relevance"], 2))
+    return {**best, "id": results[0].get("id"), "text": text, "metadata": metadata}
+
+
+def merge_adjacent(results: list) -> list:
+    """
+    Merges results that are consecutive chunks (chunk_index n, n+1, ...) of the same
+    document into one span. Spans keep the position of their best-ranked chunk.
+    """
+    positions = {}
+    for position, result in enumerate(results):
+        key = (result["metadata"].get("document_id"), result["metadata"].get("chunk_index"))
+        positions[key] = position
+
+    spans = []
+    used = set()
+    for position, result in enumerate(results):
+        if position in used:
+            continue
+        document_id = result["metadata"].get("document_id")
+        chunk_index = result["metadata"].get("chunk_index")
+        if chunk_index is None:
+            spans.append(result)
+            used.add(position)
+            continue
+        start = chunk_index
+        while (document_id, start - 1) in positions and positions[(document_id, start - 1)] not in used:
+            start -= 1
+        members = []
+        index = start
+        while (document_id, index) in positions and positions[(document_id, index)] not in used:
+            members.append(positions[(document_id, index)])
+            index += 1
+        used.update(members)
+        spans.append(_merge_span([results[member] for member in members]))
+    return spans
+
+
+def diversify(results: list, query_embedding, organization_id: str, top_k: int, lambda_mult: float) -> list:
+    """
+    Reorders over-fetched results with MMR over their embeddings, then takes them in that
+    order until top_k distinct spans are collected, with adjacent chunks merged into one span.
+    Results whose vector can't be found keep their place after the diversified ones.
+    """
+    if not results:
+        return results
+    ids = [result.get("id") for result in results]
+    vectors = vector_store_manager.get_backend().fetch_vectors(organization_id, [chunk_id for chunk_id in ids if chunk_id])
+    with_vectors = [position for position, chunk_id in enumerate(ids) if chunk_id in vectors]
+    without_vectors = [position for position, chunk_id in enumerate(ids) if chunk_id not in vectors]
+    if with_vectors:
+        candidate_vectors = np.asarray([vectors[ids[position]] for position in with_vectors], dtype=np.float32)
+        order = [with_vectors[i] for i in mmr_order(np.asarray(query_embedding, dtype=np.float32), candidate_vectors, lambda_mult)]
+    else:
+        order = []
+    order += without_vectors
+
+    selected = []
+    for position in order:
+        selected.append(results[position])
+        if len(merge_adjacent(selected)) > top_k:
+            selected.pop()
+            break
+        # Each span may absorb neighbours, but don't let the context grow past twice the chunk budget
+        if len(selected) >= 2 * top_k:
+            break
+    return merge_adjacent(selected)
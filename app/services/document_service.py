@@ -1,24 +1,138 @@
-from app.services.pdf_service import extract_text_from_pdf
-from app.services.chunking_service import extract_text_into_chunks
-from app.services.vector_service import store_chunks_in_pinecone
+import queue
+import threading
+from itertools import islice
+
+from app.core.config import settings
+from app.services.pdf_service import count_pdf_pages, iter_pages_from_pdf
+from app.services.chunking_service import iter_chunks_from_pages
+from app.services.vector_service import (
+    filter_changed_chunks, embed_chunks, upsert_embedded_chunks, delete_stale_chunks
+)
+from app.services import lexical_service
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class _StageFailed:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def _put(stage_queue: queue.Queue, item, stop: threading.Event):
+    """Blocking put that gives up once the pipeline is stopped, so a failed stage can't leave others stuck"""
+    while not stop.is_set():
+        try:
+            stage_queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(stage_queue: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return stage_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _run_stage(target, output_queue: queue.Queue, stop: threading.Event):
+    def run():
+        try:
+            target()
+        except Exception as e:
+            _put(output_queue, _StageFailed(e), stop)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def process_documents(file_path:str,document_id:str,organization_id : str,progress_callback=None,incremental: bool = False):
+    """
+    Runs the ingestion pipeline for one PDF as streaming stages connected by bounded queues:
+
+        pages -> chunks (+ BM25 index) -> embedding batches  (chunk_batches)  -> embedded batches (embedded_batches) -> upsert
+
+    Extraction/chunking and embedding each run in their own thread while this thread
+    upserts, so batch N is embedded while batch N-1 is written. A full queue blocks the
+    stage feeding it, so memory stays proportional to the batch size.
+
+    progress_callback(stage, progress) is called as batches are written so the ingestion
+    worker can report progress; errors are raised so the worker can retry the job.
+    incremental=True re-embeds only the chunks whose text changed since the last run.
+    """
+    def report(stage: str, progress: float):
+        if progress_callback:
+            progress_callback(stage, progress)
+
+    stop = threading.Event()
+    chunk_batches = queue.Queue(maxsize=settings.INGESTION_PIPELINE_QUEUE_SIZE)
+    embedded_batches = queue.Queue(maxsize=settings.INGESTION_PIPELINE_QUEUE_SIZE)
+    page_count = count_pdf_pages(file_path)
+    counters = {"pages": 0, "chunks": 0, "embedded": 0}
+    chunk_ids = []
+
+    def counted_pages():
+        for page_text in iter_pages_from_pdf(file_path):
+            counters["pages"] += 1
+            yield page_text
+
+    # Stage 1 & 2: extract pages and split them into chunks, grouped into embedding batches
+    def produce_chunk_batches():
+        chunks = iter_chunks_from_pages(counted_pages(), document_id, organization_id)
+        while not stop.is_set():
+            batch = list(islice(chunks, settings.INGESTION_EMBED_BATCH_SIZE))
+            if not batch:
+                break
+            chunk_ids.extend(chunk["id"] for chunk in batch)
+            counters["chunks"] += len(batch)
+            # Every chunk goes into the BM25 index, including unchanged ones in incremental mode,
+            # so documents indexed before hybrid search get their lexical entries on re-index
+            lexical_service.index_chunks(batch)
+            _put(chunk_batches, batch, stop)
+        _put(chunk_batches, _DONE, stop)
+
+    # Stage 3: embed each batch (incremental mode skips chunks that didn't change)
+    def embed_batches():
+        while True:
+            batch = _get(chunk_batches, stop)
+            if batch is _DONE or isinstance(batch, _StageFailed):
+                _put(embedded_batches, batch, stop)
+                return
+            if incremental:
+                batch = filter_changed_chunks(batch)
+            _put(embedded_batches, (batch, embed_chunks(batch)), stop)
 
-def process_documents(file_path:str,document_id:str,organization_id : str):
     try:
-        # Step 1: Extract text from PDF file
-        text = extract_text_from_pdf(file_path)
-        print(f"Extracted {len(text)} characters from PDF")
-        # Step 2: Split Text into chunks
-        chunks = extract_text_into_chunks(text,document_id,organization_id)
-
-        # Step 3: Store in Pinecone
-        success = store_chunks_in_pinecone(chunks)
-        if success:
-            print(f"✅ Successfully processed and stored {len(chunks)} chunks!")
-        else:
-            print("❌ Failed to store chunks")
-
-        return success
+        report("extracting", 0.05)
+        _run_stage(produce_chunk_batches, chunk_batches, stop)
+        _run_stage(embed_batches, embedded_batches, stop)
+
+        # Stage 4: upsert in this thread
+        while True:
+            item = _get(embedded_batches, stop)
+            if item is _DONE:
+                break
+            if isinstance(item, _StageFailed):
+                raise item.error
+            batch, vectors = item
+            upsert_embedded_chunks(batch, vectors, settings.INGESTION_UPSERT_BATCH_SIZE)
+            counters["embedded"] += len(batch)
+            report("indexing", round(0.05 + 0.9 * counters["pages"] / max(page_count, 1), 3))
+
+        if incremental:
+            removed = delete_stale_chunks(organization_id, document_id, chunk_ids)
+            lexical_service.delete_stale_chunks(organization_id, document_id, chunk_ids)
+            print(f"Incremental re-index: {counters['embedded']} of {counters['chunks']} chunks changed, {removed} stale chunks removed")
+
+        print(f"Extracted {counters['pages']} pages from PDF")
+        print(f"✅ Successfully processed and stored {counters['chunks']} chunks!")
+        return True
         
     except Exception as e:
         print(f"Error while processing document {e}")
-        return False
\ No newline at end of file
+        raise
+    finally:
+        stop.set()
@@ -0,0 +1,130 @@
+import re
+import threading
+
+from app.core.lexical_index import lexical_index
+from app.core.metrics import register_collector
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Identifier candidates: letters, digits and code separators, at least 4 characters
+_IDENTIFIER_CHARACTERS = re.compile(r"^[\w][\w\-/.#:]{3,}$")
+_IDENTIFIER_SEPARATORS = re.compile(r"[\-/.#:_]+")
+# Letter prefix + number identifiers ("INV-778") need this many digits; "covid-19" is a word
+_IDENTIFIER_MIN_NUMBER_DIGITS = 3
+# Queries this short that consist of identifiers are lookups, not questions
+_IDENTIFIER_QUERY_MAX_WORDS = 4
+# Words a lookup may contain besides the identifier ("find POL-2023-0042"); any other word
+# makes it a question, which goes through hybrid search
+_LOOKUP_FILLER_WORDS = frozenset({
+    "a", "an", "the", "of", "for", "about", "on", "to", "is", "what", "whats", "what's", "which",
+    "find", "show", "get", "lookup", "look", "up", "search", "number", "no", "id", "ref", "reference", "code"
+})
+
+_stats = {"fast_path_queries": 0, "fast_path_misses": 0, "hybrid_queries": 0}
+_stats_lock = threading.Lock()
+
+
+def record(counter: str):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def lexical_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+register_collector("lexical_search", lexical_stats)
+
+
+def _strip(word: str) -> str:
+    return word.strip("?!,;\"'()")
+
+
+def is_identifier(word: str) -> bool:
+    """
+    POL-2023-0042, SKU44812, INV/2024/778, INV-778: letters and digits in one part, two or
+    more digit groups joined by separators, or a letter prefix with a number of at least
+    three digits. Bare numbers ("2023") and words with a short number ("covid-19") are not.
+    """
+    word = _strip(word)
+    if not _IDENTIFIER_CHARACTERS.match(word):
+        return False
+    parts = [part for part in _IDENTIFIER_SEPARATORS.split(word) if part]
+    if any(part.isalnum() and not part.isdigit() and not part.isalpha() for part in parts):
+        return True
+    numbers = [part for part in parts if part.isdigit()]
+    if len(numbers) >= 2:
+        return True
+    return len(numbers) == 1 and len(parts) > 1 and len(numbers[0]) >= _IDENTIFIER_MIN_NUMBER_DIGITS
+
+
+def looks_like_identifier(query: str) -> bool:
+    """
+    Lookups such as "POL-2023-0042" or "find SKU44812" are exact matches that embeddings
+    handle poorly. Only short queries made of identifiers and filler words qualify; "leave
+    policy 2024" or "what changed in 2023?" are questions.
+    """
+    words = [_strip(word) for word in query.split()]
+    words = [word for word in words if word]
+    if not 0 < len(words) <= _IDENTIFIER_QUERY_MAX_WORDS:
+        return False
+    identifiers = [word for word in words if is_identifier(word)]
+    return bool(identifiers) and all(
+        is_identifier(word) or word.lower() in _LOOKUP_FILLER_WORDS for word in words
+    )
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match_expression(query: str) -> str:
+    """Any query word may match (BM25 ranks chunks with more and rarer words higher); quoting keeps FTS5 syntax out"""
+    return " OR ".join(_quote(word) for word in dict.fromkeys(_WORD_PATTERN.findall(query.lower())))
+
+
+def build_identifier_expression(query: str) -> str:
+    """Identifiers must match as a phrase: "POL-2023-0042" is the tokens pol 2023 0042 in that order"""
+    phrases = []
+    for word in query.split():
+        word = _strip(word)
+        if is_identifier(word):
+            phrases.append(_quote(" ".join(_WORD_PATTERN.findall(word.lower()))))
+    return " AND ".join(phrases)
+
+
+def index_chunks(chunks):
+    """Adds chunks to their organization's lexical index, next to their vectors"""
+    if not chunks:
+        return
+    lexical_index.add(chunks[0]["metadata"]["organization_id"], chunks)
+
+
+def delete_stale_chunks(organization_id, document_id, current_ids):
+    current_ids = set(current_ids)
+    stale_ids = [
+        chunk_id for chunk_id in lexical_index.document_chunk_ids(organization_id, document_id)
+        if chunk_id not in current_ids
+    ]
+    if stale_ids:
+        lexical_index.delete(organization_id, stale_ids)
+    return len(stale_ids)
+
+
+def delete_organization(organization_id):
+    lexical_index.delete_organization(organization_id)
+
+
+def search(query: str, organization_id: str, document_id: str = None, top_k: int = 5):
+    """BM25 search over the organization's chunks, returns (Document, score) pairs"""
+    match_expression = build_match_expression(query)
+    if not match_expression:
+        return []
+    return lexical_index.search(organization_id, match_expression, top_k, document_id)
+
+
+def search_identifier(query: str, organization_id: str, document_id: str = None, top_k: int = 5):
+    match_expression = build_identifier_expression(query)
+    if not match_expression:
+        return []
+    return lexical_index.search(organization_id, match_expression, top_k, document_id)
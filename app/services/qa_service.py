@@ -1,27 +1,13 @@
+import asyncio
+import time
 from app.core.llm import llm_manager
-from app.services.search_service import search_documents
-def answer_question(question: str,organization_id:str,document_id: str = None,max_context_chunks: int = 5):
-    try:
-        print(f"Answering question: {question}")
-        # Step 1: Search for relevant context
-        context_results =  search_documents(question,organization_id,document_id,max_context_chunks)
-        if not context_results:
-            return {
-                "answer": "I counld not find relevant information to answer your question.",
-                "confidence": "LOW",
-                "context_sources": [],
-                "context_used": ""
-            }
-        print(  f"Found {len(context_results)} context chunks for question '{question}'")
-        #2 : Prepare context for LLM
-        context_texts = []
-        for result in context_results:
-            context_texts.append(f"Context {len(context_texts) + 1}: {result['text']}")
-        
-        context_string = "\n\n".join(context_texts)
+from app.services.search_service import (
+    search_documents, asearch_documents, get_query_embedding, aget_query_embedding, normalize_query,
+    identifier_fast_path
+)
+from app.services.answer_cache import answer_cache
 
-        # Step 3: Create prompt for GPT
-        prompt_template = """
+PROMPT_TEMPLATE = """
         You are a helpful AI assistant that answers questions based on the provided context.
         
         Context Information:
@@ -39,28 +25,217 @@ def answer_question(question: str,organization_id:str,document_id: str = None,ma
         Answer:
         """
 
-         # Step 4: Get answer from GPT
-        # llm = ChatOpenAI(
-        #     model="gpt-3.5-turbo",
-        #     temperature=0.1,  # Low temperature for factual answers
-        #     openai_api_key=settings.OPENAI_API_KEY
-        # )
-        llm = llm_manager.get_llm()
+NO_CONTEXT_RESULT = {
+    "answer": "I counld not find relevant information to answer your question.",
+    "confidence": "LOW",
+    "context_sources": [],
+    "context_used": ""
+}
+
+
+def _cache_document_key(document_id: str, max_context_chunks: int) -> str:
+    # Cache key includes the number of context chunks, it changes the answer
+    return f"{document_id or ''}:{max_context_chunks}"
+
+
+def _get_cached_answer(question, organization_id, document_id, max_context_chunks, rag_version, query_embedding):
+    """Answer from cache: exact question first, then a near-duplicate by embedding"""
+    cached_result, cache_match = answer_cache.get(
+        organization_id, _cache_document_key(document_id, max_context_chunks),
+        normalize_query(question), rag_version, query_embedding
+    )
+    if cached_result is None:
+        return None
+    print(f"Answer cache hit ({cache_match}) for question '{question}'")
+    return {**cached_result, "cached": True, "cache_match": cache_match}
+
+
+def _retrieve(question, organization_id, document_id, max_context_chunks, rag_version):
+    """
+    Returns (query_embedding, cached_result, context_results). Identifier questions
+    ("POL-2023-0042") that the lexical index matches need no embedding: the cache is checked
+    for an exact match only and the lexical hits are the context. Otherwise the embedding,
+    itself cached, serves both the answer cache lookup and the search.
+    """
+    context_results = identifier_fast_path(question, organization_id, document_id, max_context_chunks)
+    if context_results:
+        cached_result = _get_cached_answer(question, organization_id, document_id, max_context_chunks, rag_version, None)
+        return None, cached_result, context_results
+
+    query_embedding, _ = get_query_embedding(question)
+    cached_result = _get_cached_answer(question, organization_id, document_id, max_context_chunks, rag_version, query_embedding)
+    if cached_result is not None:
+        return query_embedding, cached_result, None
+    return query_embedding, None, search_documents(question,organization_id,document_id,max_context_chunks,query_embedding=query_embedding)
+
 
-        prompt = prompt_template.format(context=context_string, question=question)
+async def _aretrieve(question, organization_id, document_id, max_context_chunks, rag_version):
+    """Async version of _retrieve"""
+    context_results = await asyncio.to_thread(identifier_fast_path, question, organization_id, document_id, max_context_chunks)
+    if context_results:
+        cached_result = _get_cached_answer(question, organization_id, document_id, max_context_chunks, rag_version, None)
+        return None, cached_result, context_results
+
+    query_embedding, _ = await aget_query_embedding(question)
+    cached_result = _get_cached_answer(question, organization_id, document_id, max_context_chunks, rag_version, query_embedding)
+    if cached_result is not None:
+        return query_embedding, cached_result, None
+    return query_embedding, None, await asearch_documents(question,organization_id,document_id,max_context_chunks,query_embedding=query_embedding)
+
+
+def build_prompt(question: str, context_results) -> tuple:
+    """Returns (prompt, context_string) for the retrieved chunks"""
+    context_texts = []
+    for result in context_results:
+        context_texts.append(f"Context {len(context_texts) + 1}: {result['text']}")
+    context_string = "\n\n".join(context_texts)
+    return PROMPT_TEMPLATE.format(context=context_string, question=question), context_string
+
+
+_RELEVANCE_LEVELS = {"High": 0, "Medium": 1, "Low": 2}
+
+
+def get_confidence(context_results) -> str:
+    """
+    Confidence based on context quality. Uses the per-result relevance labels, since
+    vector, lexical and fused scores are on different scales; the labels all come from
+    the query/chunk similarity (search_service._relevance) or an exact identifier match.
+    """
+    avg_level = sum(_RELEVANCE_LEVELS[result['relevance']] for result in context_results) / len(context_results)
+    return "High" if avg_level < 0.5 else "Medium" if avg_level < 1.5 else "Low"
+
+
+def _finish_answer(question, organization_id, document_id, max_context_chunks, rag_version,
+                   query_embedding, context_results, context_string, response, llm_ms):
+    result = {
+        "answer": response.content,
+        "confidence": get_confidence(context_results),
+        "context_sources": context_results,
+        "context_used": context_string
+    }
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    answer_cache.set(
+        organization_id, _cache_document_key(document_id, max_context_chunks), normalize_query(question),
+        rag_version, result, query_embedding, llm_ms, usage.get("total_tokens", 0)
+    )
+    return result
+
+
+def answer_question(question: str,organization_id:str,document_id: str = None,max_context_chunks: int = 5,rag_version: int = 0):
+    """
+    rag_version is the organization's current content version (crud.organization.get_rag_version);
+    cached answers from an older version are never returned.
+    """
+    try:
+        print(f"Answering question: {question}")
+        # Step 0 & 1: Answer from cache, or search for relevant context
+        query_embedding, cached_result, context_results = _retrieve(question, organization_id, document_id, max_context_chunks, rag_version)
+        if cached_result is not None:
+            return cached_result
+        if not context_results:
+            return dict(NO_CONTEXT_RESULT)
+        print(  f"Found {len(context_results)} context chunks for question '{question}'")
+
+        # Step 2 & 3: Prepare context and prompt for LLM
+        prompt, context_string = build_prompt(question, context_results)
+
+        # Step 4: Get answer from GPT
+        llm = llm_manager.get_llm()
+        llm_start_time = time.perf_counter()
         response = llm.invoke(prompt)
+        llm_ms = (time.perf_counter() - llm_start_time) * 1000
+
+        # Step 5: Determine confidence and cache the answer
+        return _finish_answer(question, organization_id, document_id, max_context_chunks, rag_version,
+                              query_embedding, context_results, context_string, response, llm_ms)
+    except Exception as e:
+        print(f"Error answering question: {e}")
+        return None
 
-        # Step 5: Determine confidence based on context quality
-        avg_score = sum(result['score'] for result in context_results) / len(context_results)
-        confidence = "High" if avg_score < 0.3 else "Medium" if avg_score < 0.6 else "Low"
 
-        # Return the actual response, not just True!
-        return {
-            "answer": response.content,
-            "confidence": confidence,
-            "context_sources": context_results,
-            "context_used": context_string
-        }
+async def aanswer_question(question: str,organization_id:str,document_id: str = None,max_context_chunks: int = 5,rag_version: int = 0):
+    """
+    Async version of answer_question: embedding, vector query and LLM call are awaited,
+    so a waiting question holds no thread and one worker can serve many concurrently.
+    """
+    try:
+        print(f"Answering question: {question}")
+        query_embedding, cached_result, context_results = await _aretrieve(question, organization_id, document_id, max_context_chunks, rag_version)
+        if cached_result is not None:
+            return cached_result
+        if not context_results:
+            return dict(NO_CONTEXT_RESULT)
+        print(  f"Found {len(context_results)} context chunks for question '{question}'")
+
+        prompt, context_string = build_prompt(question, context_results)
+
+        llm = llm_manager.get_llm()
+        llm_start_time = time.perf_counter()
+        response = await llm.ainvoke(prompt)
+        llm_ms = (time.perf_counter() - llm_start_time) * 1000
+
+        return _finish_answer(question, organization_id, document_id, max_context_chunks, rag_version,
+                              query_embedding, context_results, context_string, response, llm_ms)
     except Exception as e:
         print(f"Error answering question: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+async def astream_answer(question: str,organization_id:str,document_id: str = None,max_context_chunks: int = 5,rag_version: int = 0):
+    """
+    Streaming version of aanswer_question. Async generator of (event, data) pairs:
+      ("sources", {...})  retrieved context, sent before the LLM is called
+      ("token", {...})    answer text as it is generated
+      ("done", {...})     confidence and timings
+    A cached answer is sent as a single token event.
+    """
+    start_time = time.perf_counter()
+
+    def elapsed_ms():
+        return round((time.perf_counter() - start_time) * 1000, 2)
+
+    query_embedding, cached_result, context_results = await _aretrieve(question, organization_id, document_id, max_context_chunks, rag_version)
+    if cached_result is not None:
+        yield "sources", {"context_sources": cached_result["context_sources"], "cached": True, "retrieval_ms": elapsed_ms()}
+        yield "token", {"token": cached_result["answer"]}
+        yield "done", {
+            "confidence": cached_result["confidence"],
+            "cached": True,
+            "cache_match": cached_result["cache_match"],
+            "time_to_first_token_ms": elapsed_ms(),
+            "response_time_ms": elapsed_ms()
+        }
+        return
+
+    yield "sources", {"context_sources": context_results, "cached": False, "retrieval_ms": elapsed_ms()}
+
+    if not context_results:
+        yield "token", {"token": NO_CONTEXT_RESULT["answer"]}
+        yield "done", {"confidence": NO_CONTEXT_RESULT["confidence"], "cached": False, "response_time_ms": elapsed_ms()}
+        return
+
+    prompt, context_string = build_prompt(question, context_results)
+
+    llm = llm_manager.get_llm()
+    llm_start_time = time.perf_counter()
+    time_to_first_token_ms = None
+    response = None
+    async for chunk in llm.astream(prompt):
+        # Chunks add up to the full message, usage metadata included
+        response = chunk if response is None else response + chunk
+        if chunk.content:
+            if time_to_first_token_ms is None:
+                time_to_first_token_ms = elapsed_ms()
+            yield "token", {"token": chunk.content}
+    llm_ms = (time.perf_counter() - llm_start_time) * 1000
+
+    result = _finish_answer(question, organization_id, document_id, max_context_chunks, rag_version,
+                            query_embedding, context_results, context_string, response, llm_ms)
+    yield "done", {
+        "confidence": result["confidence"],
+        "cached": False,
+        "time_to_first_token_ms": time_to_first_token_ms,
+        "llm_ms": round(llm_ms, 2),
+        "response_time_ms": elapsed_ms()
+    }
@@ -2,50 +2,13 @@ from operator import index
 from PyPDF2 import PdfReader
 # from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings , ChatOpenAI
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone, ServerlessSpec
-import time
+from langchain_openai import OpenAIEmbeddings
 from app.core.vector_store import vector_store_manager
 from app.core.config import settings
 from app.core.llm import llm_manager
 
-embeddings = OpenAIEmbeddings(
-    model="text-embedding-ada-002",
-    openai_api_key=settings.OPENAI_API_KEY
-)
-
-
-index_name = settings.PINECONE_INDEX_NAME
-
-# Initialize Pinecone client manually
-pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-
-# Fix: Get the list of index names correctly
-existing_indexes = [index_info["name"] for index_info in pc.list_indexes()]
-
-# Check if the index exists, and create it if not
-if index_name not in existing_indexes:
-    print(f"Creating Pinecone index: {index_name}...")
-    pc.create_index(
-        name=index_name,
-        dimension=1536,
-        metric="cosine", # Or "dotproduct" or "euclidean"
-        spec=ServerlessSpec(cloud="aws", region="us-east-1") # Adjust cloud and region as needed
-    )
-    # Wait for index to be ready
-    while not pc.describe_index(index_name).status["ready"]:
-         print("Waiting for index to be ready...")
-         time.sleep(1)
-    print("Index created.")
-else:
-    print(f"Pinecone index '{index_name}' already exists.")
-
-# Connect to the index
-pinecone_index = pc.Index(index_name)
-
-# Create vector store with the index
-vector_store = PineconeVectorStore(index=pinecone_index, embedding=embeddings)
+# Legacy module, superseded by document_service / vector_service / qa_service. It reuses
+# the shared vector_store_manager clients, which are created on first use.
 
 def process_documents(file_path: str,document_id:str):
     print(f"Processing Document {file_path} with {document_id}")
@@ -1,41 +1,312 @@
+import asyncio
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from app.core.vector_store import vector_store_manager
-def search_documents(query: str,organization_id: str, document_id: str = None, top_k: int = 5):
+from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import register_collector
+from app.services import diversification_service, lexical_service
+
+# Most traffic is a few hundred recurring questions per organization, so the query
+# embedding (an OpenAI round trip) is cached per worker process.
+query_embedding_cache = TTLCache(settings.QUERY_EMBEDDING_CACHE_SIZE, settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS)
+_embedding_timings = {"embed_calls": 0, "embed_ms_total": 0.0, "saved_ms_total": 0.0}
+_embedding_timings_lock = threading.Lock()
+# Runs the BM25 side of sync hybrid searches while the calling thread does the vector query
+_lexical_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="lexical-search")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key of a query: case and whitespace folded so repeats hit the cache. Only the key;
+    the embedding is computed from the query as the user wrote it.
+    """
+    return " ".join(query.lower().split())
+
+
+def _average_embed_ms() -> float:
+    if not _embedding_timings["embed_calls"]:
+        return 0.0
+    return _embedding_timings["embed_ms_total"] / _embedding_timings["embed_calls"]
+
+
+def _cached_query_embedding(normalized_query: str):
+    """Cache lookup shared by the sync and async paths; credits a hit with the average embedding latency"""
+    embedding = query_embedding_cache.get(normalized_query)
+    if embedding is not None:
+        with _embedding_timings_lock:
+            saved_ms = _average_embed_ms()
+            _embedding_timings["saved_ms_total"] += saved_ms
+        print(f"Query embedding cache hit, saved ~{saved_ms:.1f} ms")
+    return embedding
+
+
+def _record_query_embedding(normalized_query: str, embedding, elapsed_ms: float):
+    with _embedding_timings_lock:
+        _embedding_timings["embed_calls"] += 1
+        _embedding_timings["embed_ms_total"] += elapsed_ms
+    query_embedding_cache.set(normalized_query, embedding)
+
+
+def get_query_embedding(query: str):
+    """
+    Returns (embedding, cached) for a query. A cache hit is credited with the
+    average latency of an embedding call as the time it saved. The embedding is of the
+    original query; the normalized form is only the cache key.
+    """
+    normalized_query = normalize_query(query)
+    embedding = _cached_query_embedding(normalized_query)
+    if embedding is not None:
+        return embedding, True
+
+    start_time = time.perf_counter()
+    embedding = vector_store_manager.get_embeddings().embed_query(query)
+    _record_query_embedding(normalized_query, embedding, (time.perf_counter() - start_time) * 1000)
+    return embedding, False
+
+
+async def aget_query_embedding(query: str):
+    """Async version of get_query_embedding"""
+    normalized_query = normalize_query(query)
+    embedding = _cached_query_embedding(normalized_query)
+    if embedding is not None:
+        return embedding, True
+
+    start_time = time.perf_counter()
+    embedding = await vector_store_manager.get_embeddings().aembed_query(query)
+    _record_query_embedding(normalized_query, embedding, (time.perf_counter() - start_time) * 1000)
+    return embedding, False
+
+
+def query_embedding_cache_stats():
+    stats = query_embedding_cache.stats()
+    with _embedding_timings_lock:
+        stats["avg_embed_ms"] = round(_average_embed_ms(), 2)
+        stats["saved_ms_total"] = round(_embedding_timings["saved_ms_total"], 2)
+        stats["avg_saved_ms_per_request"] = round(_embedding_timings["saved_ms_total"] / (stats["hits"] + stats["misses"]), 2) if stats["hits"] + stats["misses"] else 0.0
+    return stats
+
+
+register_collector("query_embedding_cache", query_embedding_cache_stats)
+
+
+def _build_filter(organization_id: str, document_id: str = None):
+    # Build filter based on what's provided
+    filter_dict = {"organization_id": organization_id}
+
+    if document_id:
+        # Search in specific document
+        filter_dict.update({"document_id": document_id}) 
+    return filter_dict
+
+
+def _relevance(similarity: float) -> str:
+    """Relevance label of a query/chunk cosine similarity (vector backend scores are similarities)"""
+    if similarity >= settings.RELEVANCE_HIGH_SIMILARITY:
+        return "High"
+    return "Medium" if similarity >= settings.RELEVANCE_MEDIUM_SIMILARITY else "Low"
+
+
+def _format_results(results):
+    formatted_results = []
+    for doc, score in results:
+        result = {
+            "id": doc.id,
+            "text": doc.page_content,
+            "score": float(score),
+            "relevance": _relevance(score),
+            "metadata": doc.metadata
+        }
+        formatted_results.append(result)
+    return formatted_results
+
+
+def _format_lexical_results(results):
+    """Identifier fast path: every hit contains the identifier verbatim, an exact match"""
+    return [
+        {"id": doc.id, "text": doc.page_content, "score": float(score), "relevance": "High", "metadata": doc.metadata, "retrieval": "lexical"}
+        for doc, score in results
+    ]
+
+
+def _similarities(organization_id: str, query_embedding, ids):
+    """Cosine similarity of the query to chunks the vector search did not return; best effort"""
+    if not ids:
+        return {}
+    try:
+        vectors = vector_store_manager.get_backend().fetch_vectors(organization_id, ids)
+    except Exception as e:
+        print(f"Error fetching vectors to label lexical results: {e}")
+        return {}
+    query_vector = np.asarray(query_embedding, dtype=np.float32)
+    query_vector /= np.linalg.norm(query_vector) or 1
+    return {
+        chunk_id: float(np.dot(np.asarray(vector, dtype=np.float32), query_vector) / (np.linalg.norm(vector) or 1))
+        for chunk_id, vector in vectors.items()
+    }
+
+
+def _fuse_results(vector_results, lexical_results, top_k: int, query_embedding, organization_id: str):
+    """
+    Reciprocal rank fusion: each chunk scores sum(1 / (HYBRID_RRF_K + rank)) over the
+    lists it appears in, so agreement between retrievers outranks a high rank in one.
+    Falls back to the vector results as they are when the lexical index has nothing.
+
+    Relevance labels are on one scale whatever the source: the chunk's cosine similarity
+    to the query. BM25 scores have none, so lexical-only chunks in the result have their
+    vectors fetched; one that cannot be scored is "Low".
+    """
+    if not lexical_results:
+        return _format_results(vector_results[:top_k])
+    fused = {}
+    for source, results in (("vector", vector_results), ("lexical", lexical_results)):
+        for rank, (doc, score) in enumerate(results, start=1):
+            entry = fused.setdefault(doc.id, {"doc": doc, "score": 0.0, "sources": []})
+            entry["score"] += 1 / (settings.HYBRID_RRF_K + rank)
+            entry["sources"].append(source)
+            if source == "vector":
+                entry["vector_score"] = float(score)
+
+    ranked = sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[:top_k]
+    similarities = _similarities(organization_id, query_embedding, [
+        entry["doc"].id for entry in ranked if "vector_score" not in entry
+    ])
+
+    def relevance(entry) -> str:
+        similarity = entry.get("vector_score", similarities.get(entry["doc"].id))
+        return "Low" if similarity is None else _relevance(similarity)
+
+    return [
+        {
+            "id": entry["doc"].id,
+            "text": entry["doc"].page_content,
+            "score": round(entry["score"], 6),
+            "relevance": relevance(entry),
+            "metadata": entry["doc"].metadata,
+            "retrieval": "hybrid" if len(entry["sources"]) > 1 else entry["sources"][0]
+        }
+        for entry in ranked
+    ]
+
+
+def _lexical_search(query: str, organization_id: str, document_id: str, top_k: int):
+    """The lexical side is best effort: on error, search degrades to vector only"""
+    try:
+        return lexical_service.search(query, organization_id, document_id, top_k)
+    except Exception as e:
+        print(f"Error in lexical search, using vector results only: {e}")
+        return []
+
+
+def identifier_fast_path(query: str, organization_id: str, document_id: str, top_k: int):
+    """
+    Exact identifier lookups ("POL-2023-0042") are answered from the lexical index, without
+    an embedding call. Returns the formatted results, or None when the query is not an
+    identifier or nothing matched it.
+    """
+    if not settings.HYBRID_SEARCH_ENABLED or not lexical_service.looks_like_identifier(query):
+        return None
+    try:
+        results = lexical_service.search_identifier(query, organization_id, document_id, top_k)
+    except Exception as e:
+        print(f"Error in identifier lookup: {e}")
+        return None
+    lexical_service.record("fast_path_queries" if results else "fast_path_misses")
+    return _format_lexical_results(results) if results else None
+
+
+def _diversify(results, query_embedding, organization_id: str, top_k: int):
+    """Optional MMR + adjacent-chunk merge stage; on error the plain top_k is kept"""
+    try:
+        return diversification_service.diversify(results, query_embedding, organization_id, top_k, settings.MMR_LAMBDA)
+    except Exception as e:
+        print(f"Error diversifying results: {e}")
+        return results[:top_k]
+
+
+def search_documents(query: str,organization_id: str, document_id: str = None, top_k: int = 5, query_embedding=None, diversify: bool = None):
     """
     Universal search method - handles all search scenarios
+    query_embedding can be passed when the caller already embedded the query; the
+    identifier fast path is then skipped, callers check identifier_fast_path() first.
+    With HYBRID_SEARCH_ENABLED the BM25 search runs next to the vector query and both
+    result lists are merged with reciprocal rank fusion.
+    With diversify (default SEARCH_DIVERSIFY) MMR_FETCH_K candidates are re-ranked with
+    MMR and adjacent chunks of a document are merged into one span.
     """
     try:
-        vector_store = vector_store_manager.get_vector_store()
+        backend = vector_store_manager.get_backend()
         print(f"Searching for: '{query}'")
-        
-        # Build filter based on what's provided
-        filter_dict = {"organization_id": organization_id}
+        filter_dict = _build_filter(organization_id, document_id)
+        diversify = settings.SEARCH_DIVERSIFY if diversify is None else diversify
+        fetch_k = max(top_k, settings.MMR_FETCH_K) if diversify else top_k
 
-        if document_id:
-            # Search in specific document
-            filter_dict.update({"document_id": document_id}) 
-        
-        
+        if query_embedding is None:
+            fast_results = identifier_fast_path(query, organization_id, document_id, top_k)
+            if fast_results:
+                return fast_results
+
+        if settings.HYBRID_SEARCH_ENABLED:
+            candidates = max(fetch_k, settings.HYBRID_CANDIDATES)
+            lexical_future = _lexical_executor.submit(_lexical_search, query, organization_id, document_id, candidates)
+        if query_embedding is None:
+            query_embedding, _ = get_query_embedding(query)
         print (f"Filter applied: {filter_dict}")
-        # Perform search with or without filter
-        if filter_dict:
-            results = vector_store.similarity_search_with_score(
-                query, k=top_k, filter=filter_dict
-            )
+
+        if settings.HYBRID_SEARCH_ENABLED:
+            vector_results = backend.query(organization_id, query_embedding, candidates, filter_dict)
+            lexical_service.record("hybrid_queries")
+            results = _fuse_results(vector_results, lexical_future.result(), fetch_k, query_embedding, organization_id)
         else:
-            results = vector_store.similarity_search_with_score(query, k=top_k)
-        
-        # Format results
-        formatted_results = []
-        for doc, score in results:
-            result = {
-                "text": doc.page_content,
-                "score": float(score),
-                "relevance": "High" if score < 0.3 else "Medium" if score < 0.6 else "Low",
-                "metadata": doc.metadata
-            }
-            formatted_results.append(result)
-        return formatted_results
+            results = _format_results(backend.query(organization_id, query_embedding, fetch_k, filter_dict))
+
+        return _diversify(results, query_embedding, organization_id, top_k) if diversify else results
         
     except Exception as e:
         print(f"Error searching documents: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+async def asearch_documents(query: str,organization_id: str, document_id: str = None, top_k: int = 5, query_embedding=None, diversify: bool = None):
+    """Async version of search_documents, the embedding and the vector query don't hold a thread"""
+    try:
+        backend = vector_store_manager.get_backend()
+        print(f"Searching for: '{query}'")
+        filter_dict = _build_filter(organization_id, document_id)
+        diversify = settings.SEARCH_DIVERSIFY if diversify is None else diversify
+        fetch_k = max(top_k, settings.MMR_FETCH_K) if diversify else top_k
+
+        if query_embedding is None:
+            fast_results = await asyncio.to_thread(identifier_fast_path, query, organization_id, document_id, top_k)
+            if fast_results:
+                return fast_results
+
+        async def vector_search(k: int):
+            embedding = query_embedding
+            if embedding is None:
+                embedding, _ = await aget_query_embedding(query)
+            return embedding, await backend.aquery(organization_id, embedding, k, filter_dict)
+
+        if settings.HYBRID_SEARCH_ENABLED:
+            candidates = max(fetch_k, settings.HYBRID_CANDIDATES)
+            (query_embedding, vector_results), lexical_results = await asyncio.gather(
+                vector_search(candidates),
+                asyncio.to_thread(_lexical_search, query, organization_id, document_id, candidates)
+            )
+            lexical_service.record("hybrid_queries")
+            # May fetch vectors to label lexical-only hits; off the loop for remote backends
+            results = await asyncio.to_thread(_fuse_results, vector_results, lexical_results, fetch_k, query_embedding, organization_id)
+        else:
+            query_embedding, vector_results = await vector_search(fetch_k)
+            results = _format_results(vector_results)
+
+        if diversify:
+            # Vector fetch plus a few small matrix products; off the loop for remote backends
+            return await asyncio.to_thread(_diversify, results, query_embedding, organization_id, top_k)
+        return results
+
+    except Exception as e:
+        print(f"Error searching documents: {e}")
+        return []
@@ -0,0 +1,52 @@
+import hashlib
+import os
+from typing import BinaryIO, Tuple
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an uploaded file goes over the allowed number of bytes"""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"Upload exceeds the limit of {max_bytes} bytes")
+
+
+def _copy_to_disk(source: BinaryIO, file_path: str, max_bytes: int, chunk_size: int) -> Tuple[int, str]:
+    """
+    Copies the file in fixed-size pieces, hashing and counting bytes as it goes.
+    Only one piece is held in memory at a time. The partial file is removed if the limit is hit.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(file_path, "wb") as destination:
+            while True:
+                piece = source.read(chunk_size)
+                if not piece:
+                    break
+                size += len(piece)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                sha256.update(piece)
+                destination.write(piece)
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return size, sha256.hexdigest()
+
+
+async def save_upload_file(file: UploadFile, file_path: str, max_bytes: int) -> Tuple[int, str]:
+    """
+    Streams an UploadFile to file_path without blocking the event loop.
+    Returns (size_in_bytes, sha256_hex). Raises UploadTooLargeError past max_bytes.
+    """
+    # Starlette reports the size of the spooled part, reject obvious offenders before touching the disk
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    await file.seek(0)
+    return await run_in_threadpool(_copy_to_disk, file.file, file_path, max_bytes, settings.UPLOAD_CHUNK_SIZE_BYTES)
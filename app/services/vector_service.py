@@ -1,19 +1,112 @@
 from app.core.vector_store import vector_store_manager
-def store_chunks_in_pinecone(chunks):
+from app.core.vector_backends import TEXT_KEY
+
+# Default number of records per upsert request
+ID_BATCH_SIZE = 100
+
+
+def _batched(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fetch_stored_text_hashes(backend, organization_id, ids):
+    """Returns {chunk_id: text_hash} for the chunks that already exist in the vector store"""
+    return {
+        vector_id: metadata.get("text_hash")
+        for vector_id, metadata in backend.fetch_metadata(organization_id, ids).items()
+    }
+
+
+def delete_stale_chunks(organization_id, document_id, current_ids, backend=None):
+    """Removes chunks left over from a previous, longer version of the document"""
+    backend = backend or vector_store_manager.get_backend()
+    current_ids = set(current_ids)
+    stale_ids = [
+        vector_id for vector_id in backend.list_ids(organization_id, f"{document_id}_chunk_")
+        if vector_id not in current_ids
+    ]
+    if stale_ids:
+        backend.delete(organization_id, stale_ids)
+    return len(stale_ids)
+
+
+def delete_organization_vectors(organization_id):
+    """Drops every vector of a deleted organization"""
+    try:
+        vector_store_manager.get_backend().delete_organization(organization_id)
+        print(f"Deleted vectors of organization {organization_id}")
+    except Exception as e:
+        print(f"Error deleting vectors of organization {organization_id}: {e}")
+        raise
+
+
+def filter_changed_chunks(chunks):
+    """Incremental re-index: keeps only the chunks whose text_hash differs from the stored one"""
+    if not chunks:
+        return chunks
+    organization_id = chunks[0]["metadata"]["organization_id"]
+    stored_hashes = _fetch_stored_text_hashes(
+        vector_store_manager.get_backend(), organization_id, [chunk["id"] for chunk in chunks]
+    )
+    return [chunk for chunk in chunks if stored_hashes.get(chunk["id"]) != chunk["metadata"]["text_hash"]]
+
+
+def embed_chunks(chunks):
+    """Embeds one batch of chunks, returns the vectors in chunk order"""
+    if not chunks:
+        return []
+    return vector_store_manager.get_embeddings().embed_documents([chunk["text"] for chunk in chunks])
+
+
+def upsert_embedded_chunks(chunks, vectors, batch_size: int = ID_BATCH_SIZE):
+    """
+    Writes already embedded chunks, keyed by chunk id. The text goes in the metadata
+    under TEXT_KEY, where search reads it back as page_content.
+    """
+    if not chunks:
+        return
+    backend = vector_store_manager.get_backend()
+    organization_id = chunks[0]["metadata"]["organization_id"]
+    records = [
+        {"id": chunk["id"], "values": vector, "metadata": {**chunk["metadata"], TEXT_KEY: chunk["text"]}}
+        for chunk, vector in zip(chunks, vectors)
+    ]
+    for batch in _batched(records, batch_size):
+        backend.upsert(organization_id, batch)
+
+
+def store_chunks_in_pinecone(chunks, incremental: bool = False):
+    """
+    Embeds and upserts chunks into the configured vector backend, keyed by their
+    deterministic chunk id, so retries and re-processing overwrite vectors instead of
+    duplicating them.
+    With incremental=True only chunks whose text_hash differs from the stored one are
+    re-embedded and written, and chunks that no longer exist are deleted.
+    """
     try:
-        vector_store = vector_store_manager.get_vector_store()
-        texts = []
-        metadatas = []
-        for chunk in chunks:
-         texts.append(chunk["text"])
-         metadatas.append(chunk["metadata"])
-
-         # LangChain handles embedding generation + storage automatically!
-        # vector_store.add_texts(texts=texts, metadatas=metadatas)
-        vector_store.add_texts(texts=texts, metadatas=metadatas)
+        total_chunks = len(chunks)
+
+        if incremental and chunks:
+            backend = vector_store_manager.get_backend()
+            organization_id = chunks[0]["metadata"]["organization_id"]
+            document_id = chunks[0]["metadata"]["document_id"]
+            chunk_ids = [chunk["id"] for chunk in chunks]
+            stored_hashes = _fetch_stored_text_hashes(backend, organization_id, chunk_ids)
+            removed = delete_stale_chunks(organization_id, document_id, chunk_ids, backend)
+            chunks = [
+                chunk for chunk in chunks
+                if stored_hashes.get(chunk["id"]) != chunk["metadata"]["text_hash"]
+            ]
+            print(f"Incremental re-index: {len(chunks)} of {total_chunks} chunks changed, {removed} stale chunks removed")
+
+        if not chunks:
+            return True
+
+        upsert_embedded_chunks(chunks, embed_chunks(chunks))
         
-        print(f"✅ Successfully stored {len(chunks)} chunks in Pinecone!")
+        print(f"✅ Successfully stored {len(chunks)} chunks in the vector store!")
         return True
     except Exception as e:
         print(f"Error while storing chunks in db {e}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,118 @@
+"""
+Ingestion worker: claims jobs from the MongoDB `ingestion_jobs` queue and runs the
+PDF -> chunks -> embeddings -> Pinecone pipeline outside of the API process.
+
+Usage:
+    python -m app.worker                  # one worker process
+    python -m app.worker --processes 4    # four worker processes on this host
+    python -m app.worker --jobs 8         # eight concurrent jobs in one process
+
+Workers claim jobs atomically, so any number of them can run on any number of hosts.
+Jobs running in the same process share one embedding scheduler, which packs their
+chunks into token-budgeted requests. EMBEDDING_TOKENS_PER_MINUTE is split evenly between
+the --processes started here; give workers on other hosts their own share of the quota.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+
+from app.core.config import settings
+from app.db.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from app.crud import ingestion_job as crud_ingestion_job
+from app.core.metrics import collect_metrics
+from app.core.vector_store import vector_store_manager
+from app.services import document_service
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def process_job(db, job: dict):
+    loop = asyncio.get_running_loop()
+
+    def on_progress(stage: str, progress: float):
+        # Called from the pipeline thread; hand the DB write back to the event loop
+        future = asyncio.run_coroutine_threadsafe(
+            crud_ingestion_job.update_job_progress(db, job, stage, progress), loop
+        )
+        future.result()
+
+    try:
+        # The pipeline is blocking (PDF parsing, OpenAI and Pinecone calls), keep it off the loop
+        success = await asyncio.to_thread(
+            document_service.process_documents,
+            job["path"],
+            job["document_id"],
+            job["organization_id"],
+            on_progress,
+            incremental=job.get("mode") == crud_ingestion_job.JOB_MODE_INCREMENTAL
+        )
+        if not success:
+            raise RuntimeError("Failed to store chunks")
+        if await crud_ingestion_job.complete_job(db, job):
+            logger.info(f"Job {job['_id']} completed for document {job['document_id']}, metrics: {collect_metrics()}")
+        else:
+            logger.warning(f"Job {job['_id']} finished after its lease expired and was re-claimed, result discarded")
+    except Exception as e:
+        logger.error(f"Job {job['_id']} failed on attempt {job['attempts']}: {e}")
+        if not await crud_ingestion_job.fail_job(db, job, str(e)):
+            logger.warning(f"Job {job['_id']} lease expired and was re-claimed, failure not recorded")
+
+
+async def _claim_loop(db, worker_id: str, poll_interval: float):
+    while True:
+        job = await crud_ingestion_job.claim_next_job(db, worker_id)
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+        await process_job(db, job)
+
+
+async def run_worker(worker_id: str, poll_interval: float, jobs: int = 1):
+    await connect_to_mongo()
+    db = await get_database()
+    logger.info(f"Ingestion worker {worker_id} started, running up to {jobs} jobs at a time")
+    try:
+        await asyncio.gather(*(_claim_loop(db, worker_id, poll_interval) for _ in range(max(1, jobs))))
+    finally:
+        await close_mongo_connection()
+
+
+def _start_worker(poll_interval: float, jobs: int, processes: int = 1):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # The processes started by one command share the embedding token budget
+    vector_store_manager.embedding_processes = max(1, processes)
+    try:
+        asyncio.run(run_worker(worker_id, poll_interval, jobs))
+    except KeyboardInterrupt:
+        logger.info(f"Ingestion worker {worker_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run document ingestion workers")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes to start")
+    parser.add_argument("--poll-interval", type=float, default=settings.INGESTION_POLL_INTERVAL_SECONDS,
+                        help="Seconds to wait when the queue is empty")
+    parser.add_argument("--jobs", type=int, default=settings.INGESTION_JOBS_PER_WORKER,
+                        help="Number of jobs each worker process runs concurrently")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _start_worker(args.poll_interval, args.jobs)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_start_worker, args=(args.poll_interval, args.jobs, args.processes))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Recall@k and queries/sec of the IVF index used by the local vector backend
+(app/core/vector_backends/ivf.py), against exact brute-force search, for a sweep of
+nprobe values. Use it to pick LOCAL_IVF_LISTS / LOCAL_IVF_NPROBE.
+
+    python -m benchmarks.bench_ann_recall --rows 200000 --nprobe 4 8 16 32 64
+
+Vectors are synthetic: unit vectors drawn around random topic centers, which clusters
+them the way document embeddings are. Queries are perturbed copies of held-out vectors.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+# Settings are required at import time; nothing here uses them
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "benchmark")
+
+from app.core.vector_backends.ivf import IVFIndex, default_list_count
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def clustered_vectors(rng, count, centers, spread):
+    topics = rng.integers(0, len(centers), count)
+    noise = rng.standard_normal((count, centers.shape[1]), dtype=np.float32) * (spread / np.sqrt(centers.shape[1]))
+    return normalize(centers[topics] + noise).astype(np.float32)
+
+
+def top_k(scores, k):
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.0, help="Length of the noise vector added to each topic center")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=0, help="IVF lists, 0 means sqrt(rows)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((args.topics, args.dimension), dtype=np.float32))
+    matrix = clustered_vectors(rng, args.rows, centers, args.spread)
+    queries = clustered_vectors(rng, args.queries, centers, args.spread)
+    rows = np.arange(args.rows)
+
+    start = time.perf_counter()
+    exact = [top_k(matrix @ query, args.top_k) for query in queries]
+    flat_qps = args.queries / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, rows, args.lists)
+    build_seconds = time.perf_counter() - start
+    list_count = args.lists or default_list_count(args.rows)
+
+    print(f"{args.rows} vectors x {args.dimension} dims, {list_count} lists, built in {build_seconds:.1f}s")
+    print(f"{'search':>12} {'recall@' + str(args.top_k):>10} {'QPS':>10} {'scanned':>10}")
+    print(f"{'flat':>12} {1.0:>10.3f} {flat_qps:>10.1f} {1.0:>10.1%}")
+    for nprobe in args.nprobe:
+        hits = 0
+        scanned = 0
+        start = time.perf_counter()
+        for query, expected in zip(queries, exact):
+            candidates = np.sort(index.candidates(query, nprobe))
+            scanned += len(candidates)
+            found = candidates[top_k(matrix[candidates] @ query, min(args.top_k, len(candidates)))]
+            hits += len(np.intersect1d(found, expected))
+        qps = args.queries / (time.perf_counter() - start)
+        recall = hits / (args.queries * args.top_k)
+        print(f"{'ivf/' + str(nprobe):>12} {recall:>10.3f} {qps:>10.1f} {scanned / (args.queries * args.rows):>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
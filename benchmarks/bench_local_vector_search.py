@@ -0,0 +1,79 @@
+"""
+Query latency of the local vector backend (app/core/vector_backends/local_backend.py)
+for organizations of different sizes, org-wide and filtered to one document.
+
+    python -m benchmarks.bench_local_vector_search --sizes 1000 10000 100000
+
+Vectors are random unit vectors of the ada-002 dimension, written to a temporary directory.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Settings are required at import time; the local backend never uses them
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "benchmark")
+
+from app.core.vector_backends.local_backend import LocalVectorBackend
+
+CHUNKS_PER_DOCUMENT = 200
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def build_partition(backend, organization_id: str, size: int, dimension: int, rng):
+    for start in range(0, size, 5000):
+        count = min(5000, size - start)
+        vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+        records = []
+        for offset, vector in enumerate(vectors):
+            i = start + offset
+            document_id = f"doc{i // CHUNKS_PER_DOCUMENT}"
+            records.append({
+                "id": f"{document_id}_chunk_{i % CHUNKS_PER_DOCUMENT}",
+                "values": vector,
+                "metadata": {"organization_id": organization_id, "document_id": document_id, "text": f"chunk {i}"}
+            })
+        backend.upsert(organization_id, records)
+
+
+def measure(backend, organization_id, queries, top_k, filter):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        backend.query(organization_id, query, top_k, filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = list(rng.standard_normal((args.queries, args.dimension), dtype=np.float32))
+    print(f"{'vectors':>10} {'org p50 ms':>11} {'org p99 ms':>11} {'doc p50 ms':>11} {'doc p99 ms':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        backend = LocalVectorBackend(directory, args.dimension)
+        for size in args.sizes:
+            organization_id = f"org{size}"
+            build_partition(backend, organization_id, size, args.dimension, rng)
+            org_p50, org_p99 = measure(backend, organization_id, queries, args.top_k, {"organization_id": organization_id})
+            doc_p50, doc_p99 = measure(
+                backend, organization_id, queries, args.top_k, {"organization_id": organization_id, "document_id": "doc0"}
+            )
+            print(f"{size:>10} {org_p50:>11.3f} {org_p99:>11.3f} {doc_p50:>11.3f} {doc_p99:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Login throughput and event-loop stall: a burst of POST /api/v1/token requests runs
+against the real endpoint while a probe keeps calling GET / on the same event loop.
+Compares bcrypt on the event loop (how login used to verify passwords) with the bounded
+hashing pool (app/core/password_hashing.py).
+
+    python -m benchmarks.bench_login --logins 64 --concurrency 16 --rounds 12
+
+MongoDB is replaced by an in-memory fake; bcrypt runs for real. Run the same command
+with PASSWORD_HASH_WORKERS set to compare pool sizes (0 = one per CPU core).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+# Settings are required at import time; nothing here connects anywhere
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "benchmark")
+
+from datetime import datetime
+
+import httpx
+from bson import ObjectId
+
+from app.core import security
+from app.core.password_hashing import password_hasher
+from app.db.mongodb import get_database
+from app.main import app
+
+PASSWORD = "benchmark-password"
+
+
+class FakeUsers:
+    def __init__(self, hashed_password: str):
+        self.user = {
+            "_id": ObjectId(), "username": "benchmark-user", "email": "bench@example.com",
+            "first_name": "Bench", "last_name": "Mark", "dob": datetime(1990, 1, 1), "gender": "Other",
+            "is_admin": False, "organization_id": ObjectId(), "hashed_password": hashed_password,
+            "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()
+        }
+
+    async def find_one(self, query):
+        return dict(self.user) if query.get("username") == self.user["username"] else None
+
+
+class FakeDatabase:
+    def __init__(self, hashed_password: str):
+        self.users = FakeUsers(hashed_password)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def verify_on_loop(password, hashed_password):
+    """The old login path: bcrypt called directly from the coroutine"""
+    return security.verify_password(password, hashed_password)
+
+
+async def run_burst(client: httpx.AsyncClient, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    login_latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/api/v1/token", json={"username": "benchmark-user", "password": PASSWORD})
+            response.raise_for_status()
+            login_latencies.append((time.perf_counter() - start) * 1000)
+
+    async def probe():
+        # Another user's cheap request, due every 10 ms while logins run. Latency counts from
+        # when it was due, so time spent waiting for a blocked event loop is included.
+        due = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/")
+            probe_latencies.append((time.perf_counter() - due) * 1000)
+            due = max(due + 0.01, time.perf_counter())
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+    return logins / elapsed, percentile(login_latencies, 0.5), percentile(probe_latencies, 0.5), percentile(probe_latencies, 0.99)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor of the stored hash")
+    args = parser.parse_args()
+
+    hashed_password = security.pwd_context.handler("bcrypt").using(rounds=args.rounds).hash(PASSWORD)
+    database = FakeDatabase(hashed_password)
+
+    async def fake_database():
+        return database
+
+    app.dependency_overrides[get_database] = fake_database
+    pooled_verify = password_hasher.verify
+    transport = httpx.ASGITransport(app=app)
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt cost {args.rounds}, {password_hasher.max_workers} hashing workers")
+    print(f"{'verify':>10} {'logins/s':>10} {'login p50':>10} {'probe p50':>10} {'probe p99':>10}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for label, verify in (("on-loop", verify_on_loop), ("pool", pooled_verify)):
+            password_hasher.verify = verify
+            with contextlib.redirect_stdout(io.StringIO()):
+                rate, login_p50, probe_p50, probe_p99 = await run_burst(client, args.logins, args.concurrency)
+            print(f"{label:>10} {rate:>10.1f} {login_p50:>8.0f}ms {probe_p50:>8.1f}ms {probe_p99:>8.1f}ms")
+    password_hasher.verify = pooled_verify
+    print(password_hasher.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+User name search on a large organization: the old unanchored case-insensitive $regex on
+first_name against the indexed search keys (app/crud/name_search.py), for prefix and
+substring queries. Reports the median latency of one 100-row page and the index keys /
+documents MongoDB examined for it.
+
+    python -m benchmarks.bench_name_search --users 1000000
+
+Unlike the other benchmarks this needs a MongoDB server (MONGO_URI, default
+mongodb://localhost:27017). It writes to a scratch database, <MONGO_DB_NAME>_bench_name_search,
+which is reused between runs (pass --reload to regenerate) and dropped with --drop.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+for name in ("MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "benchmark")
+
+from bson import ObjectId
+from pymongo import ASCENDING, AsyncMongoClient
+
+from app.core.config import settings
+from app.crud.name_search import name_search_filter, search_fields
+from app.db.indexes import ensure_indexes
+
+SYLLABLES = ["an", "ba", "chi", "da", "el", "fa", "go", "ha", "in", "jo", "ka", "li", "mo", "na", "or", "pa", "ra", "sa", "ta", "vi", "ya", "zu"]
+PAGE_SIZE = 100
+# Prefix queries are short, substring queries sit in the middle of names. "xyz" matches
+# nothing, the worst case for a scan; "(a+)+$" is input the old regex ran as a pattern
+QUERIES = ["k", "ka", "kal", "mora", "ana", "lizu", "xyz", "(a+)+$"]
+
+
+def synthetic_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+async def load_users(collection, organization_id: ObjectId, users: int):
+    rng = random.Random(0)
+    await collection.drop()
+    for start in range(0, users, 10_000):
+        batch = []
+        for number in range(start, min(start + 10_000, users)):
+            first_name = synthetic_name(rng)
+            batch.append({
+                "organization_id": organization_id, "username": f"user{number}", "email": f"user{number}@example.com",
+                "first_name": first_name, **search_fields(first_name)
+            })
+        await collection.insert_many(batch, ordered=False)
+
+
+def legacy_filter(organization_id: ObjectId, query: str) -> dict:
+    """How get_all_user filtered before search keys"""
+    return {"organization_id": organization_id, "first_name": {"$regex": query, "$options": "i"}}
+
+
+def indexed_filter(organization_id: ObjectId, query: str) -> dict:
+    return {"organization_id": organization_id, **name_search_filter(query)}
+
+
+async def measure(collection, query_filter: dict, sort, runs: int):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cursor = collection.find(query_filter)
+        if sort:
+            cursor = cursor.sort(sort)
+        await cursor.limit(PAGE_SIZE).to_list(length=PAGE_SIZE)
+        latencies.append((time.perf_counter() - start) * 1000)
+    cursor = collection.find(query_filter)
+    if sort:
+        cursor = cursor.sort(sort)
+    stats = (await cursor.limit(PAGE_SIZE).explain())["executionStats"]
+    return sorted(latencies)[len(latencies) // 2], stats["nReturned"], stats["totalKeysExamined"], stats["totalDocsExamined"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reload", action="store_true", help="Regenerate the users even if the scratch database has them")
+    parser.add_argument("--drop", action="store_true", help="Drop the scratch database afterwards")
+    args = parser.parse_args()
+
+    client = AsyncMongoClient(settings.MONGO_URI)
+    database_name = f"{settings.MONGO_DB_NAME}_bench_name_search"
+    db = client[database_name]
+    try:
+        organization = await db.organizations.find_one({"name": "benchmark"})
+        if organization is None:
+            organization_id = (await db.organizations.insert_one({"name": "benchmark", **search_fields("benchmark")})).inserted_id
+        else:
+            organization_id = organization["_id"]
+        if args.reload or await db.users.count_documents({"organization_id": organization_id}) != args.users:
+            print(f"Loading {args.users} users into {database_name} ...")
+            start = time.perf_counter()
+            await load_users(db.users, organization_id, args.users)
+            print(f"  {time.perf_counter() - start:.0f}s")
+        await ensure_indexes(db)
+
+        print(f"{args.users} users in one organization, {PAGE_SIZE}-row page, median of {args.runs}")
+        print(f"{'query':>10} {'search':>8} {'latency':>10} {'rows':>6} {'keys read':>10} {'docs read':>10}")
+        for query in QUERIES:
+            rows = [
+                ("$regex", await measure(db.users, legacy_filter(organization_id, query), None, args.runs)),
+                ("indexed", await measure(db.users, indexed_filter(organization_id, query), [("search_key", ASCENDING), ("_id", ASCENDING)], args.runs))
+            ]
+            for label, (latency, returned, keys, docs) in rows:
+                print(f"{query:>10} {label:>8} {latency:>8.1f}ms {returned:>6} {keys:>10} {docs:>10}")
+    finally:
+        if args.drop:
+            await client.drop_database(database_name)
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+Compares requests/sec and latency of the sync Q&A path (answer_question in Starlette's
+threadpool, as a plain `def` endpoint runs) with the async path (aanswer_question awaited
+on the event loop), against local fakes for the embedding model, Pinecone and the LLM.
+
+    python -m benchmarks.bench_qa_async --requests 400 --concurrency 50 200 400
+
+Nothing leaves the machine: the fakes sleep for the configured latencies instead.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+import types
+
+# Settings are required at import time; the fakes below never use them
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "benchmark")
+# Measure the pipeline itself, not the caches in front of it
+os.environ.setdefault("EMBEDDING_CACHE_BACKEND", "none")
+os.environ.setdefault("QUERY_EMBEDDING_CACHE_SIZE", "0")
+os.environ.setdefault("ANSWER_CACHE_SIZE", "0")
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [[0.1] * 8 for _ in texts]
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return [0.1] * 8
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(self.latency)
+        return [0.1] * 8
+
+
+class FakeVectorBackend:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.results = [
+            (Document(page_content=f"context chunk {i}", metadata={"chunk_index": i}), 0.2)
+            for i in range(5)
+        ]
+
+    def query(self, organization_id, vector, top_k, filter=None):
+        time.sleep(self.latency)
+        return self.results[:top_k]
+
+    async def aquery(self, organization_id, vector, top_k, filter=None):
+        await asyncio.sleep(self.latency)
+        return self.results[:top_k]
+
+
+class FakeLLM:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def _response(self):
+        return types.SimpleNamespace(content="answer", usage_metadata={"total_tokens": 300})
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return self._response()
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return self._response()
+
+
+class FakeManager:
+    def __init__(self, embeddings, backend, llm):
+        self.embeddings = embeddings
+        self.backend = backend
+        self.llm = llm
+
+    def get_embeddings(self):
+        return self.embeddings
+
+    def get_backend(self):
+        return self.backend
+
+    def get_llm(self):
+        return self.llm
+
+
+def install_fakes(embed_latency: float, vector_latency: float, llm_latency: float):
+    """Registers fake app.core.vector_store / app.core.llm modules so no client is created"""
+    manager = FakeManager(FakeEmbeddings(embed_latency), FakeVectorBackend(vector_latency), FakeLLM(llm_latency))
+    sys.modules["app.core.vector_store"] = types.SimpleNamespace(vector_store_manager=manager)
+    sys.modules["app.core.llm"] = types.SimpleNamespace(llm_manager=manager)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_batch(call, total_requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(f"benchmark question {concurrency}-{i}")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(total_requests)))
+    elapsed = time.perf_counter() - start
+    return total_requests / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 400])
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--vector-latency", type=float, default=0.03)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    install_fakes(args.embed_latency, args.vector_latency, args.llm_latency)
+    from starlette.concurrency import run_in_threadpool
+    from app.services import qa_service
+
+    async def sync_path(question):
+        return await run_in_threadpool(qa_service.answer_question, question, "benchmark-org")
+
+    async def async_path(question):
+        return await qa_service.aanswer_question(question, "benchmark-org")
+
+    print(f"{'path':<6} {'concurrency':>11} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for concurrency in args.concurrency:
+        for name, call in (("sync", sync_path), ("async", async_path)):
+            # The services print per request, keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                rps, p50, p99 = await run_batch(call, args.requests, concurrency)
+            print(f"{name:<6} {concurrency:>11} {rps:>8.1f} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
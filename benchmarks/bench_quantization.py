@@ -0,0 +1,81 @@
+"""
+Memory, recall@k and queries/sec of the local vector backend's quantized first pass
+(app/core/vector_backends/quantization.py) with full-precision rescoring, against
+exact float32 search. Use it to pick LOCAL_VECTOR_QUANTIZATION / LOCAL_RESCORE_FACTOR.
+
+    python -m benchmarks.bench_quantization --rows 200000 --rescore-factor 1 2 4 8 16
+
+The float32 vectors are written to a memory-mapped file, like a partition's matrix, and
+only the shortlisted rows are read back for rescoring. Vectors are synthetic, see
+bench_ann_recall.py.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Settings are required at import time; nothing here uses them
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "benchmark")
+
+from app.core.vector_backends.quantization import QuantizedMatrix
+from benchmarks.bench_ann_recall import clustered_vectors, normalize, top_k
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.0, help="Length of the noise vector added to each topic center")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((args.topics, args.dimension), dtype=np.float32))
+    queries = clustered_vectors(rng, args.queries, centers, args.spread)
+
+    with tempfile.TemporaryDirectory() as directory:
+        matrix = np.memmap(os.path.join(directory, "vectors.f32"), dtype=np.float32, mode="w+", shape=(args.rows, args.dimension))
+        for start in range(0, args.rows, 8192):
+            end = min(start + 8192, args.rows)
+            matrix[start:end] = clustered_vectors(rng, end - start, centers, args.spread)
+        matrix.flush()
+
+        start = time.perf_counter()
+        exact = [top_k(matrix @ query, args.top_k) for query in queries]
+        flat_qps = args.queries / (time.perf_counter() - start)
+        full_bytes = matrix.nbytes
+
+        print(f"{args.rows} vectors x {args.dimension} dims, float32 matrix {full_bytes / 2**20:.1f} MiB")
+        print(f"{'search':>14} {'memory':>10} {'reduction':>10} {'recall@' + str(args.top_k):>10} {'QPS':>10}")
+        print(f"{'float32':>14} {full_bytes / 2**20:>9.1f}M {1:>9.1f}x {1.0:>10.3f} {flat_qps:>10.1f}")
+        for kind in ("int8", "binary"):
+            quantized = QuantizedMatrix(kind, args.dimension)
+            quantized.extend_from(matrix, args.rows)
+            view = quantized.view(args.rows)
+            for factor in args.rescore_factor:
+                shortlist_size = args.top_k * factor
+                hits = 0
+                start = time.perf_counter()
+                for query, expected in zip(queries, exact):
+                    approximate = quantized.scores(view, query)
+                    rows = np.sort(np.argpartition(-approximate, shortlist_size - 1)[:shortlist_size])
+                    found = rows[top_k(matrix[rows] @ query, args.top_k)]
+                    hits += len(np.intersect1d(found, expected))
+                qps = args.queries / (time.perf_counter() - start)
+                recall = hits / (args.queries * args.top_k)
+                label = f"{kind}/x{factor}"
+                print(
+                    f"{label:>14} {quantized.nbytes / 2**20:>9.1f}M {full_bytes / quantized.nbytes:>9.1f}x "
+                    f"{recall:>10.3f} {qps:>10.1f}"
+                )
+        del matrix
+
+
+if __name__ == "__main__":
+    main()
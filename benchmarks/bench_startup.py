@@ -0,0 +1,76 @@
+"""
+Cold start of an API / worker process: time to import app.main (what a new worker pays
+before it can accept connections) and time for the background warm-up to create the
+vector store and LLM clients. Each run is a fresh interpreter.
+
+    python -m benchmarks.bench_startup --runs 5
+
+The warm-up uses the local vector backend by default so no network is needed; pass
+--backend pinecone to include the Pinecone index check (needs credentials and network).
+Importing must never touch the network: the import time is the same with the network
+unplugged.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+_IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import app.main
+print(json.dumps({"import_seconds": time.perf_counter() - start}))
+"""
+
+_WARM_UP_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.core.warmup import warm_up
+ready = warm_up()
+print(json.dumps({"import_seconds": imported - start, "warm_up_seconds": time.perf_counter() - imported, "ready": ready}))
+"""
+
+
+def run(snippet: str, env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", snippet], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backend", default="local", choices=["local", "pinecone"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+            env.setdefault(name, "benchmark")
+        env["VECTOR_BACKEND"] = args.backend
+        env["LOCAL_VECTOR_DIR"] = os.path.join(directory, "vectors")
+        env["EMBEDDING_CACHE_PATH"] = os.path.join(directory, "embeddings.sqlite3")
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+        imports = [run(_IMPORT_SNIPPET, env)["import_seconds"] for _ in range(args.runs)]
+        warm_ups = [run(_WARM_UP_SNIPPET, env) for _ in range(args.runs)]
+
+    print(f"{args.runs} fresh processes each, vector backend '{args.backend}'")
+    print(f"{'phase':>24} {'median':>10} {'max':>10}")
+    print(f"{'import app.main':>24} {median(imports):>9.2f}s {max(imports):>9.2f}s")
+    warm_up_seconds = [result["warm_up_seconds"] for result in warm_ups]
+    print(f"{'warm-up (background)':>24} {median(warm_up_seconds):>9.2f}s {max(warm_up_seconds):>9.2f}s")
+    if not all(result["ready"] for result in warm_ups):
+        print("warm-up did not complete in every run (see GET /api/v1/health/ready for errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Creates the MongoDB indexes registered in app/db/indexes.py and checks that the CRUD
+queries use them.
+
+Usage:
+    python setup_indexes.py            # create missing indexes, write name search keys, verify query plans
+    python setup_indexes.py --verify   # only verify; exits 1 if a query scans a collection
+
+The API does the same on startup when ENSURE_INDEXES_ON_STARTUP is set; run this before
+deploying to build indexes on large collections outside of a rollout.
+"""
+import argparse
+import asyncio
+import sys
+
+from pymongo import AsyncMongoClient
+
+from app.core.config import settings
+from app.db.indexes import ensure_indexes, verify_query_plans
+from app.crud.name_search import backfill_search_keys
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Create and verify MongoDB indexes")
+    parser.add_argument("--verify", action="store_true", help="Only check query plans, create nothing")
+    args = parser.parse_args()
+
+    client = AsyncMongoClient(settings.MONGO_URI)
+    try:
+        db = client[settings.MONGO_DB_NAME]
+        if not args.verify:
+            report = await ensure_indexes(db)
+            print(
+                f"Indexes: {len(report['created'])} created, {len(report['existing'])} already present, "
+                f"{len(report['errors'])} failed or differing from the registry"
+            )
+            for name in report["created"]:
+                print(f"  created {name}")
+            for name in report["unregistered"]:
+                print(f"  not in the registry, kept: {name}")
+            for error in report["errors"]:
+                print(f"  failed  {error}")
+            # Rows written before indexed name search have no search keys yet
+            updated = await backfill_search_keys(db)
+            print(f"Name search keys written: {updated}")
+
+        results = await verify_query_plans(db)
+        for result in results:
+            print(f"{'IXSCAN' if result['ok'] else 'SCAN  '}  {result['collection']:<16} {result['query']:<30} {' > '.join(result['stages'])}")
+        failed = [result for result in results if not result["ok"]]
+        if failed:
+            print(f"{len(failed)} queries are not served by an index")
+            return 1
+        print("All queries are served by indexes")
+        return 0
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
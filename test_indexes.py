@@ -0,0 +1,121 @@
+# test_indexes.py
+#
+# The MongoDB index registry (app/db/indexes.py) against a real server: ensure_indexes()
+# builds it, and verify_query_plans() finds every CRUD query served by an index. Uses a
+# scratch database, <MONGO_DB_NAME>_test_indexes, dropped afterwards. Skipped when no
+# server answers at MONGO_URI (default mongodb://localhost:27017):
+#
+#     python -m pytest -q test_indexes.py
+
+import asyncio
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+for name in ("MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "test")
+
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, AsyncMongoClient
+
+from app.core.config import settings
+from app.crud.name_search import search_fields
+from app.db.indexes import INDEXES, ensure_indexes, verify_query_plans
+
+
+def _server_reachable() -> bool:
+    async def ping():
+        client = AsyncMongoClient(settings.MONGO_URI, serverSelectionTimeoutMS=2000)
+        try:
+            await client.admin.command("ping")
+        finally:
+            await client.close()
+
+    try:
+        asyncio.run(ping())
+        return True
+    except Exception:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _server_reachable(), reason=f"No MongoDB server at {settings.MONGO_URI}")
+
+
+def run_in_scratch_database(scenario):
+    async def run():
+        client = AsyncMongoClient(settings.MONGO_URI)
+        database_name = f"{settings.MONGO_DB_NAME}_test_indexes"
+        await client.drop_database(database_name)
+        try:
+            return await scenario(client[database_name])
+        finally:
+            await client.drop_database(database_name)
+            await client.close()
+
+    return asyncio.run(run())
+
+
+def test_ensure_indexes_builds_the_registry():
+    async def scenario(db):
+        # An index made by hand
+        await db.users.create_index([("last_name", ASCENDING)], name="last_name_by_hand")
+
+        first = await ensure_indexes(db)
+        second = await ensure_indexes(db)
+        names = {
+            collection: {index["name"] async for index in await db[collection].list_indexes()}
+            for collection in INDEXES
+        }
+        return first, second, names
+
+    first, second, names = run_in_scratch_database(scenario)
+
+    registered = {f"{collection}.{index.document['name']}" for collection, indexes in INDEXES.items() for index in indexes}
+    assert first["errors"] == []
+    assert set(first["created"]) == registered
+    assert first["unregistered"] == ["users.last_name_by_hand"]
+    # A second run changes nothing
+    assert second["created"] == [] and second["errors"] == []
+    assert set(second["existing"]) == registered
+    for collection, indexes in INDEXES.items():
+        assert {index.document["name"] for index in indexes} <= names[collection]
+    assert "last_name_by_hand" in names["users"]
+
+
+def test_ensure_indexes_reports_indexes_that_differ_from_the_registry():
+    async def scenario(db):
+        # Registered names, but not unique / on other keys
+        await db.users.create_index([("email", ASCENDING)], name="email_unique")
+        await db.users.create_index([("username", ASCENDING), ("email", ASCENDING)], name="username_unique", unique=True)
+        report = await ensure_indexes(db)
+        indexes = {index["name"]: index async for index in await db.users.list_indexes()}
+        return report, indexes
+
+    report, indexes = run_in_scratch_database(scenario)
+
+    assert sorted(error.split(":")[0] for error in report["errors"]) == ["users.email_unique", "users.username_unique"]
+    assert "users.email_unique" not in report["existing"] and "users.username_unique" not in report["existing"]
+    # Reported, not rebuilt
+    assert not indexes["email_unique"].get("unique", False)
+    assert list(indexes["username_unique"]["key"]) == ["username", "email"]
+
+
+def test_crud_queries_are_served_by_indexes():
+    async def scenario(db):
+        await ensure_indexes(db)
+        organization_id = ObjectId()
+        await db.organizations.insert_many([{"name": name, **search_fields(name)} for name in ("Acme", "Globex", "Initech")])
+        await db.users.insert_many([
+            {
+                "organization_id": organization_id, "username": f"user{number}", "email": f"user{number}@example.com",
+                "first_name": first_name, **search_fields(first_name)
+            }
+            for number, first_name in enumerate(["Sourabh", "Maria", "Someone", "Kalina"])
+        ])
+        return await verify_query_plans(db)
+
+    results = run_in_scratch_database(scenario)
+
+    failed = [f"{result['collection']}: {result['query']} ({' > '.join(result['stages'])})" for result in results if not result["ok"]]
+    assert results
+    assert failed == []
@@ -0,0 +1,61 @@
+# test_lexical_service.py
+#
+# Which queries the identifier fast path (search_service.identifier_fast_path) answers from
+# the lexical index alone. Anything else must go through hybrid search.
+#
+#     python -m pytest -q test_lexical_service.py
+
+import os
+
+# Settings are required at import time; nothing here connects to them
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "test")
+
+import pytest
+
+from app.services.lexical_service import build_identifier_expression, is_identifier, looks_like_identifier
+
+
+@pytest.mark.parametrize("query", [
+    "POL-2023-0042",
+    "SKU44812",
+    "INV/2024/778",
+    "INV-778",
+    "find POL-2023-0042",
+    "what is SKU44812?",
+    "POL-2023-0042 POL-2023-0043",
+])
+def test_lookups_are_identifiers(query):
+    assert looks_like_identifier(query)
+
+
+@pytest.mark.parametrize("query", [
+    "What changed in 2023?",
+    "leave policy 2024",
+    "covid-19 rules",
+    "covid-19",
+    "2023",
+    "1234567",
+    "policy POL-2023-0042",
+    "what does the refund policy say",
+    "",
+])
+def test_questions_are_not_identifiers(query):
+    assert not looks_like_identifier(query)
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("A1B2", True),
+    ("2023-0042", True),
+    ("ISO-9001", True),
+    ("windows-10", False),
+    ("2024", False),
+    ("policy", False),
+    ("abc", False),
+])
+def test_is_identifier(word, expected):
+    assert is_identifier(word) is expected
+
+
+def test_identifier_expression_quotes_each_identifier_as_a_phrase():
+    assert build_identifier_expression("find POL-2023-0042?") == '"pol 2023 0042"'
@@ -0,0 +1,186 @@
+# test_pinecone_async.py
+#
+# Concurrent async queries through PineconeBackend.aquery, using the real Pinecone
+# IndexAsyncio client against a local HTTP server that answers like Pinecone's /query.
+# Needs no network or API key:
+#
+#     python -m pytest -q test_pinecone_async.py
+
+import asyncio
+import os
+import threading
+from types import SimpleNamespace
+
+# Settings are required at import time; nothing here connects to them
+for name in ("MONGO_URI", "MONGO_DB_NAME", "OPENAI_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "test")
+
+from aiohttp import web
+from pinecone import Pinecone
+
+from app.core.vector_backends.pinecone_backend import PineconeBackend
+
+CONCURRENT_QUERIES = 50
+
+
+async def start_fake_pinecone():
+    """Serves /query, answering with one match named after the namespace; returns (runner, url, stats)"""
+    stats = {"queries": 0}
+
+    async def query(request):
+        body = await request.json()
+        stats["queries"] += 1
+        # A little latency so the queries really overlap
+        await asyncio.sleep(0.01)
+        namespace = body.get("namespace", "")
+        return web.json_response({
+            "matches": [{
+                "id": f"chunk-{namespace or 'shared'}",
+                "score": 0.9 if namespace else 0.5,
+                "metadata": {"text": f"text in {namespace or 'shared'}", "organization_id": "org-1"}
+            }],
+            "namespace": namespace,
+            "usage": {"readUnits": 1}
+        })
+
+    app = web.Application()
+    app.router.add_post("/query", query)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", stats
+
+
+def make_backend(host: str, namespace_mode: str) -> PineconeBackend:
+    # Skips __init__, which would look the index up through Pinecone's control plane
+    backend = PineconeBackend.__new__(PineconeBackend)
+    backend.namespace_mode = namespace_mode
+    backend.client = Pinecone(api_key="test")
+    backend.index_host = host
+    backend._async_indexes = {}
+    backend._async_indexes_lock = threading.Lock()
+    return backend
+
+
+def run_concurrent_queries(namespace_mode: str):
+    async def scenario():
+        runner, host, stats = await start_fake_pinecone()
+        backend = make_backend(host, namespace_mode)
+        async def one_query(number: int):
+            # Staggered starts: queries begin while earlier ones are finishing, which is when
+            # a client closed on completion (LangChain's async search) breaks the others
+            await asyncio.sleep(number * 0.003)
+            return await backend.aquery("org-1", [0.1, 0.2, 0.3], top_k=5, filter={"organization_id": "org-1"})
+
+        try:
+            results = await asyncio.gather(*(one_query(number) for number in range(CONCURRENT_QUERIES)))
+            return results, stats, dict(backend._async_indexes)
+        finally:
+            await backend.aclose()
+            await runner.cleanup()
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_queries_share_one_open_client():
+    results, stats, async_indexes = run_concurrent_queries("organization")
+
+    assert stats["queries"] == CONCURRENT_QUERIES
+    assert all([document.id for document, _ in result] == ["chunk-org-1"] for result in results)
+    # One client for the loop, reused by every query
+    assert len(async_indexes) == 1
+
+
+def test_migrating_mode_queries_both_namespaces_concurrently():
+    results, stats, _ = run_concurrent_queries("migrating")
+
+    assert stats["queries"] == 2 * CONCURRENT_QUERIES
+    for result in results:
+        assert [document.id for document, _ in result] == ["chunk-org-1", "chunk-shared"]
+        assert result[0][0].page_content == "text in org-1"
+
+
+def test_aclose_closes_the_client():
+    async def scenario():
+        runner, host, _ = await start_fake_pinecone()
+        backend = make_backend(host, "shared")
+        try:
+            await backend.aquery("org-1", [0.1, 0.2, 0.3], top_k=1)
+            index = backend._async_indexes[asyncio.get_running_loop()]
+            await backend.aclose()
+            assert backend._async_indexes == {}
+            assert index._api_client.rest_client._session.closed
+            # The next query opens a fresh client
+            assert [document.id for document, _ in await backend.aquery("org-1", [0.1, 0.2, 0.3], top_k=1)] == ["chunk-shared"]
+            await backend.aclose()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+
+
+class FakeIndex:
+    """In-memory stand-in for the sync Index: namespaces of id -> (values, metadata)"""
+
+    def __init__(self, namespaces, on_fetch=None):
+        self.namespaces = namespaces
+        self.on_fetch = on_fetch
+
+    def list(self, namespace):
+        yield list(self.namespaces.get(namespace, {}))
+
+    def fetch(self, ids, namespace):
+        stored = self.namespaces.get(namespace, {})
+        vectors = {
+            vector_id: SimpleNamespace(values=stored[vector_id][0], metadata=stored[vector_id][1])
+            for vector_id in ids if vector_id in stored
+        }
+        # Runs once, after the first read returned
+        if self.on_fetch:
+            self.on_fetch, on_fetch = None, self.on_fetch
+            on_fetch(self)
+        return SimpleNamespace(vectors=vectors)
+
+    def upsert(self, vectors, namespace):
+        for vector in vectors:
+            self.namespaces.setdefault(namespace, {})[vector["id"]] = (vector["values"], vector["metadata"])
+
+    def delete(self, ids, namespace):
+        for vector_id in ids:
+            self.namespaces.get(namespace, {}).pop(vector_id, None)
+
+
+def test_migration_does_not_overwrite_or_revive_chunks():
+    metadata = {"organization_id": "org-1"}
+    shared = {"kept": ([0.1], metadata), "rewritten": ([0.1], metadata), "deleted": ([0.1], metadata)}
+
+    def worker_writes_meanwhile(index):
+        # After the migration read the page: a worker re-indexes one chunk and deletes another
+        index.upsert([{"id": "rewritten", "values": [0.9], "metadata": metadata}], namespace="org-1")
+        index.delete(["rewritten", "deleted"], namespace="")
+
+    backend = make_backend("http://unused", "migrating")
+    backend.index = FakeIndex({"": shared}, on_fetch=worker_writes_meanwhile)
+
+    counts = backend.migrate_shared_namespace()
+
+    assert backend.index.namespaces[""] == {}
+    assert backend.index.namespaces["org-1"] == {"kept": ([0.1], metadata), "rewritten": ([0.9], metadata)}
+    assert counts["moved"] == 1 and counts["superseded"] == 2
+
+
+def test_startup_reads_the_shared_namespace_only_while_it_has_vectors():
+    def mode_after_startup(configured: str, shared_vectors: int) -> str:
+        backend = make_backend("http://unused", configured)
+        stats = {"": SimpleNamespace(vector_count=shared_vectors)} if shared_vectors else {}
+        backend.index = SimpleNamespace(describe_index_stats=lambda: SimpleNamespace(namespaces=stats))
+        backend._check_shared_namespace()
+        return backend.namespace_mode
+
+    assert mode_after_startup("organization", 0) == "organization"
+    assert mode_after_startup("organization", 12) == "migrating"
+    assert mode_after_startup("migrating", 0) == "organization"
+    assert mode_after_startup("migrating", 12) == "migrating"
+    assert mode_after_startup("shared", 0) == "shared"